@@ -0,0 +1,272 @@
+"""
+End-to-end benchmarks against the fake daemon.
+
+Runs `devbox start` (create and reuse), `stop` and `it` (first attach with a
+shell probe, then a cached attach) against benchmarks.fakedaemon, and times
+find_running_container_by_image with 10 to 10 000 containers on the host.
+`devbox list` is timed from the registry in-process and as a round-trip to
+a running agent (whose API calls happen in the agent and are not counted).
+Each scenario reports its median wall time and the number of Docker API calls.
+
+Results are compared with benchmarks/baselines.json: any increase in API
+calls, or a median time above baseline * (1 + tolerance), is a regression
+and makes the run exit non-zero.
+
+    cd src && python -m benchmarks.bench                    # compare
+    cd src && python -m benchmarks.bench --update-baselines # record
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import contextlib
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fakedaemon import FakeDaemon
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+IMAGE = "bench/app:latest"
+DEFAULT_LATENCY_MS = 2.0
+DEFAULT_REPEAT = 5
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+# Timing varies between machines much more than call counts, so the default tolerance is generous.
+DEFAULT_TOLERANCE = 1.0
+
+
+def _reset() -> None:
+    from devbox import devcontainer as dc, engine
+
+    dc._session = None
+    dc._project_config = None
+    engine.STATS.clear()
+
+
+def _api_calls() -> int:
+    from devbox import devcontainer as dc, engine
+
+    session = dc.current_session()
+    return (session.api_calls if session else 0) + sum(engine.STATS.values())
+
+
+def measure(fn: Callable[[], Any], setup: Optional[Callable[[], Any]] = None, repeat: int = DEFAULT_REPEAT) -> Dict[str, Any]:
+    """
+    Median wall time of fn over repeat runs (setup runs untimed before each) and its API calls.
+    """
+    times: List[float] = []
+    calls = 0
+    for _ in range(repeat):
+        if setup is not None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                setup()
+        _reset()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - started)
+        calls = _api_calls()
+    return {"secs": statistics.median(times), "api_calls": calls}
+
+
+def _project(root: str) -> str:
+    project = os.path.join(root, "project")
+    os.makedirs(os.path.join(project, ".devcontainer"), exist_ok=True)
+    with open(os.path.join(project, ".devcontainer", "devcontainer.json"), "w") as f:
+        json.dump({"name": "bench", "image": IMAGE}, f)
+    return project
+
+
+def _project_containers(daemon: FakeDaemon) -> List[Dict[str, Any]]:
+    from devbox import devcontainer as dc
+
+    return [c for c in daemon.containers.values() if c["Labels"].get(dc.PROJECT_LABEL) == dc.project_hash()]
+
+
+def lifecycle(latency: float, repeat: int, seeded: int) -> Dict[str, Dict[str, Any]]:
+    """
+    start/stop/it scenarios on a daemon with `seeded` unrelated containers.
+    """
+    from devbox import attach, devcontainer as dc
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["DEVBOX_CACHE_DIR"] = os.path.join(root, "cache")
+        project = _project(root)
+        with FakeDaemon(os.path.join(root, "docker.sock"), latency=latency, containers=seeded, images=[IMAGE]) as daemon:
+            os.environ["DOCKER_HOST"] = daemon.url
+            os.chdir(project)
+
+            def remove_project_containers() -> None:
+                for c in _project_containers(daemon):
+                    del daemon.containers[c["Id"]]
+
+            results["start (create)"] = measure(dc.start, remove_project_containers, repeat)
+            results["start (reuse)"] = measure(dc.start, None, repeat)
+
+            def running_id() -> str:
+                (container,) = _project_containers(daemon)
+                container["State"] = "running"
+                return container["Id"]
+
+            target: Dict[str, str] = {}
+
+            def prepare_stop() -> None:
+                target["id"] = running_id()
+
+            results["stop"] = measure(lambda: dc.stop_containers([target["id"]]), prepare_stop, repeat)
+
+            # The interactive bridge needs a terminal; time everything up to it (inspect,
+            # probe, exec create) and stand in for the session with one exec inspect.
+            def fake_exec_shell(api: Any, container_id: str, shell: str) -> int:
+                exec_id = api.exec_create(container_id, [shell], stdin=True, tty=True)["Id"]
+                return int(api.exec_inspect(exec_id).get("ExitCode") or 0)
+
+            real = (attach.exec_shell, attach.can_attach_in_process)
+            attach.exec_shell, attach.can_attach_in_process = fake_exec_shell, lambda: True
+            try:
+                cid = running_id()
+
+                def forget_shells() -> None:
+                    with contextlib.suppress(OSError):
+                        os.unlink(attach._cache_path())
+
+                results["it (probe)"] = measure(lambda: dc.container_cli(cid), forget_shells, repeat)
+                results["it (cached)"] = measure(lambda: dc.container_cli(cid), None, repeat)
+            finally:
+                attach.exec_shell, attach.can_attach_in_process = real
+    return results
+
+
+def listing(latency: float, repeat: int, seeded: int) -> Dict[str, Dict[str, Any]]:
+    """
+    `devbox list` with `seeded` devbox containers: registry event replay in-process, then through the agent.
+    """
+    from devbox import agent, registry
+    from devbox import devcontainer as dc
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["DEVBOX_CACHE_DIR"] = os.path.join(root, "cache")
+        os.environ["DEVBOX_AGENT_SOCKET"] = os.path.join(root, "agent.sock")
+        os.chdir(root)
+        seed = {dc.MANAGED_LABEL: "true", dc.PROJECT_LABEL: "otherproject", dc.IMAGE_LABEL: IMAGE}
+        with FakeDaemon(os.path.join(root, "docker.sock"), latency=latency, containers=seeded, images=[IMAGE], seed_labels=seed) as daemon:
+            os.environ["DOCKER_HOST"] = daemon.url
+            with contextlib.redirect_stdout(io.StringIO()):
+                registry.refresh()
+            results["list (registry)"] = measure(lambda: registry.print_table(registry.select(registry.refresh())), None, repeat)
+            if agent.start_background() is None:
+                print("devbox agent did not start; skipping the agent benchmark.")
+                return results
+            try:
+                results["list (agent)"] = measure(lambda: agent.forward(["list"]), None, repeat)
+            finally:
+                agent.stop()
+    return results
+
+
+def lookup_scaling(latency: float, repeat: int, sizes: List[int]) -> Dict[str, Dict[str, Any]]:
+    """
+    find_running_container_by_image with n containers on the host, one of them the project's.
+    """
+    from devbox import devcontainer as dc
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as root:
+            os.environ["DEVBOX_CACHE_DIR"] = os.path.join(root, "cache")
+            # Other devbox projects' containers share the managed label, the worst case for the filter.
+            seed = {dc.MANAGED_LABEL: "true", dc.PROJECT_LABEL: "otherproject", dc.IMAGE_LABEL: IMAGE}
+            with FakeDaemon(os.path.join(root, "docker.sock"), latency=latency, containers=n - 1, images=[IMAGE], seed_labels=seed) as daemon:
+                os.environ["DOCKER_HOST"] = daemon.url
+                daemon.add_container("devbox_mine", IMAGE, dc.container_labels(IMAGE, "spec", project="mine"))
+                results[f"find container ({n} on host)"] = measure(
+                    lambda: dc.find_running_container_by_image(IMAGE, project="mine"), None, repeat
+                )
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baselines: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """
+    Return a description of every regression against the baselines.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baselines.get(name)
+        if not base:
+            continue
+        if result["api_calls"] > base["api_calls"]:
+            regressions.append(f"{name}: {result['api_calls']} API calls (baseline {base['api_calls']})")
+        if result["secs"] > base["secs"] * (1 + tolerance):
+            regressions.append(f"{name}: {result['secs'] * 1000:.1f} ms (baseline {base['secs'] * 1000:.1f} ms)")
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, Any]], baselines: Dict[str, Dict[str, Any]]) -> None:
+    width = max(len(name) for name in results)
+    print(f"{'scenario':<{width}}  {'median':>10}  {'baseline':>10}  {'calls':>5}  {'base':>5}")
+    for name, result in results.items():
+        base = baselines.get(name) or {}
+        base_ms = f"{base['secs'] * 1000:.1f} ms" if base else "-"
+        print(
+            f"{name:<{width}}  {result['secs'] * 1000:>7.1f} ms  {base_ms:>10}  "
+            f"{result['api_calls']:>5}  {base.get('api_calls', '-'):>5}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS, help="Added latency per API request.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per scenario (median is reported).")
+    parser.add_argument("--seeded", type=int, default=100, help="Unrelated containers on the host for start/stop/it.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Host sizes for the lookup benchmark.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown factor over baseline.")
+    parser.add_argument("--baselines", default=BASELINES, help="Baseline file to compare with or update.")
+    parser.add_argument("--update-baselines", action="store_true", help="Record these results as the new baselines.")
+    args = parser.parse_args(argv)
+
+    latency = args.latency_ms / 1000
+    cwd = os.getcwd()
+    saved_env = {k: os.environ.get(k) for k in ("DOCKER_HOST", "DEVBOX_CACHE_DIR", "DOCKER_API_VERSION", "DEVBOX_AGENT_SOCKET", "DEVBOX_NO_AGENT")}
+    os.environ.pop("DOCKER_API_VERSION", None)
+    os.environ.pop("DEVBOX_NO_AGENT", None)
+    try:
+        results = lifecycle(latency, args.repeat, args.seeded)
+        results.update(listing(latency, args.repeat, args.seeded))
+        results.update(lookup_scaling(latency, args.repeat, [int(s) for s in args.sizes.split(",") if s]))
+    finally:
+        os.chdir(cwd)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    try:
+        with open(args.baselines, "r") as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        stored = {}
+    baselines = stored.get("results", {}) if stored.get("latency_ms") == args.latency_ms else {}
+    print_table(results, baselines)
+
+    if args.update_baselines:
+        with open(args.baselines, "w") as f:
+            json.dump({"latency_ms": args.latency_ms, "results": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baselines written to {args.baselines}")
+        return 0
+    if not baselines:
+        print(f"No baselines for latency {args.latency_ms} ms; run with --update-baselines to record them.")
+        return 0
+    regressions = compare(results, baselines, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
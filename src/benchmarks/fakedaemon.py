@@ -0,0 +1,405 @@
+"""
+Stand-in Docker Engine API server on a unix socket.
+
+Implements the slice of the Engine API devbox uses (version, container
+list/inspect/create/start/stop/remove/rename/pause, container events, image
+inspect, exec) over
+HTTP/1.1 keep-alive, with a configurable latency added to every request and
+a configurable number of seeded containers and images. Both the docker SDK
+(DOCKER_HOST=unix://...) and devbox's asyncio engine talk to it unchanged,
+so benchmarks measure real request counts and round-trip costs.
+
+    with FakeDaemon(path, latency=0.002, containers=10_000) as daemon:
+        os.environ["DOCKER_HOST"] = daemon.url
+        ...
+"""
+import os
+import re
+import json
+import time
+import random
+import string
+import hashlib
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+API_VERSION = "1.45"
+# Shell reported by every exec, so shell probes resolve on the first try.
+SHELL = "/bin/bash"
+# Time between an exec's response headers and its first output.
+EXEC_STARTUP = 0.002
+
+_VERSION_PREFIX = re.compile(r"^/v\d+\.\d+")
+
+
+def _new_id() -> str:
+    return hashlib.sha256(os.urandom(16)).hexdigest()
+
+
+def _random_name() -> str:
+    return "seed_" + "".join(random.choices(string.ascii_lowercase, k=10))
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class FakeDaemon:
+    """
+    In-memory daemon state plus the server thread. Use as a context manager.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        latency: float = 0.0,
+        containers: int = 0,
+        images: Optional[List[str]] = None,
+        seed_labels: Optional[Dict[str, str]] = None,
+    ):
+        self.path = path
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.containers: Dict[str, Dict[str, Any]] = {}
+        self.images: Dict[str, Dict[str, Any]] = {}
+        self.execs: Dict[str, Dict[str, Any]] = {}
+        # Container events of requests made after startup (seeded containers have none).
+        self.events: List[Dict[str, Any]] = []
+        for ref in images or []:
+            self.add_image(ref)
+        for i in range(containers):
+            # Unrelated containers of other projects/tools; seed_labels lets callers make some look like devbox's.
+            labels = dict(seed_labels or {}, **{"bench.seq": str(i)})
+            self.add_container(_random_name(), "busybox:latest", labels, state="running" if i % 3 else "exited")
+
+    @property
+    def url(self) -> str:
+        return f"unix://{self.path}"
+
+    def add_image(self, ref: str, labels: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        image = {"Id": "sha256:" + _new_id(), "RepoTags": [ref], "Config": {"Labels": labels or {}}}
+        self.images[ref] = image
+        return image
+
+    def add_container(self, name: str, image: str, labels: Dict[str, str], state: str = "running") -> Dict[str, Any]:
+        container = {
+            "Id": _new_id(),
+            "Name": name,
+            "Image": image,
+            "Labels": labels,
+            "State": state,
+            "Created": time.time(),
+            "Config": {},
+            "Mounts": [],
+        }
+        self.containers[container["Id"]] = container
+        return container
+
+    def record(self, container: Dict[str, Any], action: str) -> None:
+        now = time.time()
+        attributes = dict(container["Labels"], name=container["Name"], image=container["Image"])
+        self.events.append(
+            {"Type": "container", "Action": action, "Actor": {"ID": container["Id"], "Attributes": attributes},
+             "time": int(now), "timeNano": int(now * 1e9)}
+        )
+
+    def find(self, ref: str) -> Optional[Dict[str, Any]]:
+        if ref in self.containers:
+            return self.containers[ref]
+        for c in self.containers.values():
+            if c["Name"] == ref or (len(ref) >= 12 and c["Id"].startswith(ref)):
+                return c
+        return None
+
+    def __enter__(self) -> "FakeDaemon":
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        daemon = self
+
+        class Handler(_Handler):
+            state = daemon
+
+        self.server = _Server(self.path, Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+def _matches(container: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    labels = container["Labels"]
+    for wanted in filters.get("label", []):
+        key, sep, value = wanted.partition("=")
+        if key not in labels or (sep and labels[key] != value):
+            return False
+    for name in filters.get("name", []):
+        if not re.search(name, container["Name"]):
+            return False
+    for status in filters.get("status", []):
+        if container["State"] != status:
+            return False
+    return True
+
+
+def _summary(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "Id": c["Id"],
+        "Names": ["/" + c["Name"]],
+        "Image": c["Image"],
+        "Labels": c["Labels"],
+        "State": c["State"],
+        "Status": c["State"],
+        "Created": int(c["Created"]),
+    }
+
+
+def _inspect(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "Id": c["Id"],
+        "Name": "/" + c["Name"],
+        "Image": c["Image"],
+        "Created": c["Created"],
+        "Config": dict(c["Config"], Image=c["Image"], Labels=c["Labels"]),
+        "State": {"Status": c["State"], "Running": c["State"] == "running", "Paused": c["State"] == "paused"},
+        "Mounts": c["Mounts"],
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: FakeDaemon
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _reply(self, status: int, payload: Any = None) -> None:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        # Like dockerd (Go net/http), 204 and 304 carry no body and no Content-Length.
+        if status not in (204, 304):
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        # The client may close as soon as a bodiless reply's head arrives.
+        if body:
+            self.wfile.write(body)
+
+    def _error(self, status: int, message: str) -> None:
+        self._reply(status, {"message": message})
+
+    def _body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw) if raw else {}
+
+    def _dispatch(self, method: str) -> None:
+        daemon = self.state
+        with daemon.lock:
+            daemon.requests += 1
+        if daemon.latency:
+            time.sleep(daemon.latency)
+        url = urlparse(self.path)
+        path = _VERSION_PREFIX.sub("", unquote(url.path))
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        body = self._body() if method in ("POST", "PUT") else None
+        for pattern, verb, handler in _ROUTES:
+            m = re.fullmatch(pattern, path)
+            if m and verb == method:
+                with daemon.lock:
+                    stream = handler(self, daemon, query, body, *m.groups())
+                # Streaming handlers return a writer that runs outside the state lock.
+                if stream is not None:
+                    stream()
+                return
+        self._error(404, f"page not found: {method} {path}")
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def do_DELETE(self) -> None:
+        self._dispatch("DELETE")
+
+    def do_HEAD(self) -> None:
+        self._dispatch("HEAD")
+
+    # handlers: (self, daemon, query, body, *path groups)
+
+    def version(self, daemon, query, body):
+        self._reply(200, {"ApiVersion": API_VERSION, "Version": "fake", "MinAPIVersion": "1.24"})
+
+    def ping(self, daemon, query, body):
+        self._reply(200, "OK")
+
+    def list_containers(self, daemon, query, body):
+        filters = json.loads(query.get("filters") or "{}")
+        show_all = query.get("all") in ("1", "true", "True")
+        result = [
+            _summary(c) for c in daemon.containers.values()
+            if (show_all or c["State"] in ("running", "paused")) and _matches(c, filters)
+        ]
+        self._reply(200, result)
+
+    def inspect_container(self, daemon, query, body, ref):
+        c = daemon.find(ref)
+        if c is None:
+            return self._error(404, f"No such container: {ref}")
+        self._reply(200, _inspect(c))
+
+    def create_container(self, daemon, query, body):
+        image = body.get("Image")
+        if image not in daemon.images:
+            return self._error(404, f"No such image: {image}")
+        name = query.get("name") or _random_name()
+        if daemon.find(name) is not None:
+            return self._error(409, f'Conflict. The container name "/{name}" is already in use')
+        c = daemon.add_container(name, image, body.get("Labels") or {}, state="created")
+        c["Config"] = {"Env": body.get("Env") or [], "WorkingDir": body.get("WorkingDir", "")}
+        c["Mounts"] = (body.get("HostConfig") or {}).get("Mounts") or []
+        daemon.record(c, "create")
+        self._reply(201, {"Id": c["Id"], "Warnings": []})
+
+    def _transition(self, ref, new_state):
+        c = self.state.find(ref)
+        if c is None:
+            return self._error(404, f"No such container: {ref}")
+        if c["State"] == new_state:
+            return self._reply(304)
+        action = {"exited": "die", "paused": "pause"}.get(new_state, "unpause" if c["State"] == "paused" else "start")
+        c["State"] = new_state
+        self.state.record(c, action)
+        self._reply(204)
+
+    def start_container(self, daemon, query, body, ref):
+        self._transition(ref, "running")
+
+    def stop_container(self, daemon, query, body, ref):
+        self._transition(ref, "exited")
+
+    def pause_container(self, daemon, query, body, ref):
+        self._transition(ref, "paused")
+
+    def unpause_container(self, daemon, query, body, ref):
+        self._transition(ref, "running")
+
+    def rename_container(self, daemon, query, body, ref):
+        c = daemon.find(ref)
+        if c is None:
+            return self._error(404, f"No such container: {ref}")
+        c["Name"] = query.get("name", c["Name"])
+        daemon.record(c, "rename")
+        self._reply(204)
+
+    def remove_container(self, daemon, query, body, ref):
+        c = daemon.find(ref)
+        if c is None:
+            return self._error(404, f"No such container: {ref}")
+        if c["State"] == "running" and query.get("force") not in ("1", "true", "True"):
+            return self._error(409, "You cannot remove a running container")
+        del daemon.containers[c["Id"]]
+        daemon.record(c, "destroy")
+        self._reply(204)
+
+    def events(self, daemon, query, body):
+        # Bounded replay only (since/until), which is all devbox asks for.
+        since = float(query.get("since") or 0) * 1e9
+        until = float(query.get("until") or time.time()) * 1e9
+        filters = json.loads(query.get("filters") or "{}")
+        lines = [
+            json.dumps(e) + "\n" for e in daemon.events
+            if since <= e["timeNano"] <= until
+            and _matches({"Labels": e["Actor"]["Attributes"], "Name": "", "State": ""}, {"label": filters.get("label", [])})
+        ]
+        body = "".join(lines).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def list_images(self, daemon, query, body):
+        filters = json.loads(query.get("filters") or "{}")
+        result = []
+        for image in daemon.images.values():
+            labels = image["Config"]["Labels"]
+            if _matches({"Labels": labels, "Name": "", "State": ""}, {"label": filters.get("label", [])}):
+                result.append({"Id": image["Id"], "RepoTags": image["RepoTags"], "Labels": labels, "Created": 0})
+        self._reply(200, result)
+
+    def inspect_image(self, daemon, query, body, ref):
+        image = daemon.images.get(ref) or daemon.images.get(f"{ref}:latest")
+        if image is None:
+            return self._error(404, f"No such image: {ref}")
+        self._reply(200, image)
+
+    def create_exec(self, daemon, query, body, ref):
+        c = daemon.find(ref)
+        if c is None:
+            return self._error(404, f"No such container: {ref}")
+        exec_id = _new_id()
+        daemon.execs[exec_id] = {"Cmd": body.get("Cmd") or [], "Container": c["Id"], "ExitCode": None}
+        self._reply(201, {"Id": exec_id})
+
+    def start_exec(self, daemon, query, body, exec_id):
+        info = daemon.execs.get(exec_id)
+        if info is None:
+            return self._error(404, f"No such exec instance: {exec_id}")
+        info["ExitCode"] = 0
+        output = (SHELL + "\n").encode("utf-8") if info["Cmd"][:1] == ["/bin/sh"] else b""
+
+        def stream() -> None:
+            # The daemon hijacks the connection for exec output: a raw multiplexed stream, then close.
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.docker.multiplexed-stream")
+            self.end_headers()
+            self.wfile.flush()
+            # Output follows once the process has started. The SDK reads it straight from the
+            # socket, so bytes arriving together with the headers would be lost in its buffer.
+            time.sleep(EXEC_STARTUP)
+            if output:
+                self.wfile.write(b"\x01\x00\x00\x00" + len(output).to_bytes(4, "big") + output)
+            self.close_connection = True
+
+        return stream
+
+    def inspect_exec(self, daemon, query, body, exec_id):
+        info = daemon.execs.get(exec_id)
+        if info is None:
+            return self._error(404, f"No such exec instance: {exec_id}")
+        self._reply(200, {"ID": exec_id, "ExitCode": info["ExitCode"], "Running": False})
+
+
+_ROUTES = [
+    (r"/version", "GET", _Handler.version),
+    (r"/_ping", "GET", _Handler.ping),
+    (r"/_ping", "HEAD", _Handler.ping),
+    (r"/containers/json", "GET", _Handler.list_containers),
+    (r"/events", "GET", _Handler.events),
+    (r"/containers/create", "POST", _Handler.create_container),
+    (r"/containers/([^/]+)/json", "GET", _Handler.inspect_container),
+    (r"/containers/([^/]+)/start", "POST", _Handler.start_container),
+    (r"/containers/([^/]+)/stop", "POST", _Handler.stop_container),
+    (r"/containers/([^/]+)/pause", "POST", _Handler.pause_container),
+    (r"/containers/([^/]+)/unpause", "POST", _Handler.unpause_container),
+    (r"/containers/([^/]+)/rename", "POST", _Handler.rename_container),
+    (r"/containers/([^/]+)/exec", "POST", _Handler.create_exec),
+    (r"/containers/([^/]+)", "DELETE", _Handler.remove_container),
+    (r"/images/json", "GET", _Handler.list_images),
+    (r"/images/(.+)/json", "GET", _Handler.inspect_image),
+    (r"/exec/([^/]+)/start", "POST", _Handler.start_exec),
+    (r"/exec/([^/]+)/json", "GET", _Handler.inspect_exec),
+]
@@ -1,5 +1,13 @@
 def main() -> None:
-    print("Hello from devbox!")
+    import sys
+
+    from .agent import forward
+
+    # A running agent serves the common commands without this process importing typer or docker.
+    code = forward(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+
     from .cli import app
 
     app()
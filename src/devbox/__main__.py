@@ -0,0 +1,3 @@
+from devbox import main
+
+main()
@@ -0,0 +1,488 @@
+"""
+Optional long-running devbox agent.
+
+Every devbox command pays for interpreter startup, importing typer and the
+docker SDK, building a client and reading the on-disk caches before it does
+any work. `devbox agent start` runs a background process that pays for all
+of that once. It keeps the Docker session, the parsed-config cache and the
+container registry in memory and listens on a unix socket (`agent.sock` in
+the cache dir, or $DEVBOX_AGENT_SOCKET).
+
+devbox.main() tries the agent first for start, stop, it, list and status.
+The client half of this module uses only the standard library, so a
+forwarded command costs one small interpreter start and one socket
+round-trip. A request carries argv, the working directory and the client's
+DOCKER_* and DEVBOX_* environment. The agent runs the same Typer app in that
+directory and streams the command's output back as JSON lines that end with
+its exit code. Commands swap the process-wide sys.stdout and sys.stderr for
+the client's streams, so they run one at a time: everything that can print,
+including `it`'s shell lookup, holds the agent's lock. Only the bridged
+shell session of `it` runs alongside other commands.
+
+`devbox it` sends the terminal's file descriptors with the request
+(SCM_RIGHTS), so the agent bridges the exec straight to the terminal. The
+client only switches the terminal to raw mode and forwards resizes.
+
+main() runs a command in-process as before when:
+- no agent answers;
+- the agent runs with different DOCKER_* or DEVBOX_* settings (DOCKER_HOST,
+  DOCKER_API_VERSION, DEVBOX_CACHE_DIR, ...);
+- the arguments need the in-process path (global options, --help,
+  `it --docker-cli`, no terminal).
+
+Set DEVBOX_NO_AGENT=1 to bypass the agent.
+"""
+import os
+import sys
+import json
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from devbox.utils import get_cache_dir
+
+SOCKET_FILE = "agent.sock"
+LOG_FILE = "agent.log"
+FORWARDED = ("start", "stop", "it", "list", "status")
+# Seconds a client waits for the agent to accept before running in-process.
+CONNECT_TIMEOUT = 0.5
+# Seconds `devbox agent start` waits for a new agent to answer.
+STARTUP_TIMEOUT = 10.0
+# Settings read only by the client; they do not change how a command runs.
+CLIENT_ONLY = ("DEVBOX_NO_AGENT", "DEVBOX_AGENT_SOCKET")
+
+
+def socket_path() -> str:
+    return os.environ.get("DEVBOX_AGENT_SOCKET") or os.path.join(get_cache_dir(), SOCKET_FILE)
+
+
+def settings() -> Dict[str, str]:
+    """
+    The DOCKER_* and DEVBOX_* variables a command's behaviour depends on.
+    """
+    return {
+        k: v for k, v in os.environ.items()
+        if k.startswith(("DOCKER_", "DEVBOX_")) and k not in CLIENT_ONLY
+    }
+
+
+def _send(sock: socket.socket, message: Dict[str, Any]) -> None:
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def connect(path: Optional[str] = None) -> Optional[socket.socket]:
+    """
+    A connection to the agent, or None if none is listening.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(path or socket_path())
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def _control(command: str, path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    sock = connect(path)
+    if sock is None:
+        return None
+    with sock:
+        try:
+            _send(sock, {"control": command})
+            line = sock.makefile("rb").readline()
+        except OSError:
+            return None
+    return json.loads(line) if line else None
+
+
+def ping(path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    The running agent's pid, uptime and commands served, or None.
+    """
+    return _control("ping", path)
+
+
+def forwardable(argv: List[str]) -> bool:
+    if os.environ.get("DEVBOX_NO_AGENT") or not argv or argv[0] not in FORWARDED or "--help" in argv:
+        return False
+    if argv[0] == "it":
+        from devbox.attach import can_attach_in_process
+
+        # Only the plain `it <container>` form; --docker-cli runs the docker CLI in-process anyway.
+        return len(argv) == 2 and not argv[1].startswith("-") and can_attach_in_process()
+    return True
+
+
+def _relay(reader: Any, handle: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[int]:
+    """
+    Print the agent's output messages until the exit code arrives. None means run in-process instead.
+    """
+    answered = False
+    for line in reader:
+        message = json.loads(line)
+        if "fallback" in message and not answered:
+            return None
+        answered = True
+        if "out" in message:
+            sys.stdout.write(message["out"])
+            sys.stdout.flush()
+        elif "err" in message:
+            sys.stderr.write(message["err"])
+            sys.stderr.flush()
+        elif handle is not None:
+            handle(message)
+        if "exit" in message:
+            return int(message["exit"])
+    if not answered:
+        return None
+    print("The devbox agent closed the connection.", file=sys.stderr)
+    return 1
+
+
+def _forward_it(sock: socket.socket, request: Dict[str, Any]) -> Optional[int]:
+    import shutil
+    import signal
+    import termios
+    import tty
+
+    stdin_fd = sys.stdin.fileno()
+    request["term"] = os.environ.get("TERM", "xterm")
+    socket.send_fds(sock, [json.dumps(request).encode("utf-8") + b"\n"], [stdin_fd, sys.stdout.fileno()])
+    saved: Dict[str, Any] = {}
+
+    def resize(*_: Any) -> None:
+        size = shutil.get_terminal_size()
+        try:
+            _send(sock, {"resize": [size.lines, size.columns]})
+        except OSError:
+            pass
+
+    def restore() -> None:
+        if "attrs" in saved:
+            termios.tcsetattr(stdin_fd, termios.TCSADRAIN, saved.pop("attrs"))
+            signal.signal(signal.SIGWINCH, saved.pop("winch"))
+
+    def handle(message: Dict[str, Any]) -> None:
+        if message.get("attach"):
+            saved["attrs"] = termios.tcgetattr(stdin_fd)
+            saved["winch"] = signal.signal(signal.SIGWINCH, resize)
+            tty.setraw(stdin_fd)
+            resize()
+        elif message.get("detach"):
+            restore()
+
+    try:
+        return _relay(sock.makefile("rb"), handle)
+    finally:
+        restore()
+
+
+def forward(argv: List[str]) -> Optional[int]:
+    """
+    Run a command through the agent. Returns its exit code, or None if the caller should run it in-process.
+    """
+    if not forwardable(argv):
+        return None
+    try:
+        cwd = os.getcwd()
+    except OSError:
+        return None
+    sock = connect()
+    if sock is None:
+        return None
+    request = {"argv": argv, "cwd": cwd, "env": settings(), "tty": sys.stdout.isatty()}
+    with sock:
+        try:
+            if argv[0] == "it":
+                return _forward_it(sock, request)
+            _send(sock, request)
+            return _relay(sock.makefile("rb"))
+        except (OSError, ValueError) as e:
+            print(f"Lost the connection to the devbox agent: {e}", file=sys.stderr)
+            return 1
+
+
+# Agent side
+
+
+class _Stream:
+    """
+    File-like stdout/stderr that sends complete lines (and anything flushed) to the client.
+    """
+
+    def __init__(self, conn: socket.socket, key: str, tty: bool):
+        self.conn = conn
+        self.key = key
+        self.tty = tty
+        self.pending: List[str] = []
+        self.lost = False
+
+    def write(self, text: str) -> int:
+        if not isinstance(text, str):
+            # click probes streams with a bytes write to tell binary from text ones
+            raise TypeError("write() argument must be str")
+        self.pending.append(text)
+        if "\n" in text:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        text = "".join(self.pending)
+        self.pending = []
+        if text and not self.lost:
+            try:
+                _send(self.conn, {self.key: text})
+            except OSError:
+                self.lost = True
+
+    def isatty(self) -> bool:
+        return self.tty
+
+
+def run_cli(argv: List[str], command: Any = None) -> int:
+    """
+    Run one devbox command in this process and return its exit code. command is the
+    click command built from the Typer app; building it takes longer than most commands.
+    """
+    import traceback
+
+    import click
+
+    if command is None:
+        import typer
+
+        from devbox.cli import app
+
+        command = typer.main.get_command(app)
+    try:
+        result = command.main(args=argv, prog_name="devbox", standalone_mode=False)
+    except click.ClickException as e:
+        e.show()
+        return e.exit_code
+    except click.Abort:
+        print("Aborted!", file=sys.stderr)
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return result if isinstance(result, int) else 0
+
+
+class Agent:
+    def __init__(self, server: Any):
+        self.server = server
+        # Commands change the working directory and stdout, so they run one at a time.
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.served = 0
+        self.env = settings()
+        self.command: Any = None
+
+    def warm_up(self) -> None:
+        """
+        Build the CLI, import the command modules and open the Docker session before the first request.
+        """
+        import typer
+
+        from devbox import registry  # noqa: F401
+        from devbox import devcontainer as dc
+        from devbox.cli import app
+
+        self.command = typer.main.get_command(app)
+
+        if dc.docker is not None:
+            try:
+                dc.get_session()
+            except Exception as e:
+                print(f"Docker is not reachable yet: {e}")
+
+    def serve(self, conn: socket.socket, reader: Any, request: Dict[str, Any], fds: List[int]) -> None:
+        control = request.get("control")
+        if control == "ping":
+            _send(conn, {"pid": os.getpid(), "uptime": time.time() - self.started, "served": self.served})
+            return
+        if control == "stop":
+            _send(conn, {"stopping": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if request.get("env") != self.env:
+            _send(conn, {"fallback": "the agent runs with different DOCKER_*/DEVBOX_* settings"})
+            return
+        self.served += 1
+        if request["argv"][0] == "it":
+            self.attach(conn, reader, request, fds)
+        else:
+            self.run(conn, request)
+
+    def run(self, conn: socket.socket, request: Dict[str, Any]) -> None:
+        with self.lock:
+            try:
+                os.chdir(request["cwd"])
+            except OSError as e:
+                _send(conn, {"fallback": str(e)})
+                return
+            with self.output(conn, request):
+                code = run_cli(request["argv"], self.command)
+        try:
+            _send(conn, {"exit": code})
+        except OSError:
+            pass
+
+    @staticmethod
+    def output(conn: socket.socket, request: Dict[str, Any]) -> Any:
+        """
+        Context manager sending stdout and stderr to the client; the caller holds the lock.
+        """
+        import contextlib
+
+        tty = bool(request.get("tty"))
+        out, err = _Stream(conn, "out", tty), _Stream(conn, "err", tty)
+        stack = contextlib.ExitStack()
+        stack.callback(err.flush)
+        stack.callback(out.flush)
+        stack.enter_context(contextlib.redirect_stdout(out))
+        stack.enter_context(contextlib.redirect_stderr(err))
+        return stack
+
+    def attach(self, conn: socket.socket, reader: Any, request: Dict[str, Any], fds: List[int]) -> None:
+        """
+        `devbox it`: find the shell, then bridge the exec to the client's terminal descriptors.
+        """
+        from devbox import attach
+        from devbox.devcontainer import find_shell, get_session
+
+        if len(fds) != 2:
+            _send(conn, {"fallback": "no terminal descriptors received"})
+            return
+        container_id = request["argv"][1]
+        try:
+            with self.lock, self.output(conn, request):
+                client = get_session().client
+                shell = find_shell(client, container_id)
+        except Exception as e:
+            _send(conn, {"out": f"An error occurred while accessing the container CLI: {e}\n", "exit": 1})
+            return
+        if shell is None:
+            _send(conn, {"out": f"No suitable shell found in container. Tried: {', '.join(attach.SHELLS)}\n", "exit": 1})
+            return
+        _send(conn, {"out": f"Using shell: {shell}\n"})
+        _send(conn, {"attach": True})
+        first = reader.readline()
+        if not first:
+            return
+        try:
+            with self.lock, self.output(conn, request):
+                exec_id, sock = attach.start_shell(client.api, container_id, shell, request.get("term"))
+        except Exception as e:
+            _send(conn, {"detach": True})
+            _send(conn, {"out": f"An error occurred while accessing the container CLI: {e}\n", "exit": 1})
+            return
+
+        def resize(line: bytes) -> None:
+            try:
+                height, width = json.loads(line)["resize"]
+                client.api.exec_resize(exec_id, height=height, width=width)
+            except Exception:
+                pass
+
+        resize(first)
+        threading.Thread(target=lambda: [resize(line) for line in reader], daemon=True).start()
+        try:
+            attach.bridge(sock, fds[0], fds[1])
+        finally:
+            sock.close()
+        _send(conn, {"detach": True})
+        _send(conn, {"exit": attach.exit_code(client.api, exec_id)})
+
+
+def serve(path: Optional[str] = None) -> None:
+    """
+    Run the agent in the foreground until `devbox agent stop`.
+    """
+    import socketserver
+
+    path = path or socket_path()
+    if ping(path) is not None:
+        print(f"A devbox agent is already listening on {path}.")
+        return
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+    import traceback
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self) -> None:
+            conn = self.request
+            data, fds, _, _ = socket.recv_fds(conn, 65536, 2)
+            try:
+                reader = conn.makefile("rb")
+                if data and not data.endswith(b"\n"):
+                    data += reader.readline()
+                if data:
+                    agent.serve(conn, reader, json.loads(data), fds)
+            except (OSError, ValueError):
+                pass
+            except Exception:
+                # Into the agent's log, never into another client's redirected stderr.
+                traceback.print_exc(file=sys.__stderr__)
+            finally:
+                for fd in fds:
+                    os.close(fd)
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    server = Server(path, Handler)
+    os.chmod(path, 0o600)
+    agent = Agent(server)
+    agent.warm_up()
+    print(f"devbox agent {os.getpid()} listening on {path}", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def start_background() -> Optional[Dict[str, Any]]:
+    """
+    Start a detached agent (logging to agent.log in the cache dir) and wait until it answers.
+    """
+    import subprocess
+
+    running = ping()
+    if running is not None:
+        return running
+    with open(os.path.join(get_cache_dir(), LOG_FILE), "ab") as log:
+        subprocess.Popen(
+            [sys.executable, "-m", "devbox.agent"],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p)),
+        )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        running = ping()
+        if running is not None:
+            return running
+        time.sleep(0.05)
+    return None
+
+
+def stop(path: Optional[str] = None) -> bool:
+    return _control("stop", path) is not None
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,175 @@
+"""
+Interactive shells for `devbox it`.
+
+The shell is detected with a single exec that tests every candidate inside
+the container, and the result is cached locally by full container ID so later
+attaches skip the probe. Names are not cache keys: a container recreated
+under the same name gets a new ID and is probed again. Attaching happens in-process over the docker SDK's
+own connection: the exec's raw socket is bridged to the local terminal in
+raw mode, so no `docker` CLI process has to start and reconnect.
+"""
+import os
+import json
+import select
+import shutil
+import socket
+from typing import Any, Dict, List, Optional, Tuple
+
+from devbox.utils import get_cache_dir
+
+SHELLS = ["/bin/bash", "/bin/sh", "/bin/zsh"]
+SHELL_CACHE = "shells.json"
+# Maximum number of containers remembered in the shell cache.
+SHELL_CACHE_SIZE = 256
+
+
+def _probe_script(shells: List[str]) -> str:
+    candidates = " ".join(shells)
+    return f'for s in {candidates}; do if [ -x "$s" ]; then echo "$s"; exit 0; fi; done; exit 1'
+
+
+def probe_shell(container: Any, shells: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Return the first available shell, testing all candidates in one exec.
+    Falls back to one exec per shell only if the container has no /bin/sh.
+    """
+    shells = shells or SHELLS
+    try:
+        result = container.exec_run(["/bin/sh", "-c", _probe_script(shells)])
+        if result.exit_code == 0:
+            output = (result.output or b"").decode("utf-8", "replace").strip()
+            if output:
+                return output.splitlines()[0]
+        if result.exit_code == 1:
+            return None
+    except Exception:
+        pass
+    for shell in shells:
+        try:
+            if container.exec_run([shell, "-c", "exit 0"]).exit_code == 0:
+                return shell
+        except Exception:
+            continue
+    return None
+
+
+def _cache_path() -> str:
+    return os.path.join(get_cache_dir(), SHELL_CACHE)
+
+
+def _load_cache() -> Dict[str, str]:
+    try:
+        with open(_cache_path(), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def is_full_id(container_ref: str) -> bool:
+    return len(container_ref) == 64 and all(c in "0123456789abcdef" for c in container_ref)
+
+
+def cached_shell(container_id: str) -> Optional[str]:
+    return _load_cache().get(container_id)
+
+
+def remember_shell(shell: str, container_id: str) -> None:
+    """
+    Record the shell of a container by its full ID.
+    """
+    cache = _load_cache()
+    cache.pop(container_id, None)
+    cache[container_id] = shell
+    # dicts keep insertion order: drop the oldest entries beyond the cap
+    while len(cache) > SHELL_CACHE_SIZE:
+        cache.pop(next(iter(cache)))
+    try:
+        with open(_cache_path(), "w") as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+
+
+def _resize(api: Any, exec_id: str) -> None:
+    size = shutil.get_terminal_size()
+    try:
+        api.exec_resize(exec_id, height=size.lines, width=size.columns)
+    except Exception:
+        pass
+
+
+def bridge(sock: socket.socket, stdin_fd: int, stdout_fd: int) -> None:
+    """
+    Copy bytes between the exec socket and the local terminal until the remote side closes.
+    """
+    stdin_open = True
+    while True:
+        watched = [sock, stdin_fd] if stdin_open else [sock]
+        readable, _, _ = select.select(watched, [], [])
+        if sock in readable:
+            data = sock.recv(65536)
+            if not data:
+                return
+            os.write(stdout_fd, data)
+        if stdin_open and stdin_fd in readable:
+            data = os.read(stdin_fd, 65536)
+            if data:
+                sock.sendall(data)
+            else:
+                stdin_open = False
+                try:
+                    sock.shutdown(socket.SHUT_WR)
+                except OSError:
+                    pass
+
+
+def start_shell(api: Any, container_id: str, shell: str, term: Optional[str] = None) -> Tuple[str, socket.socket]:
+    """
+    Create and start an interactive exec of shell; returns the exec ID and its raw socket.
+    """
+    env = {"TERM": term or os.environ.get("TERM", "xterm")}
+    exec_id = api.exec_create(container_id, [shell], stdin=True, tty=True, environment=env)["Id"]
+    raw = api.exec_start(exec_id, tty=True, socket=True)
+    return exec_id, getattr(raw, "_sock", raw)
+
+
+def exit_code(api: Any, exec_id: str) -> int:
+    try:
+        return int(api.exec_inspect(exec_id).get("ExitCode") or 0)
+    except Exception:
+        return 0
+
+
+def exec_shell(api: Any, container_id: str, shell: str) -> int:
+    """
+    Run shell interactively in the container over the SDK connection. Returns its exit code.
+    """
+    import signal
+    import sys
+    import termios
+    import tty
+
+    exec_id, sock = start_shell(api, container_id, shell)
+
+    stdin_fd = sys.stdin.fileno()
+    stdout_fd = sys.stdout.fileno()
+    old_attrs = termios.tcgetattr(stdin_fd)
+    old_winch = signal.signal(signal.SIGWINCH, lambda *_: _resize(api, exec_id))
+    try:
+        tty.setraw(stdin_fd)
+        _resize(api, exec_id)
+        bridge(sock, stdin_fd, stdout_fd)
+    finally:
+        termios.tcsetattr(stdin_fd, termios.TCSADRAIN, old_attrs)
+        signal.signal(signal.SIGWINCH, old_winch)
+        sock.close()
+    return exit_code(api, exec_id)
+
+
+def can_attach_in_process() -> bool:
+    """
+    In-process attach needs a POSIX terminal on stdin.
+    """
+    import sys
+
+    return os.name == "posix" and sys.stdin.isatty() and sys.stdout.isatty()
@@ -0,0 +1,143 @@
+"""
+Streaming image builds on the low-level docker API.
+
+The build stream is decoded chunk by chunk as the daemon sends it, so
+progress is rendered live and only a bounded tail of the log is kept in
+memory for error reporting.
+"""
+import re
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Number of log lines kept for error reporting.
+LOG_TAIL_LINES = 200
+
+_STEP_RE = re.compile(r"^Step (\d+)/(\d+) : (.*)$")
+# The classic builder prints this under every step whose layer came from the cache.
+_CACHE_HIT = "---> Using cache"
+
+
+class BuildFailed(Exception):
+    """
+    Raised when the daemon reports a build error; carries the tail of the build log.
+    """
+
+    def __init__(self, reason: str, log_tail: List[str]):
+        super().__init__(reason)
+        self.reason = reason
+        self.log_tail = log_tail
+
+
+class BuildProgress:
+    """
+    Consume decoded build stream chunks, render per-step progress and time each step.
+    """
+
+    def __init__(
+        self,
+        tail_lines: int = LOG_TAIL_LINES,
+        out: Callable[[str], Any] = print,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.tail: Deque[str] = deque(maxlen=tail_lines)
+        self.steps: List[Tuple[str, float]] = []
+        self.cache_hits: List[str] = []
+        self.cache_misses: List[str] = []
+        self.image_id: Optional[str] = None
+        self._out = out
+        self._clock = clock
+        self._current: Optional[str] = None
+        self._cached = False
+        self._started = 0.0
+        self._build_started = clock()
+
+    def feed(self, chunk: Dict[str, Any]) -> None:
+        if "error" in chunk:
+            self._finish_step()
+            detail = chunk.get("errorDetail") or {}
+            raise BuildFailed(detail.get("message") or chunk["error"], list(self.tail))
+
+        aux = chunk.get("aux")
+        if isinstance(aux, dict) and aux.get("ID"):
+            self.image_id = aux["ID"]
+
+        text = chunk.get("stream")
+        if text is None and "status" in chunk:
+            text = chunk["status"]
+        if not text:
+            return
+        for line in text.splitlines():
+            line = line.rstrip()
+            if not line:
+                continue
+            self.tail.append(line)
+            m = _STEP_RE.match(line)
+            if m:
+                self._begin_step(f"[{m.group(1)}/{m.group(2)}] {m.group(3)}")
+            elif line.strip() == _CACHE_HIT and self._current is not None:
+                self._cached = True
+
+    def finish(self) -> None:
+        self._finish_step()
+
+    @property
+    def total_seconds(self) -> float:
+        return self._clock() - self._build_started
+
+    def slowest(self, n: int = 3) -> List[Tuple[str, float]]:
+        return sorted(self.steps, key=lambda s: s[1], reverse=True)[:n]
+
+    def report(self, n: int = 3) -> None:
+        """
+        Print total build time and the n slowest steps.
+        """
+        self._out(f"Build finished in {self.total_seconds:.1f}s ({len(self.steps)} steps)")
+        slowest = self.slowest(n)
+        if slowest:
+            self._out("Slowest steps:")
+            for desc, secs in slowest:
+                self._out(f"  {secs:7.1f}s  {desc}")
+
+    def cache_report(self) -> None:
+        """
+        Print how many layer-producing steps were served from the build cache and which were not.
+        """
+        total = len(self.cache_hits) + len(self.cache_misses)
+        if not total:
+            return
+        self._out(f"Build cache: {len(self.cache_hits)}/{total} steps cached, {len(self.cache_misses)} rebuilt")
+        for desc in self.cache_misses:
+            self._out(f"  miss  {desc}")
+
+    def _begin_step(self, desc: str) -> None:
+        self._finish_step()
+        self._current = desc
+        self._cached = False
+        self._started = self._clock()
+        self._out(desc)
+
+    def _finish_step(self) -> None:
+        if self._current is None:
+            return
+        secs = self._clock() - self._started
+        self.steps.append((self._current, secs))
+        # FROM only resolves the base image; every other step is a cache hit or a miss.
+        if not self._current.split("] ", 1)[-1].upper().startswith("FROM "):
+            (self.cache_hits if self._cached else self.cache_misses).append(self._current)
+        self._out(f"      done in {secs:.1f}s")
+        self._current = None
+
+
+def stream_build(api: Any, progress: Optional[BuildProgress] = None, **build_kwargs: Any) -> BuildProgress:
+    """
+    Run a build through the low-level APIClient.build, decoding the JSON stream incrementally.
+
+    Raises BuildFailed if the daemon reports an error.
+    """
+    progress = progress or BuildProgress()
+    build_kwargs.setdefault("rm", True)
+    for chunk in api.build(decode=True, **build_kwargs):
+        progress.feed(chunk)
+    progress.finish()
+    return progress
@@ -0,0 +1,164 @@
+"""
+Build cache import and export.
+
+The `build` section of devcontainer.json may list layer caches to read
+before a build (`cacheFrom`) and to write after it (`cacheTo`), so CI
+runners and fresh machines reuse layers built elsewhere instead of
+rebuilding from scratch. Each entry is a string in the buildx style:
+
+    "ghcr.io/org/app:cache"                  registry (plain image reference)
+    "type=registry,ref=localhost:5000/app"    registry
+    "type=tar,src=.devbox/app-cache.tar"      tarball (dest= for cacheTo)
+    "type=local,src=/var/cache/devbox"        directory holding one tarball per image
+
+Relative paths are resolved against the folder holding devcontainer.json.
+devbox builds through the classic builder, where a cache is a previously
+built image: imports pull or `docker load` it and hand it to the build as
+`cache_from`; exports push the built image or `docker save` it. A missing or
+unreachable cache only costs the layers it would have provided; it never
+fails the build.
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+# build keys that configure caching only; they do not affect the built image.
+CACHE_KEYS = ("cacheFrom", "cacheTo")
+
+KINDS = ("registry", "tar", "local")
+
+
+def parse_entry(raw: Any, base_dir: str, export: bool = False) -> Optional[Dict[str, str]]:
+    """
+    Parse one cacheFrom/cacheTo entry into {"type": ..., "ref"|"path": ...}; None if invalid.
+    """
+    if not isinstance(raw, str) or not raw.strip():
+        print(f"Ignoring invalid build cache entry: {raw!r}")
+        return None
+    raw = raw.strip()
+    if not raw.startswith("type="):
+        return {"type": "registry", "ref": raw}
+    fields = dict(part.split("=", 1) for part in raw.split(",") if "=" in part)
+    kind = fields.get("type")
+    if kind not in KINDS:
+        print(f"Ignoring build cache entry with unsupported type: {raw}")
+        return None
+    if kind == "registry":
+        ref = fields.get("ref")
+        return {"type": kind, "ref": ref} if ref else None
+    path = fields.get("dest" if export else "src") or fields.get("src" if export else "dest")
+    if not path:
+        print(f"Ignoring build cache entry without a path: {raw}")
+        return None
+    return {"type": kind, "path": os.path.normpath(os.path.join(base_dir, os.path.expanduser(path)))}
+
+
+def cache_config(build_config: Optional[Dict[str, Any]], base_dir: str) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Normalize build.cacheFrom / build.cacheTo (string or list) into {"from": [...], "to": [...]}.
+    """
+    config: Dict[str, List[Dict[str, str]]] = {"from": [], "to": []}
+    for key, direction in (("cacheFrom", "from"), ("cacheTo", "to")):
+        raw = (build_config or {}).get(key)
+        if raw is None:
+            continue
+        for entry in raw if isinstance(raw, list) else [raw]:
+            parsed = parse_entry(entry, base_dir, export=direction == "to")
+            if parsed:
+                config[direction].append(parsed)
+    return config
+
+
+def without_cache_keys(build_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {k: v for k, v in (build_config or {}).items() if k not in CACHE_KEYS}
+
+
+def tarball_path(entry: Dict[str, str], image_name: str) -> str:
+    """
+    File an image is saved to / loaded from: the tar path itself, or one file per image in a local dir.
+    """
+    if entry["type"] == "tar":
+        return entry["path"]
+    return os.path.join(entry["path"], re.sub(r"[^A-Za-z0-9_.-]", "_", image_name) + ".tar")
+
+
+def describe(entry: Dict[str, str]) -> str:
+    return entry.get("ref") or entry.get("path") or ""
+
+
+def import_caches(client: Any, entries: List[Dict[str, str]], image_name: str) -> List[str]:
+    """
+    Make each cache image available locally and return the references to build with as cache_from.
+
+    The previous local image_name (if any) is always included: the classic builder
+    only matches layers of the listed images once cache_from is set.
+    """
+    from devbox import pull
+
+    refs: List[str] = []
+    for entry in entries:
+        if entry["type"] == "registry":
+            if pull.pull_image(entry["ref"], out=lambda line: None):
+                refs.append(entry["ref"])
+            else:
+                print(f"Build cache {entry['ref']} unavailable; continuing without it")
+            continue
+        path = tarball_path(entry, image_name)
+        if not os.path.isfile(path):
+            print(f"Build cache {path} not found; continuing without it")
+            continue
+        try:
+            with open(path, "rb") as f:
+                loaded = client.images.load(f)
+        except Exception as e:
+            print(f"Failed to load build cache {path}: {e}")
+            continue
+        for image in loaded:
+            names = list(getattr(image, "tags", None) or []) or [image.id]
+            refs.extend(n for n in names if n not in refs)
+        print(f"Loaded build cache {path}")
+    if refs and image_name not in refs:
+        try:
+            client.images.get(image_name)
+            refs.append(image_name)
+        except Exception:
+            pass
+    return refs
+
+
+def _save(client: Any, image_name: str, path: str) -> None:
+    # Written beside the target and renamed, so a reader never loads a partial tarball.
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            for chunk in client.api.get_image(image_name):
+                f.write(chunk)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def export_caches(client: Any, entries: List[Dict[str, str]], image_name: str) -> None:
+    """
+    Write the freshly built image to every cacheTo destination. Failures are reported, not raised.
+    """
+    from devbox import pull
+
+    for entry in entries:
+        try:
+            if entry["type"] == "registry":
+                repo, tag = pull.split_ref(entry["ref"])
+                client.api.tag(image_name, repo, tag or "latest")
+                for chunk in client.api.push(repo, tag=tag or "latest", stream=True, decode=True):
+                    if "error" in chunk:
+                        raise RuntimeError(chunk["error"])
+                print(f"Exported build cache to {entry['ref']}")
+                continue
+            path = tarball_path(entry, image_name)
+            _save(client, image_name, path)
+            print(f"Exported build cache to {path}")
+        except Exception as e:
+            print(f"Failed to export build cache to {describe(entry)}: {e}")
@@ -0,0 +1,183 @@
+"""
+Package-manager cache volumes.
+
+Projects that opt in with `customizations.devbox.cacheVolumes` get named
+volumes mounted over well-known download caches (pip, npm, cargo, go), so a
+recreated container does not start from an empty cache. Volumes are named
+`devbox_cache_<image>_<kind>` and shared by every container started from the
+same project image. They carry devbox labels so `devbox cache` can report
+their sizes and prune them.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+from devbox.labels import IMAGE_LABEL, MANAGED_LABEL
+
+CACHE_PREFIX = "devbox_cache_"
+CACHE_LABEL = "devbox.cache"
+CACHE_KIND_LABEL = "devbox.cache_kind"
+
+# Default cache directory of each supported package manager inside the container.
+CACHE_DIRS = {
+    "pip": "/root/.cache/pip",
+    "npm": "/root/.npm",
+    "cargo": "/usr/local/cargo/registry",
+    "go": "/go/pkg/mod",
+}
+
+
+def cache_config(options: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Normalize the cacheVolumes option into {kind: target}.
+
+    Accepts true (every known cache), a list of kinds, or a dict mapping kinds to
+    target directories (true/null keeps the default target of a known kind).
+    """
+    raw = options.get("cacheVolumes")
+    if raw is None or raw is False:
+        return {}
+    if raw is True:
+        return dict(CACHE_DIRS)
+    if isinstance(raw, list):
+        raw = {kind: True for kind in raw}
+    if not isinstance(raw, dict):
+        print(f"Ignoring invalid cacheVolumes setting: {raw!r}")
+        return {}
+    config: Dict[str, str] = {}
+    for kind, target in raw.items():
+        if target is False:
+            continue
+        if isinstance(target, str) and target:
+            config[str(kind)] = target
+        elif kind in CACHE_DIRS:
+            config[kind] = CACHE_DIRS[kind]
+        else:
+            print(f"Unknown cache volume '{kind}' without a target directory; ignoring.")
+    return config
+
+
+def volume_name(image_name: str, kind: str) -> str:
+    """
+    Volume name for one cache of an image; characters docker rejects become '_'.
+    """
+    return CACHE_PREFIX + re.sub(r"[^a-zA-Z0-9_.-]", "_", f"{image_name}_{kind}")
+
+
+def mount_entries(config: Dict[str, str], image_name: str, taken: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Mount dicts (devcontainer.json dict form) for the configured caches, skipping taken targets.
+    """
+    taken = taken or []
+    return [
+        {"source": volume_name(image_name, kind), "target": target, "type": "volume"}
+        for kind, target in sorted(config.items())
+        if target not in taken
+    ]
+
+
+def volume_labels(image_name: str, kind: str) -> Dict[str, str]:
+    return {MANAGED_LABEL: "true", CACHE_LABEL: "true", IMAGE_LABEL: image_name, CACHE_KIND_LABEL: kind}
+
+
+def list_volumes(client: Any, image_name: Optional[str] = None) -> List[Any]:
+    """
+    Cache volumes, optionally only those of one image.
+    """
+    labels = [f"{CACHE_LABEL}=true"]
+    if image_name:
+        labels.append(f"{IMAGE_LABEL}={image_name}")
+    return client.volumes.list(filters={"label": labels})
+
+
+def ensure(client: Any, config: Dict[str, str], image_name: str) -> List[str]:
+    """
+    Create the configured cache volumes that do not exist yet. Returns the names created.
+    """
+    if not config:
+        return []
+    try:
+        existing = {v.name for v in list_volumes(client, image_name)}
+    except Exception as e:
+        print(f"Could not list cache volumes: {e}")
+        existing = set()
+    created = []
+    for kind in sorted(config):
+        name = volume_name(image_name, kind)
+        if name in existing:
+            continue
+        try:
+            # Creating an existing volume is a no-op in the daemon, so races are harmless.
+            client.volumes.create(name=name, labels=volume_labels(image_name, kind))
+            created.append(name)
+        except Exception as e:
+            print(f"Failed to create cache volume {name}: {e}")
+    if created:
+        print(f"Created {len(created)} cache volume(s): {', '.join(created)}")
+    return created
+
+
+def volume_sizes(client: Any) -> Dict[str, int]:
+    """
+    Disk usage per volume name from the daemon's df endpoint (-1 when unknown).
+    """
+    try:
+        df = client.df()
+    except Exception as e:
+        print(f"Could not read volume sizes: {e}")
+        return {}
+    sizes = {}
+    for v in df.get("Volumes") or []:
+        usage = v.get("UsageData") or {}
+        sizes[v.get("Name")] = usage.get("Size", -1)
+    return sizes
+
+
+def _human(size: int) -> str:
+    if size is None or size < 0:
+        return "?"
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+def report(client: Any, image_name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Print cache volumes with their sizes and return them as dicts.
+    """
+    volumes = list_volumes(client, image_name)
+    if not volumes:
+        print("No cache volumes.")
+        return []
+    sizes = volume_sizes(client)
+    rows = []
+    for v in sorted(volumes, key=lambda v: v.name):
+        labels = (v.attrs or {}).get("Labels") or {}
+        rows.append({
+            "name": v.name,
+            "image": labels.get(IMAGE_LABEL, ""),
+            "kind": labels.get(CACHE_KIND_LABEL, ""),
+            "size": sizes.get(v.name, -1),
+        })
+    width = max(len(r["name"]) for r in rows)
+    for r in rows:
+        print(f"{r['name']:<{width}}  {r['kind']:<6} {_human(r['size']):>10}")
+    total = sum(r["size"] for r in rows if r["size"] > 0)
+    print(f"{len(rows)} cache volume(s), {_human(total)} total")
+    return rows
+
+
+def prune(client: Any, image_name: Optional[str] = None) -> List[str]:
+    """
+    Remove cache volumes (of one image, or all). Volumes still mounted by a container are kept.
+    """
+    removed = []
+    for v in list_volumes(client, image_name):
+        try:
+            v.remove()
+            removed.append(v.name)
+        except Exception as e:
+            print(f"Kept cache volume {v.name}: {e}")
+    print(f"Removed {len(removed)} cache volume(s).")
+    return removed
@@ -1,9 +1,313 @@
+"""
+Typer wiring for the devbox command.
+
+Only typer and the standard library are imported at module level. Modules
+that pull in the docker SDK (and with it requests/urllib3) are imported
+inside each command, so `devbox --help` and argument errors never pay for
+them.
+"""
+from typing import List, Optional
+
 import typer
 
-from devbox.devcontainer import start, stop_dev_container, container_cli
+from devbox.utils import DEFAULT_JOBS
 
 
 app = typer.Typer()
-app.command("start")(start)
-app.command("stop")(stop_dev_container)
-app.command("it")(container_cli)
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    api_stats: bool = typer.Option(False, "--api-stats", help="Print the Docker API calls made by the command."),
+    profile: bool = typer.Option(False, "--profile", help="Print a table of time spent per phase and API call."),
+    trace_file: Optional[str] = typer.Option(None, "--trace-file", help="Write a Chrome trace (JSON) of phases and API calls."),
+) -> None:
+    if api_stats:
+        ctx.call_on_close(_print_api_stats)
+    if profile or trace_file:
+        from devbox import trace
+
+        trace.enable()
+        ctx.call_on_close(lambda: trace.report(profile=profile, trace_file=trace_file))
+
+
+def _print_api_stats() -> None:
+    import sys
+
+    # Nothing talked to the daemon if devcontainer was never imported.
+    dc = sys.modules.get("devbox.devcontainer")
+    session = dc.current_session() if dc else None
+    print(session.summary() if session else "Docker API calls: 0")
+    engine = sys.modules.get("devbox.engine")
+    engine_summary = engine.summary() if engine else None
+    if engine_summary:
+        print(engine_summary)
+
+
+@app.command("start")
+def start_command(
+    rebuild: bool = typer.Option(False, "--rebuild", help="Build the image even if its build inputs are unchanged."),
+    recreate: bool = typer.Option(False, "--recreate", help="Replace a running container whose spec has changed."),
+    all_configs: bool = typer.Option(False, "--all", help="Start every devcontainer config under --root concurrently."),
+    root: Optional[str] = typer.Option(None, "--root", help="Directory searched by --all (default: current directory)."),
+    jobs: int = typer.Option(DEFAULT_JOBS, "--jobs", "-j", help="Concurrent builds/starts for --all."),
+) -> None:
+    """
+    Build (if needed) and start the dev container for the current project.
+    """
+    if all_configs:
+        from devbox.multi import start_all
+
+        start_all(root, jobs=jobs, rebuild=rebuild, recreate=recreate)
+    else:
+        from devbox.devcontainer import start
+
+        start(rebuild=rebuild, recreate=recreate)
+
+
+@app.command("stop")
+def stop_command(
+    container_ids: Optional[List[str]] = typer.Argument(None, help="Container IDs or names."),
+    project: bool = typer.Option(False, "--project", help="Stop every devbox container of the current project."),
+    all_managed: bool = typer.Option(False, "--all", help="Stop every devbox container on the host."),
+    timeout: Optional[int] = typer.Option(None, "--timeout", "-t", help="Seconds to wait before killing (default 10)."),
+    remove: bool = typer.Option(False, "--remove", "--rm", help="Remove the containers after stopping them."),
+) -> None:
+    """
+    Stop containers concurrently, by ID or by scope.
+    """
+    from devbox.devcontainer import stop_containers
+
+    stop_containers(container_ids, project=project, all_managed=all_managed, timeout=timeout, remove=remove)
+
+
+@app.command("it")
+def it_command(
+    container_id: str,
+    docker_cli: bool = typer.Option(False, "--docker-cli", help="Attach through `docker exec -it` instead of in-process."),
+) -> None:
+    """
+    Open an interactive shell in a container (tries /bin/bash, /bin/sh, /bin/zsh).
+    """
+    from devbox.devcontainer import container_cli
+
+    container_cli(container_id, docker_cli=docker_cli)
+
+
+@app.command("list")
+def list_command(
+    project: bool = typer.Option(False, "--project", help="Only containers of the current project."),
+    pooled: bool = typer.Option(False, "--pool", help="Include unclaimed warm-pool containers."),
+    quiet: bool = typer.Option(False, "--quiet", "-q", help="Print container IDs only."),
+    reconcile: bool = typer.Option(False, "--reconcile", help="Rescan the daemon instead of replaying events."),
+) -> None:
+    """
+    List devbox-managed containers from the local registry.
+    """
+    from devbox import registry
+    from devbox.labels import project_hash
+
+    rows = registry.select(registry.refresh(force=reconcile), project_hash() if project else None, pooled=pooled)
+    if quiet:
+        for row in rows:
+            print(row["id"][:12])
+    elif rows:
+        registry.print_table(rows)
+    else:
+        print("No devbox containers.")
+
+
+@app.command("status")
+def status_command(
+    reconcile: bool = typer.Option(False, "--reconcile", help="Rescan the daemon instead of replaying events."),
+) -> None:
+    """
+    Show the current project's containers and the state of the container registry.
+    """
+    import os
+
+    from devbox import configcache, registry
+    from devbox.labels import project_hash
+
+    # The cached config names the image without importing the docker SDK; skip it if stale.
+    config = configcache.load(os.getcwd())
+    registry.status(registry.refresh(force=reconcile), project_hash(), config["image_name"] if config else None)
+
+
+@app.command("cache")
+def cache_command(
+    prune: bool = typer.Option(False, "--prune", help="Remove the cache volumes instead of listing them."),
+    all_projects: bool = typer.Option(False, "--all-projects", help="Include cache volumes of every project image."),
+) -> None:
+    """
+    List package-manager cache volumes with their sizes, or prune them.
+    """
+    from devbox import cachevolumes
+    from devbox.devcontainer import get_session, load_project_config
+
+    image_name = None
+    if not all_projects:
+        config = load_project_config()
+        image_name = config["image_name"] if config else None
+        if not image_name:
+            print("No devcontainer image for the current directory; use --all-projects.")
+            return
+    client = get_session().client
+    if prune:
+        cachevolumes.prune(client, image_name)
+    else:
+        cachevolumes.report(client, image_name)
+
+
+@app.command("snapshot")
+def snapshot_command(
+    container_id: Optional[str] = typer.Argument(None, help="Container to commit (default: the project's container)."),
+    keep: Optional[int] = typer.Option(None, "--keep", help="Valid snapshots to keep (default: snapshotRetention or 3)."),
+    list_only: bool = typer.Option(False, "--list", help="List the project's snapshots instead of taking one."),
+) -> None:
+    """
+    Commit a prepared container to a snapshot image that later starts are created from.
+    """
+    from devbox import features, snapshot
+    from devbox.devcontainer import (
+        devbox_options,
+        find_running_container_by_image,
+        get_session,
+        load_project_config,
+        run_image_name,
+    )
+
+    config = load_project_config()
+    try:
+        # With features, containers run from (and are labeled with) the project's features image.
+        image_name = run_image_name(config) if config else None
+    except features.FeatureError as e:
+        print(e)
+        raise typer.Exit(code=1)
+    if not image_name:
+        print("No devcontainer image for the current directory.")
+        raise typer.Exit(code=1)
+    client = get_session().client
+    if list_only:
+        snapshot.report(client, image_name)
+        return
+    if container_id:
+        try:
+            container = client.containers.get(container_id)
+        except Exception as e:
+            print(f"Container {container_id} not found: {e}")
+            raise typer.Exit(code=1)
+    else:
+        container = find_running_container_by_image(image_name)
+        if container is None:
+            print(f"No container of {image_name} for this project; start one first.")
+            raise typer.Exit(code=1)
+    keep = keep if keep and keep > 0 else snapshot.retention(devbox_options(config["devcjson"]))
+    if snapshot.create(client, container, image_name, keep=keep) is None:
+        raise typer.Exit(code=1)
+
+
+@app.command("pull")
+def pull_command(
+    refs: Optional[List[str]] = typer.Argument(None, help="Images to pull (default: those the current config references)."),
+    all_configs: bool = typer.Option(False, "--all", help="Pull images referenced by every devcontainer config under --root."),
+    root: Optional[str] = typer.Option(None, "--root", help="Directory searched by --all (default: current directory)."),
+    jobs: int = typer.Option(DEFAULT_JOBS, "--jobs", "-j", help="Concurrent pulls."),
+    missing_only: bool = typer.Option(False, "--missing-only", help="Skip images that are already present locally."),
+) -> None:
+    """
+    Pull images with per-layer progress, several at a time.
+    """
+    from devbox import pull
+
+    if not refs:
+        if all_configs:
+            refs = pull.images_under(root)
+        else:
+            from devbox.devcontainer import load_project_config
+
+            config = load_project_config()
+            refs = pull.referenced_images(config["config_path"], config["devcjson"]) if config else []
+    if not refs:
+        print("No images to pull.")
+        return
+    results = pull.pull_all(refs, only_missing=missing_only, jobs=jobs)
+    if not all(results.values()):
+        raise typer.Exit(code=1)
+
+
+@app.command("prefetch")
+def prefetch_command(
+    root: Optional[str] = typer.Option(None, "--root", help="Directory to search (default: current directory)."),
+    jobs: int = typer.Option(DEFAULT_JOBS, "--jobs", "-j", help="Concurrent pulls."),
+) -> None:
+    """
+    Pull every image referenced by the devcontainer configs under --root that is missing locally.
+    """
+    from devbox import pull
+
+    refs = pull.images_under(root)
+    if not refs:
+        print("No images referenced under this directory.")
+        return
+    results = pull.pull_all(refs, only_missing=True, jobs=jobs)
+    print(f"{sum(results.values())}/{len(results)} image(s) available locally.")
+    if not all(results.values()):
+        raise typer.Exit(code=1)
+
+
+@app.command("agent")
+def agent_command(
+    action: str = typer.Argument("status", help="start, stop, status, or run (in the foreground)."),
+) -> None:
+    """
+    Manage the background agent that serves start/stop/it/list/status without cold-start overhead.
+    """
+    from devbox import agent
+
+    if action == "run":
+        agent.serve()
+    elif action == "start":
+        running = agent.start_background()
+        if running is None:
+            print(f"The devbox agent did not start; see {agent.LOG_FILE} in the cache directory.")
+            raise typer.Exit(code=1)
+        print(f"devbox agent running (pid {running['pid']}) on {agent.socket_path()}")
+    elif action == "stop":
+        print("Stopped the devbox agent." if agent.stop() else "No devbox agent running.")
+    elif action == "status":
+        running = agent.ping()
+        if running is None:
+            print("No devbox agent running.")
+            raise typer.Exit(code=1)
+        print(
+            f"devbox agent running (pid {running['pid']}, up {running['uptime']:.0f}s, "
+            f"{running['served']} command(s) served) on {agent.socket_path()}"
+        )
+    else:
+        print(f"Unknown agent action '{action}'; use start, stop, status or run.")
+        raise typer.Exit(code=2)
+
+
+@app.command("sync")
+def sync_command(container_id: str) -> None:
+    """
+    Keep a container's workspace volume in sync with the current directory (foreground).
+    """
+    import os
+
+    from devbox import sync
+    from devbox.devcontainer import devbox_options, get_session, load_project_config
+
+    config = load_project_config()
+    options = devbox_options(config["devcjson"]) if config else {}
+    workspace = config["workspace_folder"] if config else "/workspace"
+    sync.watch(
+        get_session().client,
+        container_id,
+        os.getcwd(),
+        workspace,
+        options.get("workspaceSyncIgnore") or [],
+        interval=sync.sync_interval(options),
+    )
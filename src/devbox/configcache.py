@@ -0,0 +1,101 @@
+"""
+On-disk cache of discovered and parsed devcontainer configs.
+
+Entries are keyed by working directory and hold the resolved config path
+plus the normalized parse result (devcontainer.json contents, mounts as
+plain dicts, image name, workspace folder). An entry is valid while the
+mtimes of every file involved are unchanged: the config file, its
+.devcontainer folder and each directory walked from cwd up to the project
+root, since creating a closer .devcontainer changes that directory's mtime.
+Repeat invocations then skip discovery and parsing entirely. Loaded entries
+are also kept in memory, so a long-lived process (the agent) only re-stats
+the stamp files. The cache is only a speed-up: parsing is deterministic, so
+a miss (e.g. after a file is created in the project root) yields the same
+config.
+"""
+import os
+import json
+import hashlib
+from typing import Any, Dict, List, Optional
+
+from devbox.utils import get_cache_dir
+
+CACHE_SUBDIR = "configs"
+# Bump when the shape of cached entries changes.
+CACHE_VERSION = 2
+
+# Entries read or written by this process, keyed by entry path; validated like the files.
+_memory: Dict[str, Dict[str, Any]] = {}
+
+
+def _entry_path(cwd: str) -> str:
+    key = hashlib.sha256(cwd.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(get_cache_dir(), CACHE_SUBDIR, f"{key}.json")
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def discovery_stamps(cwd: str, devcontainer_dir: str, config_path: str) -> List[str]:
+    """
+    Paths whose mtimes decide whether a cached discovery result is still valid.
+    """
+    project_dir = os.path.dirname(devcontainer_dir)
+    paths = [config_path, devcontainer_dir]
+    current = cwd
+    while True:
+        paths.append(current)
+        if current == project_dir:
+            break
+        parent = os.path.dirname(current)
+        if parent == current:
+            break
+        current = parent
+    return paths
+
+
+def load(cwd: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the cached config for cwd, or None if missing or stale.
+    """
+    path = _entry_path(cwd)
+    entry = _memory.get(path)
+    if entry is None:
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+    if entry.get("version") != CACHE_VERSION or entry.get("cwd") != cwd:
+        return None
+    for stamp, mtime in entry.get("stamps", []):
+        if _mtime(stamp) != mtime:
+            return None
+    _memory[path] = entry
+    return entry.get("config")
+
+
+def store(cwd: str, config: Dict[str, Any], stamp_paths: List[str]) -> None:
+    """
+    Persist config for cwd together with the current mtimes of stamp_paths.
+    """
+    entry = {
+        "version": CACHE_VERSION,
+        "cwd": cwd,
+        "stamps": [[p, _mtime(p)] for p in stamp_paths],
+        "config": config,
+    }
+    path = _entry_path(cwd)
+    _memory[path] = entry
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError):
+        pass
@@ -0,0 +1,301 @@
+"""
+Build context packing.
+
+BuildContext walks a context directory once, honoring .dockerignore through
+a precompiled matcher and pruning excluded directories (node_modules, .git,
+...) without descending into them. The walk result is used both to compute a
+content digest, through a per-file digest cache keyed on mtime/size so
+unchanged files are never re-read, and to stream a tar archive straight to
+the daemon without a temporary file.
+"""
+import os
+import re
+import json
+import stat
+import hashlib
+import tarfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from devbox.utils import get_cache_dir, hash_file
+
+DOCKERIGNORE = ".dockerignore"
+# Name used inside the tar when the Dockerfile lives outside the context root.
+EXTERNAL_DOCKERFILE = ".devbox.Dockerfile"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_BLOCK = tarfile.BLOCKSIZE
+_WILDCARDS = "*?["
+
+
+def _translate(pattern: str) -> str:
+    """
+    Translate a .dockerignore pattern (Go filepath.Match plus '**') into a regex.
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern[i:i + 2] == "**":
+                i += 2
+                if pattern[i:i + 1] == "/":
+                    # '**/' matches zero or more leading directories
+                    out.append("(?:.*/)?")
+                    i += 1
+                else:
+                    out.append(".*")
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = pattern.find("]", i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith("^") or body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out) + r"\Z"
+
+
+class DockerIgnore:
+    """
+    Precompiled .dockerignore matcher. The last matching pattern wins and a
+    pattern that matches a parent directory also matches everything below it.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.rules: List[Tuple[Any, bool]] = []
+        self._negation_prefixes: List[str] = []
+        for raw in patterns:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:].strip()
+            line = os.path.normpath(line).replace(os.sep, "/").lstrip("/")
+            if not line or line == ".":
+                continue
+            self.rules.append((re.compile(_translate(line)), negate))
+            if negate:
+                cut = min([line.find(w) for w in _WILDCARDS if w in line] or [len(line)])
+                self._negation_prefixes.append(line[:cut])
+
+    @classmethod
+    def from_dir(cls, root: str) -> "DockerIgnore":
+        try:
+            with open(os.path.join(root, DOCKERIGNORE), "r") as f:
+                return cls(f.read().splitlines())
+        except OSError:
+            return cls([])
+
+    def excluded(self, rel_path: str) -> bool:
+        """
+        Return True if rel_path (posix separators, relative to the context root) is ignored.
+        """
+        if not self.rules:
+            return False
+        parts = rel_path.split("/")
+        candidates = ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+        result = False
+        for regex, negate in self.rules:
+            if any(regex.match(c) for c in candidates):
+                result = not negate
+        return result
+
+    def can_prune(self, rel_dir: str) -> bool:
+        """
+        Return True if rel_dir is excluded and no '!' exception can re-include anything below it.
+        """
+        if not self.excluded(rel_dir):
+            return False
+        for prefix in self._negation_prefixes:
+            if prefix.startswith(rel_dir + "/") or rel_dir.startswith(prefix):
+                return False
+        return True
+
+
+class DigestCache:
+    """
+    Per-context cache of file digests keyed on (mtime_ns, size), persisted in the devbox cache dir.
+    """
+
+    def __init__(self, root: str, path: Optional[str] = None):
+        if path is None:
+            key = hashlib.sha256(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+            path = os.path.join(get_cache_dir(), "digests", f"{key}.json")
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._seen: Dict[str, List[Any]] = {}
+        try:
+            with open(path, "r") as f:
+                self._entries: Dict[str, List[Any]] = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def digest(self, rel: str, full: str, st: os.stat_result) -> str:
+        cached = self._entries.get(rel)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            self.hits += 1
+            digest = cached[2]
+        else:
+            self.misses += 1
+            digest = hash_file(full)
+        self._seen[rel] = [st.st_mtime_ns, st.st_size, digest]
+        return digest
+
+    def save(self) -> None:
+        # Only files seen in the latest walk are kept, so deleted files drop out.
+        if self._seen == self._entries:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self._seen, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+        self._entries = dict(self._seen)
+
+
+class BuildContext:
+    """
+    A build context root plus the Dockerfile used with it.
+    """
+
+    def __init__(self, root: str, dockerfile: str):
+        self.root = os.path.abspath(root)
+        self.dockerfile_path = os.path.abspath(dockerfile)
+        rel = os.path.relpath(self.dockerfile_path, self.root).replace(os.sep, "/")
+        self.external_dockerfile = rel.startswith("../")
+        # Name passed to the daemon as the 'dockerfile' build parameter.
+        self.dockerfile = EXTERNAL_DOCKERFILE if self.external_dockerfile else rel
+        self.matcher = DockerIgnore.from_dir(self.root)
+        self._entries: Optional[List[Tuple[str, str, os.stat_result]]] = None
+
+    def entries(self) -> List[Tuple[str, str, os.stat_result]]:
+        """
+        Return sorted (relative path, absolute path, lstat) for every entry in the context.
+        The walk happens once per BuildContext.
+        """
+        if self._entries is not None:
+            return self._entries
+        always = {self.dockerfile, DOCKERIGNORE}
+        found: List[Tuple[str, str, os.stat_result]] = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            rel_dir = os.path.relpath(dirpath, self.root).replace(os.sep, "/")
+            rel_dir = "" if rel_dir == "." else rel_dir + "/"
+            kept = []
+            for d in sorted(dirnames):
+                rel = rel_dir + d
+                full = os.path.join(dirpath, d)
+                if self.matcher.can_prune(rel):
+                    continue
+                st = os.lstat(full)
+                if stat.S_ISLNK(st.st_mode):
+                    # os.walk does not follow symlinked dirs; archive them as links.
+                    if not self.matcher.excluded(rel):
+                        found.append((rel, full, st))
+                    continue
+                kept.append(d)
+                if not self.matcher.excluded(rel):
+                    found.append((rel, full, st))
+            dirnames[:] = kept
+            for fname in filenames:
+                rel = rel_dir + fname
+                if self.matcher.excluded(rel) and rel not in always:
+                    continue
+                full = os.path.join(dirpath, fname)
+                found.append((rel, full, os.lstat(full)))
+        found.sort(key=lambda e: e[0])
+        self._entries = found
+        return found
+
+    def digest(self, cache: Optional[DigestCache] = None) -> str:
+        """
+        Content digest of the context: entry names, types, modes and file contents.
+        """
+        cache = cache or DigestCache(self.root)
+        h = hashlib.sha256()
+        for rel, full, st in self.entries():
+            h.update(rel.encode("utf-8", "surrogateescape") + b"\0")
+            h.update(f"{stat.S_IFMT(st.st_mode)}:{stat.S_IMODE(st.st_mode) & 0o111}".encode("ascii"))
+            if stat.S_ISREG(st.st_mode):
+                h.update(cache.digest(rel, full, st).encode("ascii"))
+            elif stat.S_ISLNK(st.st_mode):
+                h.update(os.readlink(full).encode("utf-8", "surrogateescape"))
+        if self.external_dockerfile:
+            h.update(b"\0dockerfile\0" + hash_file(self.dockerfile_path).encode("ascii"))
+        cache.save()
+        return h.hexdigest()
+
+    def stream(self, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Yield the context as an uncompressed tar archive, one bounded chunk at a time.
+        """
+        entries = self.entries()
+        if self.external_dockerfile:
+            entries = entries + [(EXTERNAL_DOCKERFILE, self.dockerfile_path, os.stat(self.dockerfile_path))]
+        return pack(entries, chunk_size)
+
+
+def pack(entries: List[Tuple[str, str, os.stat_result]], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield (relative path, absolute path, stat) entries as an uncompressed tar archive in bounded chunks.
+    """
+    buf = bytearray()
+    for rel, full, st in entries:
+        for piece in _tar_entry(rel, full, st):
+            buf += piece
+            if len(buf) >= chunk_size:
+                yield bytes(buf)
+                buf.clear()
+    buf += b"\0" * (2 * _BLOCK)
+    yield bytes(buf)
+
+
+def _tar_entry(rel: str, full: str, st: os.stat_result) -> Iterator[bytes]:
+    info = tarfile.TarInfo(rel)
+    info.mode = stat.S_IMODE(st.st_mode)
+    info.mtime = int(st.st_mtime)
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    if stat.S_ISDIR(st.st_mode):
+        info.type = tarfile.DIRTYPE
+    elif stat.S_ISLNK(st.st_mode):
+        info.type = tarfile.SYMTYPE
+        info.linkname = os.readlink(full)
+    elif stat.S_ISREG(st.st_mode):
+        info.size = st.st_size
+    else:
+        # sockets, fifos and devices are not sent to the daemon
+        return
+    yield info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+    if info.type != tarfile.REGTYPE:
+        return
+    remaining = info.size
+    with open(full, "rb") as f:
+        while remaining > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    if remaining > 0:
+        # File shrank while streaming; pad to the size announced in the header.
+        yield b"\0" * remaining
+    pad = info.size % _BLOCK
+    if pad:
+        yield b"\0" * (_BLOCK - pad)
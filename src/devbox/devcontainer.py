@@ -1,6 +1,9 @@
 import os
 import json
-from typing import List, Optional, Dict, Any
+import time
+import asyncio
+import hashlib
+from typing import List, Optional, Dict, Any, Tuple
 try:
     import docker
     from docker.types import Mount
@@ -8,13 +11,50 @@ except ImportError:
     docker = None
     Mount = object  # Fallback to allow type hints without docker installed
 
-from devbox.utils import read_json_file, find_devcontainer_config
+from devbox import attach, buildcache, cachevolumes, configcache, engine, features, hooks, pool as warm_pool, pull, resources, snapshot, sync, trace
+from devbox.labels import IMAGE_LABEL, MANAGED_LABEL, PROJECT_LABEL, SPEC_HASH_LABEL, SPEC_LABEL, project_hash
+from devbox.utils import read_json_file, find_devcontainer_config, find_devcontainer_config_folder
+from devbox.session import DockerSession
+from devbox.build import BuildFailed, stream_build
+from devbox.context import BuildContext
 
+# Image label holding the content hash of the build inputs (see compute_build_hash).
+BUILD_HASH_LABEL = "devbox.build_hash"
 
-def generate_random_name(image: bool = False) -> str:
+# Lines of build output shown when a build fails.
+BUILD_ERROR_TAIL = 30
+
+
+# Process-wide session, created lazily on first daemon access (see get_session).
+_session: Optional[DockerSession] = None
+
+
+# Project config loaded by this invocation (see load_project_config).
+_project_config: Optional[Dict[str, Any]] = None
+
+
+def get_session() -> DockerSession:
+    """
+    Return the Docker session for this invocation, creating it on first use.
+    """
+    global _session
+    if _session is None:
+        _session = DockerSession.create(docker.from_env)
+    return _session
+
+
+def current_session() -> Optional[DockerSession]:
+    """
+    Return the session if one was created, without creating it.
+    """
+    return _session
+
+
+def generate_random_name(image: bool = False, path: Optional[str] = None, variant: Optional[str] = None) -> str:
     """
     Generate a name for a container or image.
-    - For images: deterministic based on current working directory path (stable across runs).
+    - For images: deterministic based on the project path (default: current working directory)
+      and, for `.devcontainer/<variant>/` configs, the variant name (stable across runs).
     - For containers: random suffix to avoid collisions.
     """
     import os
@@ -23,12 +63,15 @@ def generate_random_name(image: bool = False) -> str:
     import hashlib
 
     if image:
-        cwd = os.getcwd()
+        cwd = os.path.abspath(path) if path else os.getcwd()
         base = os.path.basename(cwd) or "devbox"
+        if variant:
+            base = f"{base}-{variant}"
         # Sanitize folder name
         sanitized = "".join(c if c.isalnum() or c in "-_." else "-" for c in base.lower())
         # Short hash to differentiate identical folder names at different paths
-        h = hashlib.sha256(cwd.encode("utf-8")).hexdigest()[:8]
+        key = cwd if not variant else f"{cwd}\0{variant}"
+        h = hashlib.sha256(key.encode("utf-8")).hexdigest()[:8]
         return f"devbox_image_{sanitized}_{h}"
     # Container names remain random to allow multiple instances
     return "devbox_" + "".join(random.choices(string.ascii_lowercase + string.digits, k=10))
@@ -41,43 +84,304 @@ def get_container_name(devcjson: Dict[str, Any]) -> str:
     return devcjson.get("name", generate_random_name())
 
 
-def find_running_container_by_image(image_name: str):
+def _mount_to_dict(m: Any) -> Dict[str, Any]:
+    """
+    Return a plain dict view of a Mount (attribute names differ across docker SDK versions).
+    """
+    if isinstance(m, dict) and "Target" in m:
+        d = {
+            "source": m.get("Source"),
+            "target": m.get("Target"),
+            "type": m.get("Type"),
+            "read_only": bool(m.get("ReadOnly", False)),
+        }
+        consistency = m.get("Consistency")
+        if m.get("TmpfsOptions"):
+            d["tmpfs"] = m["TmpfsOptions"]
+    else:
+        d = {
+            "source": getattr(m, "source", None),
+            "target": getattr(m, "target", None),
+            "type": getattr(m, "type", None),
+            "read_only": bool(getattr(m, "read_only", False)),
+        }
+        consistency = getattr(m, "consistency", None)
+        tmpfs = {k: v for k, v in (("SizeBytes", getattr(m, "tmpfs_size", None)), ("Mode", getattr(m, "tmpfs_mode", None))) if v}
+        if tmpfs:
+            d["tmpfs"] = tmpfs
+    if consistency:
+        d["consistency"] = consistency
+    return d
+
+
+def run_spec(
+    image_name: str,
+    mounts: Optional[List[Any]] = None,
+    workspace_folder: Optional[str] = None,
+    env: Optional[Dict[str, Any]] = None,
+    name: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Canonical description of everything fixed at container creation.
+
+    name is only part of the spec when set explicitly in devcontainer.json;
+    generated names are random and would never match.
+    """
+    return {
+        "image": image_name,
+        "mounts": sorted(
+            (_mount_to_dict(m) for m in (mounts or [])),
+            key=lambda d: json.dumps(d, sort_keys=True),
+        ),
+        "workspace_folder": workspace_folder,
+        "env": {str(k): str(v) for k, v in (env or {}).items()},
+        "name": name,
+    }
+
+
+def spec_hash_of(spec: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def compute_spec_hash(image_name: str, mounts: Optional[List[Any]] = None, **spec_fields: Any) -> str:
+    """
+    Hash the run spec (see run_spec) that is fixed at container creation.
+    """
+    return spec_hash_of(run_spec(image_name, mounts, **spec_fields))
+
+
+def _describe_mount(d: Dict[str, Any]) -> str:
+    flags = ", read-only" if d.get("read_only") else ""
+    return f"{d.get('source')} -> {d.get('target')} ({d.get('type')}{flags})"
+
+
+def spec_diff(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """
+    Human readable differences between two run specs.
+    """
+    lines: List[str] = []
+    for key in sorted(set(old) | set(new)):
+        before, after = old.get(key), new.get(key)
+        if before == after:
+            continue
+        if key == "mounts":
+            old_mounts = {json.dumps(m, sort_keys=True): m for m in before or []}
+            new_mounts = {json.dumps(m, sort_keys=True): m for m in after or []}
+            lines += [f"- mount {_describe_mount(m)}" for k, m in old_mounts.items() if k not in new_mounts]
+            lines += [f"+ mount {_describe_mount(m)}" for k, m in new_mounts.items() if k not in old_mounts]
+        elif key == "env":
+            before, after = before or {}, after or {}
+            for var in sorted(set(before) | set(after)):
+                if var not in after:
+                    lines.append(f"- env {var}")
+                elif var not in before:
+                    lines.append(f"+ env {var}={after[var]}")
+                elif before[var] != after[var]:
+                    lines.append(f"~ env {var}: {before[var]} -> {after[var]}")
+        else:
+            lines.append(f"~ {key}: {before!r} -> {after!r}")
+    return lines
+
+
+def container_labels(
+    image_name: str,
+    spec_hash: str,
+    project: Optional[str] = None,
+    spec: Optional[Dict[str, Any]] = None,
+) -> Dict[str, str]:
+    """
+    Labels stamped on every container devbox creates.
+    """
+    labels = {
+        MANAGED_LABEL: "true",
+        PROJECT_LABEL: project or project_hash(),
+        IMAGE_LABEL: image_name,
+        SPEC_HASH_LABEL: spec_hash,
+    }
+    if spec is not None:
+        labels[SPEC_LABEL] = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    return labels
+
+
+@trace.traced("find existing container")
+def find_running_container_by_image(
+    image_name: str,
+    project: Optional[str] = None,
+    session: Optional[DockerSession] = None,
+    spec_hash: Optional[str] = None,
+):
     """
-    If a container with a matching image reference (full image ref or tag) is running (or exists), return it.
+    If a devbox container for this project and image is running (or exists), return it.
+
+    The lookup uses a server-side label filter, so its cost does not grow with the
+    number of unrelated containers on the host. Containers whose spec hash matches
+    spec_hash are preferred, then running ones.
     """
     if docker is None:
         print("docker SDK not available.")
         return None
 
-    client = docker.from_env()
-    for container in client.containers.list(all=True):
-        try:
-            config_image = container.attrs.get("Config", {}).get("Image", "") or ""
-        except Exception:
-            config_image = ""
-        tags = container.image.tags or []
-        if config_image == image_name or image_name in tags:
-            return container
-    return None
+    client = (session or get_session()).client
+    filters = {
+        "label": [
+            f"{MANAGED_LABEL}=true",
+            f"{PROJECT_LABEL}={project or project_hash()}",
+            f"{IMAGE_LABEL}={image_name}",
+        ]
+    }
+    # Unclaimed warm-pool members carry the same labels but are not reusable as-is.
+    containers = [c for c in client.containers.list(all=True, filters=filters) if not warm_pool.is_pooled(c)]
+    if not containers:
+        return None
+
+    def rank(container: Any) -> Tuple[bool, bool]:
+        labels = getattr(container, "labels", None) or {}
+        matches = spec_hash is not None and labels.get(SPEC_HASH_LABEL) == spec_hash
+        return matches, container.status == "running"
+
+    return max(containers, key=rank)
+
+
+def _mounts_key(devcjson: Dict[str, Any]) -> str:
+    raw = {
+        "mounts": devcjson.get("mounts"),
+        "workspaceMount": devcjson.get("workspaceMount"),
+        "cacheVolumes": devbox_options(devcjson).get("cacheVolumes"),
+    }
+    return hashlib.sha256(json.dumps(raw, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def load_project_config(cwd: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Discover and parse devcontainer.json for cwd, reusing the on-disk config cache
+    while the files involved are unchanged.
+
+    Returns a dict with config_path, devcontainer_dir, devcjson, mounts (plain dicts),
+    mounts_key, image_name and workspace_folder, or None if no config was found.
+    """
+    global _project_config
+    cwd = os.path.abspath(cwd or os.getcwd())
+    with trace.span("load config cache"):
+        config = configcache.load(cwd)
+    if config is None:
+        with trace.span("discover devcontainer.json"):
+            devcontainer_dir = find_devcontainer_config_folder(cwd)
+            config_path = find_devcontainer_config(devcontainer_dir) if devcontainer_dir else None
+        if config_path is None:
+            return None
+        config = _parse_config(config_path, devcontainer_dir, cwd)
+        configcache.store(cwd, config, configcache.discovery_stamps(cwd, devcontainer_dir, config_path))
+    _project_config = config
+    return config
+
+
+def _parse_config(
+    config_path: str, devcontainer_dir: str, project_dir: str, variant: Optional[str] = None
+) -> Dict[str, Any]:
+    with trace.span("parse devcontainer.json"):
+        devcjson = read_json_file(config_path)
+    build_config = devcjson.get("build")
+    image_name = devcjson.get("image") or (
+        generate_random_name(image=True, path=project_dir, variant=variant) if build_config else None
+    )
+    return {
+        "config_path": config_path,
+        "devcontainer_dir": devcontainer_dir,
+        "devcjson": devcjson,
+        "mounts": [_mount_to_dict(m) for m in get_mounts(devcjson, image_name, project_hash(project_dir, variant))],
+        "mounts_key": _mounts_key(devcjson),
+        "image_name": image_name,
+        "workspace_folder": devcjson.get("workspaceFolder", "/workspace"),
+    }
+
+
+def load_config_file(config_path: str, project_dir: str, variant: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parse a known devcontainer.json (as found by `start --all`) through the config cache.
+
+    A project's main config shares the entry `devbox start` keeps for the project dir;
+    `.devcontainer/<variant>/` configs are cached under their own path. The result does not
+    depend on a cache hit: anonymous volume names come from the project and variant.
+    """
+    devcontainer_dir = os.path.dirname(config_path)
+    if variant is None:
+        key, stamps = project_dir, configcache.discovery_stamps(project_dir, devcontainer_dir, config_path)
+    else:
+        key, stamps = config_path, [config_path, devcontainer_dir]
+    config = configcache.load(key)
+    if config is None or config["config_path"] != config_path:
+        config = _parse_config(config_path, devcontainer_dir, project_dir, variant)
+        configcache.store(key, config, stamps)
+    return config
+
+
+def parsed_mounts(config: Dict[str, Any]) -> List[Any]:
+    """
+    Mount objects for the plain-dict mounts of a loaded config.
+    """
+    mounts = [_parse_mount_dict(d) for d in config["mounts"]]
+    return [m for m in mounts if m is not None]
+
+
+def resolve_mounts(devcjson: Dict[str, Any], image_name: Optional[str] = None) -> List[Any]:
+    """
+    Like get_mounts, but reuses the parsed mounts of the loaded project config when the
+    mount entries are unchanged, skipping the parse.
+    """
+    config = _project_config
+    if config is not None and config.get("mounts_key") == _mounts_key(devcjson):
+        return parsed_mounts(config)
+    return get_mounts(devcjson, image_name)
 
 
 def get_devcontainer_json() -> Optional[Dict[str, Any]]:
     """
     Load devcontainer.json from discovered .devcontainer/ folder.
     """
-    devcjson_file = find_devcontainer_config()
-    if devcjson_file is None:
+    config = load_project_config()
+    if config is None:
         print("devcontainer.json not found.")
         return None
-    return read_json_file(devcjson_file)
+    return config["devcjson"]
+
+
+def _tmpfs_options(size: Any, mode: Any) -> Dict[str, Any]:
+    """
+    Mount keyword arguments for a tmpfs size (bytes or e.g. 512m) and mode (octal, e.g. 1777).
+    """
+    from devbox.resources import parse_size
+
+    options: Dict[str, Any] = {}
+    if size is not None:
+        parsed = parse_size(size)
+        if parsed is None:
+            print(f"Ignoring invalid tmpfs size: {size}")
+        else:
+            options["tmpfs_size"] = parsed
+    if mode is not None:
+        try:
+            options["tmpfs_mode"] = mode if isinstance(mode, int) else int(str(mode), 8)
+        except ValueError:
+            print(f"Ignoring invalid tmpfs mode: {mode}")
+    return options
 
 
-def _parse_mount_string(mount_str: str):
+def anonymous_volume_name(project: str, target: str) -> str:
+    """
+    Volume backing an anonymous `type=volume` mount: named from the project and the target,
+    so it (and the run spec it is part of) stays the same across runs.
+    """
+    return f"devbox_{project}_{hashlib.sha256(target.encode('utf-8')).hexdigest()[:8]}_vol"
+
+
+def _parse_mount_string(mount_str: str, project: Optional[str] = None):
     """
     Parse a devcontainer-style mount string:
       source=/host/path,target=/container/path,type=bind,consistency=cached,readonly=true,mode=ro
+      type=tmpfs,target=/scratch,tmpfs-size=512m,tmpfs-mode=1777
 
-    Returns a docker.types.Mount or None.
+    Anonymous volumes are named with anonymous_volume_name (project defaults to the
+    current directory's). Returns a docker.types.Mount or None.
     """
     if not mount_str or not isinstance(mount_str, str):
         return None
@@ -98,10 +402,8 @@ def _parse_mount_string(mount_str: str):
     read_only = readonly_flag or (mode.lower() == "ro")
 
     # devcontainer spec allows anonymous volume (no source=) if type=volume + target specified
-    if mtype == "volume" and not source:
-        # For anonymous volumes docker-py expects source to be volume name; leave blank -> may fail
-        # We create a random volume name to simulate anonymous volume.
-        source = generate_random_name(image=False) + "_vol"
+    if mtype == "volume" and not source and target:
+        source = anonymous_volume_name(project or project_hash(), target)
 
     if not target:
         print(f"Mount string missing target: {mount_str}")
@@ -119,6 +421,8 @@ def _parse_mount_string(mount_str: str):
     }
     if consistency:
         kwargs["consistency"] = consistency
+    if mtype == "tmpfs":
+        kwargs.update(_tmpfs_options(kv.get("tmpfs-size") or kv.get("size"), kv.get("tmpfs-mode")))
 
     try:
         return Mount(**kwargs)
@@ -127,10 +431,11 @@ def _parse_mount_string(mount_str: str):
         return None
 
 
-def _parse_mount_dict(entry: Dict[str, Any]):
+def _parse_mount_dict(entry: Dict[str, Any], project: Optional[str] = None):
     """
     Parse a dict entry from devcontainer.json mounts list:
       {"source": "...", "target": "...", "type": "bind", "read_only": true, "consistency": "cached"}
+      {"type": "tmpfs", "target": "/scratch", "size": "512m", "mode": "1777"}
     """
     if not isinstance(entry, dict):
         return None
@@ -146,7 +451,7 @@ def _parse_mount_dict(entry: Dict[str, Any]):
     consistency = entry.get("consistency")
 
     if mtype == "volume" and not source:
-        source = generate_random_name(image=False) + "_vol"
+        source = anonymous_volume_name(project or project_hash(), target)
 
     if docker is None or Mount is object:
         print("docker SDK not available; cannot create Mount objects.")
@@ -160,6 +465,8 @@ def _parse_mount_dict(entry: Dict[str, Any]):
     }
     if consistency:
         kwargs["consistency"] = consistency
+    if mtype == "tmpfs":
+        kwargs.update(_tmpfs_options(entry.get("size") or entry.get("tmpfs_size"), entry.get("mode") or entry.get("tmpfs_mode")))
 
     try:
         return Mount(**kwargs)
@@ -168,7 +475,8 @@ def _parse_mount_dict(entry: Dict[str, Any]):
         return None
 
 
-def get_mounts(devcjson: Dict[str, Any]) -> List[Any]:
+@trace.traced("get_mounts")
+def get_mounts(devcjson: Dict[str, Any], image_name: Optional[str] = None, project: Optional[str] = None) -> List[Any]:
     """
     Convert devcontainer.json 'mounts' + 'workspaceMount' entries into a list of docker.types.Mount objects.
 
@@ -180,6 +488,10 @@ def get_mounts(devcjson: Dict[str, Any]) -> List[Any]:
       ],
       "workspaceMount": "source=/absolute/workspace,target=/workspaces/project,type=bind"
 
+    When image_name is given and customizations.devbox.cacheVolumes is set, named cache
+    volumes (see devbox.cachevolumes) are appended for targets not already mounted.
+    project (default: the current directory's hash) names anonymous volumes.
+
     Returns:
         List of Mount objects (empty list if none or docker SDK unavailable).
     """
@@ -192,9 +504,9 @@ def get_mounts(devcjson: Dict[str, Any]) -> List[Any]:
         for entry in mounts_raw:
             m = None
             if isinstance(entry, str):
-                m = _parse_mount_string(entry)
+                m = _parse_mount_string(entry, project)
             elif isinstance(entry, dict):
-                m = _parse_mount_dict(entry)
+                m = _parse_mount_dict(entry, project)
             else:
                 print(f"Unsupported mount entry type: {type(entry)}")
             if m is not None:
@@ -202,56 +514,267 @@ def get_mounts(devcjson: Dict[str, Any]) -> List[Any]:
 
     workspace_mount = devcjson.get("workspaceMount")
     if isinstance(workspace_mount, str):
-        wm = _parse_mount_string(workspace_mount)
+        wm = _parse_mount_string(workspace_mount, project)
         if wm:
             result.append(wm)
     elif workspace_mount and isinstance(workspace_mount, dict):
-        wm = _parse_mount_dict(workspace_mount)
+        wm = _parse_mount_dict(workspace_mount, project)
         if wm:
             result.append(wm)
 
+    cache = cachevolumes.cache_config(devbox_options(devcjson))
+    if image_name and cache:
+        taken = [_mount_to_dict(m)["target"] for m in result]
+        for entry in cachevolumes.mount_entries(cache, image_name, taken):
+            m = _parse_mount_dict(entry)
+            if m is not None:
+                result.append(m)
+
     return result
 
 
-def build_dev_container(dockerfile: Optional[str], image_name: str, mounts: List[Any]) -> None:
+def compute_build_hash(context_dir: str, dockerfile: str, build_config: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Compute a content hash of everything that goes into an image build:
+    the 'build' section of devcontainer.json, the Dockerfile name and the
+    path + contents of every file in the build context that .dockerignore keeps.
+    """
+    return context_build_hash(BuildContext(context_dir, os.path.join(context_dir, dockerfile)), build_config)
+
+
+@trace.traced("hash build context")
+def context_build_hash(context: BuildContext, build_config: Optional[Dict[str, Any]]) -> str:
+    """
+    Build hash for an already constructed BuildContext (see compute_build_hash).
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps(buildcache.without_cache_keys(build_config), sort_keys=True).encode("utf-8"))
+    h.update(b"\0" + context.dockerfile.encode("utf-8") + b"\0")
+    h.update(context.digest().encode("ascii"))
+    return h.hexdigest()
+
+
+@trace.traced("check image build hash")
+def image_is_current(client, image_name: str, build_hash: str) -> bool:
+    """
+    Return True if image_name exists locally and carries a matching build hash label.
+    """
+    try:
+        image = client.images.get(image_name)
+    except Exception:
+        return False
+    labels = getattr(image, "labels", None) or {}
+    return labels.get(BUILD_HASH_LABEL) == build_hash
+
+
+def build_image(
+    context: BuildContext,
+    image_name: str,
+    build_hash: str,
+    rebuild: bool = False,
+    session: Optional[DockerSession] = None,
+    cache: Optional[Dict[str, List[Dict[str, str]]]] = None,
+) -> bool:
+    """
+    Build image_name from context unless it already carries build_hash.
+
+    cache is a normalized build cache config (see devbox.buildcache.cache_config):
+    its sources are imported before the build and passed as cache_from, and the
+    built image is exported to its destinations.
+
+    Returns True if a build ran. Raises BuildFailed if the daemon reports an error.
+    """
+    client = (session or get_session()).client
+    if not rebuild and image_is_current(client, image_name, build_hash):
+        print(f"Image '{image_name}' is up to date (build hash {build_hash[:12]}); skipping build")
+        return False
+    cache = cache or {}
+    build_kwargs: Dict[str, Any] = {}
+    if cache.get("from"):
+        with trace.span("import build cache"):
+            cache_from = buildcache.import_caches(client, cache["from"], image_name)
+        if cache_from:
+            build_kwargs["cache_from"] = cache_from
+    print(f"Building image '{image_name}' from '{context.dockerfile}' in {context.root}")
+    with trace.span("build image", image=image_name):
+        progress = stream_build(
+            client.api,
+            fileobj=context.stream(),
+            custom_context=True,
+            tag=image_name,
+            dockerfile=context.dockerfile,
+            labels={BUILD_HASH_LABEL: build_hash},
+            **build_kwargs,
+        )
+    progress.report()
+    progress.cache_report()
+    print(f"Built image with name: {image_name}")
+    if cache.get("to"):
+        with trace.span("export build cache"):
+            buildcache.export_caches(client, cache["to"], image_name)
+    return True
+
+
+def make_build_context(devcontainer_dir: str, dockerfile: Optional[str], build_config: Optional[Dict[str, Any]]) -> BuildContext:
+    """
+    BuildContext for a config; build.context and build.dockerfile are relative to the folder holding devcontainer.json.
+    """
+    context_dir = os.path.normpath(os.path.join(devcontainer_dir, (build_config or {}).get("context", ".")))
+    return BuildContext(context_dir, os.path.join(devcontainer_dir, dockerfile or "Dockerfile"))
+
+
+def print_build_failure(image_name: str, e: BuildFailed) -> None:
+    """
+    Print the failure reason and the tail of the build log.
+    """
+    print(f"Failed to build image {image_name}: {e.reason}")
+    if e.log_tail:
+        print("Last build output:")
+        for line in e.log_tail[-BUILD_ERROR_TAIL:]:
+            print(f"  {line}")
+
+
+def apply_features(
+    image_name: str,
+    feature_set: Optional[List[Dict[str, Any]]],
+    project: Optional[str] = None,
+    session: Optional[DockerSession] = None,
+) -> Optional[str]:
+    """
+    Install feature_set as cached layers on image_name (pulling it if missing).
+
+    Returns the image containers should run from: image_name itself without features,
+    the project's feature image otherwise, or None if a feature failed.
+    """
+    if not feature_set:
+        return image_name
+    session = session or get_session()
+    client = session.client
+    try:
+        client.images.get(image_name)
+    except Exception:
+        if not pull.pull_image(image_name, session=session):
+            return None
+    target = features.image_name(project or project_hash())
+    return target if features.apply(client, image_name, feature_set, target) else None
+
+
+def build_dev_container(
+    dockerfile: Optional[str],
+    image_name: str,
+    mounts: List[Any],
+    build_config: Optional[Dict[str, Any]] = None,
+    rebuild: bool = False,
+    session: Optional[DockerSession] = None,
+    devcontainer_dir: Optional[str] = None,
+    feature_set: Optional[List[Dict[str, Any]]] = None,
+    **start_kwargs: Any,
+) -> None:
     """
-    Build the dev container image and start a container with mounts.
+    Build the dev container image and start a container with mounts. Returns the container, or None.
+
+    The build is skipped when the existing image already carries the content
+    hash of the current build inputs, unless rebuild is True. feature_set (see
+    devbox.features.resolve) is installed on top of the built image. Remaining
+    keyword arguments (project, pool, spec) are passed on to start_dev_container.
     """
     if docker is None:
         print("docker SDK not available; cannot build container.")
         return
 
-    client = docker.from_env()
+    session = session or get_session()
     try:
-        path = os.path.join(os.getcwd(), ".devcontainer/")
-        dockerfile_path = dockerfile if dockerfile else "Dockerfile"
-        print(f"Building image '{image_name}' from '{dockerfile_path}' in {path}")
-        client.images.build(path=path, tag=image_name, dockerfile=dockerfile_path)
-        print(f"Built image with name: {image_name}")
+        devcontainer_dir = devcontainer_dir or os.path.join(os.getcwd(), ".devcontainer")
+        context = make_build_context(devcontainer_dir, dockerfile, build_config)
+        cache = buildcache.cache_config(build_config, devcontainer_dir)
+        build_image(context, image_name, context_build_hash(context, build_config), rebuild=rebuild, session=session, cache=cache)
+        run_image = apply_features(image_name, feature_set, project=start_kwargs.get("project"), session=session)
+        if run_image is None:
+            return None
         container_name = generate_random_name()
-        start_dev_container(image_name, container_name, mounts)
+        return start_dev_container(run_image, container_name, mounts, session=session, **start_kwargs)
+    except BuildFailed as e:
+        print_build_failure(image_name, e)
     except Exception as e:
         print(f"Failed to build image {image_name}: {e}")
 
 
-def start_dev_container(image_name: str, container_name: str, mounts: Optional[List[Any]] = None):
+def _spec_drifted(container: Any, spec: Dict[str, Any], spec_hash: str) -> bool:
+    """
+    If container was created from another spec, print what changed and return True.
+    """
+    labels = getattr(container, "labels", None) or {}
+    if labels.get(SPEC_HASH_LABEL) == spec_hash:
+        return False
+    print(f"Container {container.name} was created from a different spec:")
+    try:
+        old_spec = json.loads(labels.get(SPEC_LABEL) or "")
+    except (TypeError, ValueError):
+        old_spec = None
+    if isinstance(old_spec, dict):
+        for line in spec_diff(old_spec, spec) or ["(no visible differences)"]:
+            print(f"  {line}")
+    else:
+        print("  (no recorded spec; created by an older devbox)")
+    return True
+
+
+def start_dev_container(
+    image_name: str,
+    container_name: str,
+    mounts: Optional[List[Any]] = None,
+    session: Optional[DockerSession] = None,
+    project: Optional[str] = None,
+    pool: Optional[Dict[str, Any]] = None,
+    spec: Optional[Dict[str, Any]] = None,
+    recreate: bool = False,
+):
     """
     Start (or reuse) a container from image_name applying given mounts when creating new container.
+
+    Resource settings (see devbox.resources) are taken from spec["resources"] and applied at creation.
+
+    spec is the full run spec (see run_spec; defaults to image + mounts). An existing
+    container is reused only if its spec hash label matches; otherwise the differences
+    are printed and it is replaced. A running container is only replaced when recreate
+    is True; without it nothing is started and None is returned.
+
+    project is the devbox.project label value (defaults to the hash of the current directory).
+    pool is a normalized warm pool config (see devbox.pool.pool_config); when its size is
+    non-zero a pre-created container is claimed if available and the pool is refilled.
+
+    A new container is created from the newest valid snapshot of image_name (see
+    devbox.snapshot) when there is one; the pool is not used in that case.
     """
     if docker is None:
         print("docker SDK not available; cannot start container.")
         return None
 
-    client = docker.from_env()
+    session = session or get_session()
+    client = session.client
     try:
-        existing = find_running_container_by_image(image_name)
+        project = project or project_hash()
+        spec = spec or run_spec(image_name, mounts)
+        spec_hash = spec_hash_of(spec)
+        existing = find_running_container_by_image(image_name, project=project, session=session, spec_hash=spec_hash)
+        if existing and _spec_drifted(existing, spec, spec_hash):
+            if existing.status == "running" and not recreate:
+                print(f"{existing.name} is running; stop it or pass --recreate to replace it.")
+                return None
+            print(f"Recreating {existing.name}.")
+            try:
+                existing.remove(force=True)
+            except Exception as e:
+                print(f"Failed to remove container {existing.id}: {e}")
+            existing = None
         if existing:
             if existing.status == "running":
                 print(f"Found running container with same image: {existing.id} called {existing.name}")
                 return existing
             else:
                 try:
-                    existing.start()
+                    with trace.span("start existing container"):
+                        existing.start()
                     print(f"Started existing container called {existing.name}")
                     return existing
                 except Exception as e:
@@ -261,16 +784,47 @@ def start_dev_container(image_name: str, container_name: str, mounts: Optional[L
             "image": image_name,
             "name": container_name,
             "detach": True,
-            "tty": True
+            "tty": True,
+            "labels": container_labels(image_name, spec_hash, project=project, spec=spec),
         }
         if mounts:
             run_kwargs["mounts"] = mounts
+        if spec.get("env"):
+            run_kwargs["environment"] = spec["env"]
+        if spec.get("workspace_folder"):
+            run_kwargs["working_dir"] = spec["workspace_folder"]
+        if spec.get("resources"):
+            run_kwargs.update(resources.run_kwargs(spec["resources"]))
+
+        with trace.span("find snapshot"):
+            snapshot_ref = snapshot.latest(client, image_name)
+        # Pool members are created from the base image, so a usable snapshot bypasses the pool.
+        pool_size = 0 if snapshot_ref else (pool or {}).get("size", 0)
+        if pool_size:
+            with trace.span("claim pooled container"):
+                current_image_id = warm_pool.image_id(client, image_name)
+                container = warm_pool.claim(client, run_kwargs["labels"], current_image_id, container_name)
+            if container is not None:
+                print(f"Claimed warm container with ID: {container.id} called {container.name}")
+                warm_pool.refill_in_background(run_kwargs, current_image_id, pool)
+                return container
 
-        container = client.containers.run(**run_kwargs)
+        if snapshot_ref:
+            print(f"Using snapshot {snapshot_ref} of {image_name}")
+            run_kwargs["image"] = snapshot_ref
+        try:
+            with trace.span("create and start container"):
+                container = client.containers.run(**run_kwargs)
+        except docker.errors.ImageNotFound:
+            print(f"Image {image_name} not found locally; pulling it.")
+            if not pull.pull_image(image_name, session=session):
+                return None
+            with trace.span("create and start container"):
+                container = client.containers.run(**run_kwargs)
         print(f"Started new container with ID: {container.id} called {container.name}")
+        if pool_size:
+            warm_pool.refill_in_background(run_kwargs, current_image_id, pool)
         return container
-    except docker.errors.ImageNotFound:
-        print(f"Image {image_name} not found. Please build or pull the image first.")
     except Exception as e:
         print(f"An error occurred while starting the container: {e}")
     return None
@@ -280,101 +834,348 @@ def stop_dev_container(container_id: str) -> None:
     """
     Stop a container by ID.
     """
-    if docker is None:
-        print("docker SDK not available; cannot stop container.")
-        return
+    stop_containers([container_id])
+
+
+def _selection_filters(project: Optional[str]) -> Dict[str, List[str]]:
+    labels = [f"{MANAGED_LABEL}=true"]
+    if project:
+        labels.append(f"{PROJECT_LABEL}={project}")
+    return {"label": labels}
+
+
+async def _stop_async(
+    eng: Any, ids: List[str], project: Optional[str], select: bool, timeout: Optional[int], remove: bool
+) -> List[Tuple[str, Optional[BaseException], float]]:
+    if select:
+        listing = await eng.list_containers(all=remove, filters=_selection_filters(project))
+        names = [(c.get("Names") or [c["Id"][:12]])[0].lstrip("/") for c in listing]
+        targets = [(c["Id"], n) for c, n in zip(listing, names) if not n.startswith(warm_pool.POOL_PREFIX)]
+    else:
+        targets = [(i, i) for i in ids]
+
+    async def one(container_id: str, label: str) -> Tuple[str, Optional[BaseException], float]:
+        started = time.monotonic()
+        try:
+            await eng.stop_container(container_id, timeout)
+            if remove:
+                await eng.remove_container(container_id)
+        except Exception as e:
+            return label, e, time.monotonic() - started
+        return label, None, time.monotonic() - started
+
+    return await asyncio.gather(*(one(cid, label) for cid, label in targets))
+
+
+def _stop_with_sdk(
+    ids: List[str], project: Optional[str], select: bool, timeout: Optional[int], remove: bool
+) -> List[Tuple[str, Optional[BaseException], float]]:
+    from concurrent.futures import ThreadPoolExecutor
+
+    client = get_session().client
+    if select:
+        targets = [
+            c for c in client.containers.list(all=remove, filters=_selection_filters(project))
+            if not warm_pool.is_pooled(c)
+        ]
+    else:
+        targets = list(ids)
+
+    def one(target: Any) -> Tuple[str, Optional[BaseException], float]:
+        started = time.monotonic()
+        label = target if isinstance(target, str) else target.name
+        try:
+            container = client.containers.get(target) if isinstance(target, str) else target
+            container.stop(**({"timeout": timeout} if timeout is not None else {}))
+            if remove:
+                container.remove()
+        except Exception as e:
+            return label, e, time.monotonic() - started
+        return label, None, time.monotonic() - started
+
+    if not targets:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(targets), engine.DEFAULT_CONCURRENCY)) as pool:
+        return list(pool.map(one, targets))
+
+
+@trace.traced("stop containers")
+def stop_containers(
+    ids: Optional[List[str]] = None,
+    project: bool = False,
+    all_managed: bool = False,
+    timeout: Optional[int] = None,
+    remove: bool = False,
+) -> List[Tuple[str, Optional[BaseException], float]]:
+    """
+    Stop containers concurrently: the given IDs/names, every devbox container of the current
+    project (project=True), or every devbox container on the host (all_managed=True).
+    Pooled containers are left to the warm pool. timeout is the grace period in seconds
+    before SIGKILL (daemon default: 10); remove deletes each container after it stops.
 
+    Prints one line per container with its timing and returns (container, error, seconds) tuples.
+    """
+    ids = list(ids or [])
+    select = project or all_managed
+    if not ids and not select:
+        print("Nothing to stop: pass container IDs, --project or --all.")
+        return []
+    scope = project_hash() if project and not all_managed else None
+
+    started = time.monotonic()
+    eng = engine.Engine.from_env()
     try:
-        client = docker.from_env()
-        container = client.containers.get(container_id)
-        container.stop()
-        print(f"Stopped container with ID: {container.id}")
+        if eng is not None:
+            results = engine.run(lambda e: _stop_async(e, ids, scope, select, timeout, remove), eng)
+        elif docker is None:
+            print("docker SDK not available; cannot stop container.")
+            return []
+        else:
+            results = _stop_with_sdk(ids, scope, select, timeout, remove)
     except Exception as e:
-        print(f"An error occurred while stopping the container: {e}")
+        print(f"An error occurred while stopping containers: {e}")
+        return []
+
+    if not results:
+        print("No matching containers to stop.")
+        return results
+    verb = "Stopped and removed" if remove else "Stopped"
+    width = max(len(label) for label, _, _ in results)
+    for label, error, secs in results:
+        outcome = f"failed: {error}" if error else verb.lower()
+        print(f"  {label:<{width}}  {secs:6.2f}s  {outcome}")
+    ok = sum(1 for _, error, _ in results if error is None)
+    print(f"{verb} {ok}/{len(results)} container(s) in {time.monotonic() - started:.2f}s")
+    return results
+
+
+def find_shell(client: Any, container_ref: str) -> Optional[str]:
+    """
+    The container's shell from the local cache, or probed with one exec and cached.
+    Names and short IDs are resolved to the full ID (one inspect) before the cache lookup.
+    """
+    container = None
+    container_id = container_ref
+    if not attach.is_full_id(container_ref):
+        container = client.containers.get(container_ref)
+        container_id = container.id
+    shell = attach.cached_shell(container_id)
+    if shell is None:
+        with trace.span("probe shell"):
+            container = container or client.containers.get(container_id)
+            shell = attach.probe_shell(container)
+        if shell is not None:
+            attach.remember_shell(shell, container_id)
+    return shell
 
 
-def container_cli(container_id: str) -> None:
+def container_cli(container_id: str, docker_cli: bool = False) -> None:
     """
     Launch interactive shell in container.
     Tries common shells in order: /bin/bash, /bin/sh, /bin/zsh
+
+    The shell is probed with a single exec and cached per container, so later
+    attaches go straight to the exec. The shell runs in-process over the SDK
+    connection when stdin is a terminal; docker_cli uses `docker exec -it` instead.
     """
     import subprocess
 
-    shells = ["/bin/bash", "/bin/sh", "/bin/zsh"]
-    
     if docker is None:
         print("docker SDK not available; cannot inspect container.")
         return
     
     try:
-        client = docker.from_env()
-        container = client.containers.get(container_id)
-        
-        # Try each shell in order
-        for shell in shells:
-            try:
-                # Use docker exec to check if shell exists
-                result = container.exec_run(f"test -x {shell}", privileged=False)
-                if result.exit_code == 0:
-                    print(f"Using shell: {shell}")
-                    subprocess.run(["docker", "exec", "-it", container_id, shell])
-                    return
-            except Exception:
-                continue
-        
-        # No shell found
-        print(f"No suitable shell found in container. Tried: {', '.join(shells)}")
+        client = get_session().client
+        shell = find_shell(client, container_id)
+        if shell is None:
+            print(f"No suitable shell found in container. Tried: {', '.join(attach.SHELLS)}")
+            return
+
+        print(f"Using shell: {shell}")
+        if docker_cli or not attach.can_attach_in_process():
+            subprocess.run(["docker", "exec", "-it", container_id, shell])
+        else:
+            attach.exec_shell(client.api, container_id, shell)
     except Exception as e:
         print(f"An error occurred while accessing the container CLI: {e}")
 
 
-def start() -> None:
+def devbox_options(devcjson: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Primary entry point: load devcontainer.json, build or start a container, applying mounts.
+    Devbox-specific settings from the customizations.devbox section of devcontainer.json.
     """
-    devcjson = get_devcontainer_json()
-    if devcjson is None:
+    customizations = devcjson.get("customizations")
+    options = customizations.get("devbox") if isinstance(customizations, dict) else None
+    return options if isinstance(options, dict) else {}
+
+
+def devcontainer_spec(
+    devcjson: Dict[str, Any],
+    image_name: str,
+    mounts: List[Any],
+    feature_set: Optional[List[Dict[str, Any]]] = None,
+    resource_settings: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Run spec for a devcontainer.json: image, mounts, workspaceFolder, containerEnv and name,
+    plus the digest of its resolved features and its resource settings if it has any.
+    """
+    env = devcjson.get("containerEnv")
+    spec = run_spec(
+        image_name,
+        mounts,
+        workspace_folder=devcjson.get("workspaceFolder", "/workspace"),
+        env=env if isinstance(env, dict) else None,
+        name=devcjson.get("name"),
+    )
+    if feature_set:
+        spec["features"] = features.digest(feature_set)
+    if resource_settings:
+        spec["resources"] = resource_settings
+    return spec
+
+
+def workspace_mount(devcjson: Dict[str, Any], source: str):
+    """
+    Bind mount of source at the configured workspaceFolder (default /workspace), or None without docker SDK.
+    """
+    if docker is None or Mount is object:
+        return None
+    return Mount(
+        source=source,
+        target=devcjson.get("workspaceFolder", "/workspace"),
+        type="bind",
+        read_only=False
+    )
+
+
+@trace.traced("initial workspace sync")
+def start_workspace_sync(
+    container: Any, workspace_folder: str, options: Dict[str, Any], root: Optional[str] = None
+) -> None:
+    """
+    Copy root (default: the current directory) into the container's workspace volume and
+    start the background watcher.
+    """
+    root = root or os.getcwd()
+    ignore = options.get("workspaceSyncIgnore") or []
+    interval = sync.sync_interval(options)
+    syncer = sync.WorkspaceSync(root, sync.ContainerTarget(container, workspace_folder), ignore, interval=interval)
+    try:
+        sent, removed = syncer.initial()
+        print(f"Synced workspace into {workspace_folder} ({sent} sent, {removed} removed)")
+    except Exception as e:
+        print(f"Failed to sync workspace into container {container.name}: {e}")
         return
+    sync.start_watcher(container.id, root, workspace_folder, ignore, state=syncer.state, interval=interval)
 
-    print("Loaded devcontainer.json:")
-    print(json.dumps(devcjson, indent=2))
 
-    mounts = get_mounts(devcjson)
-    
-    # Add current directory mount to workspace
-    cwd = os.getcwd()
-    workspace_target = devcjson.get("workspaceFolder", "/workspace")
-    if docker is not None and Mount is not object:
-        cwd_mount = Mount(
-            source=cwd,
-            target=workspace_target,
-            type="bind",
-            read_only=False
-        )
-        mounts.append(cwd_mount)
-    
+def run_image_name(config: Dict[str, Any]) -> Optional[str]:
+    """
+    The image a project's containers run from, resolved as start() does: the project's
+    features image when devcontainer.json has features, else its image. Raises features.FeatureError.
+    """
+    devcjson = config["devcjson"]
+    if devcjson.get("features") and features.resolve(devcjson, os.path.dirname(config["config_path"])):
+        return features.image_name(project_hash())
+    return config["image_name"]
+
+
+def print_mounts(mounts: List[Any]) -> None:
     if mounts:
         print(f"Configured {len(mounts)} mount(s):")
         for m in mounts:
-            # Mount object attributes differ depending on docker SDK version
-            source = getattr(m, "source", None)
-            target = getattr(m, "target", None)
-            mtype = getattr(m, "type", None)
-            read_only = getattr(m, "read_only", False)
-            print(f"  - {source} -> {target} (type={mtype}, read_only={read_only})")
+            d = _mount_to_dict(m)
+            print(f"  - {d['source']} -> {d['target']} (type={d['type']}, read_only={d['read_only']})")
     else:
         print("No mounts configured.")
 
+
+def start(rebuild: bool = False, recreate: bool = False) -> None:
+    """
+    Primary entry point: load devcontainer.json, build or start a container, applying mounts.
+
+    Pass --rebuild to build the image even if its build inputs are unchanged, and
+    --recreate to replace a running container whose spec has changed.
+    """
+    devcjson = get_devcontainer_json()
+    if devcjson is None:
+        return
+
+    print("Loaded devcontainer.json:")
+    print(json.dumps(devcjson, indent=2))
+
     build_config = devcjson.get("build")
     image_ref = devcjson.get("image")
+    image_name = image_ref or (generate_random_name(image=True) if build_config else None)
+    mounts = resolve_mounts(devcjson, image_name)
+    options = devbox_options(devcjson)
+    workspace_folder = devcjson.get("workspaceFolder", "/workspace")
+    sync_workspace = sync.workspace_mode(options) == "volume"
+
+    # Add current directory mount to workspace (or a synced volume in its place)
+    if sync_workspace:
+        cwd_mount = sync.workspace_volume_mount(project_hash(), workspace_folder)
+    else:
+        cwd_mount = workspace_mount(devcjson, os.getcwd())
+    if cwd_mount is not None:
+        mounts.append(cwd_mount)
+    print_mounts(mounts)
+
+    feature_set: List[Dict[str, Any]] = []
+    if devcjson.get("features"):
+        config = load_project_config()
+        config_dir = os.path.dirname(config["config_path"]) if config else os.path.join(os.getcwd(), ".devcontainer")
+        try:
+            feature_set = features.resolve(devcjson, config_dir)
+        except features.FeatureError as e:
+            print(e)
+            return
+    run_image = features.image_name(project_hash()) if feature_set else image_name
+    resource_settings = resources.resolve(devcjson, lambda: get_session().client.info())
+    if resource_settings:
+        print(f"Resources: {resources.describe(resource_settings) or 'custom run options'}")
+
+    pool = warm_pool.pool_config(options)
+    cache = cachevolumes.cache_config(options)
+    if image_name and cache:
+        with trace.span("ensure cache volumes"):
+            cachevolumes.ensure(get_session().client, cache, image_name)
 
     if build_config:
         dockerfile = build_config.get("dockerfile", "Dockerfile")
-        image_name = image_ref or generate_random_name(image=True)
         print("Building dev container image...")
-        build_dev_container(dockerfile, image_name, mounts)
+        container = build_dev_container(
+            dockerfile,
+            image_name,
+            mounts,
+            build_config=build_config,
+            rebuild=rebuild,
+            session=get_session(),
+            feature_set=feature_set,
+            pool=pool,
+            spec=devcontainer_spec(devcjson, run_image, mounts, feature_set, resource_settings),
+            recreate=recreate,
+        )
     elif image_ref:
         print("Starting container from existing image...")
-        start_dev_container(image_ref, generate_random_name(), mounts)
+        if apply_features(image_ref, feature_set, session=get_session()) is None:
+            return
+        container = start_dev_container(
+            run_image,
+            generate_random_name(),
+            mounts,
+            session=get_session(),
+            pool=pool,
+            spec=devcontainer_spec(devcjson, run_image, mounts, feature_set, resource_settings),
+            recreate=recreate,
+        )
     else:
         print("Neither 'build' nor 'image' specified in devcontainer.json; nothing to start.")
+        return
+
+    if container is None:
+        return
+    if sync_workspace:
+        start_workspace_sync(container, workspace_folder, options)
+    hooks.run_lifecycle(get_session().client, container, devcjson, os.getcwd(), workspace_folder)
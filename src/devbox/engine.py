@@ -0,0 +1,412 @@
+"""
+Asyncio Docker Engine API client.
+
+A small HTTP/1.1 client over the daemon's unix socket (or a plain tcp://
+DOCKER_HOST) built on asyncio streams, for operations that fan out: inspecting
+many containers, pulling several images, stopping a batch. Requests share a
+pool of keep-alive connections bounded by a semaphore, so independent calls
+overlap instead of running one after another.
+
+Synchronous code uses it through run(), which opens an engine, awaits one
+coroutine and closes it again:
+
+    states = engine.run(lambda e: e.inspect_containers(ids))
+
+Engine.from_env() returns None when DOCKER_HOST needs TLS or ssh (or no local
+socket exists); callers then fall back to the docker SDK. Calls are counted in
+the module-level STATS so `devbox --api-stats` can report them next to the
+SDK session's.
+"""
+import os
+import json
+import asyncio
+from collections import Counter
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from urllib.parse import quote, urlencode, urlparse
+
+from devbox import trace
+from devbox.session import load_api_version, save_api_version
+
+DEFAULT_SOCKET = "/var/run/docker.sock"
+DEFAULT_CONCURRENCY = 8
+# Oldest API version the requests below are valid for; used if negotiation fails.
+MIN_API_VERSION = "1.24"
+
+T = TypeVar("T")
+
+# Process-wide call accounting: "METHOD /path" -> count.
+STATS: Counter = Counter()
+
+
+class EngineError(Exception):
+    """
+    Error response from the daemon (or an error embedded in a progress stream).
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}" if status else message)
+        self.status = status
+        self.message = message
+
+
+class Response:
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Any:
+        return json.loads(self.body) if self.body else None
+
+
+def _address_from_env() -> Optional[Tuple[str, Any]]:
+    host = os.environ.get("DOCKER_HOST")
+    if not host:
+        return ("unix", DEFAULT_SOCKET) if os.path.exists(DEFAULT_SOCKET) else None
+    url = urlparse(host)
+    if url.scheme == "unix":
+        return ("unix", url.path)
+    if url.scheme == "tcp" and not os.environ.get("DOCKER_TLS_VERIFY"):
+        return ("tcp", (url.hostname, url.port or 2375))
+    return None
+
+
+async def _read_head(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("daemon closed the connection")
+    parts = status_line.decode("latin-1").split(" ", 2)
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    return int(parts[1]), headers
+
+
+def _bodiless(status: int) -> bool:
+    # RFC 9112 6.3: these never carry a body, whatever the headers say; dockerd sends 204 without Content-Length.
+    return 100 <= status < 200 or status in (204, 304)
+
+
+async def _read_body(reader: asyncio.StreamReader, status: int, headers: Dict[str, str]) -> AsyncIterator[bytes]:
+    if _bodiless(status):
+        return
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                # trailers end with an empty line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+    elif "content-length" in headers:
+        length = int(headers["content-length"])
+        if length:
+            yield await reader.readexactly(length)
+    else:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            yield data
+
+
+def _reusable(status: int, headers: Dict[str, str]) -> bool:
+    framed = _bodiless(status) or "content-length" in headers or headers.get("transfer-encoding", "").lower() == "chunked"
+    return framed and headers.get("connection", "").lower() != "close"
+
+
+async def _json_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, Any]]:
+    buf = b""
+    async for chunk in chunks:
+        buf += chunk
+        while b"\n" in buf:
+            line, buf = buf.split(b"\n", 1)
+            if line.strip():
+                yield json.loads(line)
+    if buf.strip():
+        yield json.loads(buf)
+
+
+class Engine:
+    """
+    Docker Engine API client for one event loop, with a bounded keep-alive connection pool.
+    """
+
+    def __init__(self, address: Tuple[str, Any], api_version: Optional[str] = None, limit: int = DEFAULT_CONCURRENCY):
+        self.address = address
+        self.api_version = api_version
+        self.limit = limit
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._version_lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def from_env(cls, limit: int = DEFAULT_CONCURRENCY) -> Optional["Engine"]:
+        """
+        Engine for DOCKER_HOST (default: the local unix socket), or None if it cannot be reached this way.
+        """
+        address = _address_from_env()
+        if address is None:
+            return None
+        version = os.environ.get("DOCKER_API_VERSION")
+        if not version or version == "auto":
+            version = load_api_version()
+        return cls(address, api_version=version, limit=limit)
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        if self.address[0] == "unix":
+            return await asyncio.open_unix_connection(self.address[1])
+        host, port = self.address[1]
+        return await asyncio.open_connection(host, port)
+
+    async def _ensure_version(self) -> str:
+        if self.api_version:
+            return self.api_version
+        if self._version_lock is None:
+            self._version_lock = asyncio.Lock()
+        async with self._version_lock:
+            if not self.api_version:
+                try:
+                    info = (await self._send("GET", "/version")).json() or {}
+                    self.api_version = info.get("ApiVersion") or MIN_API_VERSION
+                    save_api_version(info.get("ApiVersion"))
+                except (OSError, EngineError, ValueError):
+                    self.api_version = MIN_API_VERSION
+        return self.api_version
+
+    async def _exchange(
+        self, method: str, target: str, body: Optional[bytes], headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, Dict[str, str], AsyncIterator[bytes], Tuple[asyncio.StreamReader, asyncio.StreamWriter]]:
+        lines = [f"{method} {target} HTTP/1.1", "Host: docker", "User-Agent: devbox"]
+        if body is not None:
+            lines += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b"")
+        # An idle connection may have been closed by the daemon; retry once on a fresh one.
+        for attempt in range(2):
+            reused = bool(self._idle) and attempt == 0
+            conn = self._idle.pop() if reused else await self._connect()
+            try:
+                conn[1].write(request)
+                await conn[1].drain()
+                status, headers = await _read_head(conn[0])
+                return status, headers, _read_body(conn[0], status, headers), conn
+            except (ConnectionError, asyncio.IncompleteReadError):
+                conn[1].close()
+                if not reused:
+                    raise
+        raise ConnectionResetError("daemon closed the connection")
+
+    def _release(
+        self, conn: Tuple[asyncio.StreamReader, asyncio.StreamWriter], status: int, headers: Dict[str, str]
+    ) -> None:
+        if _reusable(status, headers) and len(self._idle) < self.limit:
+            self._idle.append(conn)
+        else:
+            conn[1].close()
+
+    async def _send(self, method: str, path: str, body: Optional[bytes] = None) -> Response:
+        STATS[f"{method} {path.split('?')[0]}"] += 1
+        status, headers, chunks, conn = await self._exchange(method, path, body)
+        data = b"".join([c async for c in chunks])
+        self._release(conn, status, headers)
+        return Response(status, headers, data)
+
+    def _target(self, path: str, params: Optional[Dict[str, Any]]) -> str:
+        query = {k: v for k, v in (params or {}).items() if v is not None}
+        return f"/v{self.api_version}{path}" + (f"?{urlencode(query)}" if query else "")
+
+    async def request(
+        self, method: str, path: str, params: Optional[Dict[str, Any]] = None, body: Any = None
+    ) -> Response:
+        """
+        Send one API request and return the response; raise EngineError for status >= 400.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+        await self._ensure_version()
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        async with self._slots:
+            STATS[f"{method} {path}"] += 1
+            with trace.span(f"{method} {path}", trace.API):
+                status, headers, chunks, conn = await self._exchange(method, self._target(path, params), payload)
+                data = b"".join([c async for c in chunks])
+            self._release(conn, status, headers)
+        if status >= 400:
+            try:
+                message = json.loads(data).get("message", "")
+            except ValueError:
+                message = data.decode("utf-8", "replace")
+            raise EngineError(status, message.strip())
+        return Response(status, headers, data)
+
+    async def stream(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Send a request whose response is a stream of JSON objects and yield them as they arrive.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+        await self._ensure_version()
+        async with self._slots:
+            STATS[f"{method} {path}"] += 1
+            status, headers, chunks, conn = await self._exchange(method, self._target(path, params), None, headers)
+            if status >= 400:
+                data = b"".join([c async for c in chunks])
+                self._release(conn, status, headers)
+                try:
+                    message = json.loads(data).get("message", "")
+                except ValueError:
+                    message = data.decode("utf-8", "replace")
+                raise EngineError(status, message.strip())
+            finished = False
+            try:
+                async for obj in _json_lines(chunks):
+                    yield obj
+                finished = True
+            finally:
+                # A stream abandoned half way leaves unread data on the connection.
+                if finished:
+                    self._release(conn, status, headers)
+                else:
+                    conn[1].close()
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    # Containers
+
+    async def list_containers(self, all: bool = False, filters: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+        params = {"all": "1" if all else None, "filters": json.dumps(filters) if filters else None}
+        return (await self.request("GET", "/containers/json", params)).json()
+
+    async def inspect_container(self, container_id: str) -> Dict[str, Any]:
+        return (await self.request("GET", f"/containers/{quote(container_id, safe='')}/json")).json()
+
+    async def create_container(self, config: Dict[str, Any], name: Optional[str] = None) -> str:
+        return (await self.request("POST", "/containers/create", {"name": name}, body=config)).json()["Id"]
+
+    async def start_container(self, container_id: str) -> None:
+        # 304: already running
+        await self.request("POST", f"/containers/{quote(container_id, safe='')}/start")
+
+    async def stop_container(self, container_id: str, timeout: Optional[int] = None) -> None:
+        # 304: already stopped
+        await self.request("POST", f"/containers/{quote(container_id, safe='')}/stop", {"t": timeout})
+
+    async def remove_container(self, container_id: str, force: bool = False, volumes: bool = False) -> None:
+        params = {"force": "1" if force else None, "v": "1" if volumes else None}
+        await self.request("DELETE", f"/containers/{quote(container_id, safe='')}", params)
+
+    # Images
+
+    async def inspect_image(self, ref: str) -> Optional[Dict[str, Any]]:
+        """
+        Image details, or None if the image is not present locally.
+        """
+        try:
+            return (await self.request("GET", f"/images/{quote(ref, safe='/:@')}/json")).json()
+        except EngineError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    async def pull_image(
+        self,
+        repo: str,
+        tag: Optional[str] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        auth: Optional[str] = None,
+    ) -> None:
+        """
+        Pull repo:tag (default tag "latest"), passing each progress message to on_progress.
+        auth is an encoded X-Registry-Auth value for private registries.
+        """
+        params = {"fromImage": repo, "tag": None if "@" in repo else (tag or "latest")}
+        headers = {"X-Registry-Auth": auth} if auth else None
+        async for message in self.stream("POST", "/images/create", params, headers):
+            if "error" in message:
+                raise EngineError(0, message.get("error", ""))
+            if on_progress is not None:
+                on_progress(message)
+
+    # System
+
+    async def events(
+        self, since: Optional[float] = None, until: Optional[float] = None, filters: Optional[Dict[str, List[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Events between since and until (epoch seconds). until is required so the stream ends.
+        """
+        params = {
+            "since": f"{since:.9f}" if since is not None else None,
+            "until": f"{until:.9f}" if until is not None else None,
+            "filters": json.dumps(filters) if filters else None,
+        }
+        return [e async for e in self.stream("GET", "/events", params)]
+
+    # Batches
+
+    async def inspect_containers(self, ids: List[str]) -> List[Any]:
+        """
+        Inspect containers concurrently. Each result is the inspect dict or the exception raised.
+        """
+        return await asyncio.gather(*(self.inspect_container(i) for i in ids), return_exceptions=True)
+
+    async def inspect_images(self, refs: List[str]) -> List[Any]:
+        return await asyncio.gather(*(self.inspect_image(r) for r in refs), return_exceptions=True)
+
+    async def stop_containers(self, ids: List[str], timeout: Optional[int] = None) -> List[Optional[BaseException]]:
+        """
+        Stop containers concurrently. Each result is None on success or the exception raised.
+        """
+        async def stop(container_id: str) -> None:
+            await self.stop_container(container_id, timeout)
+
+        return await asyncio.gather(*(stop(i) for i in ids), return_exceptions=True)
+
+
+def run(fn: Callable[[Engine], Awaitable[T]], engine: Optional[Engine] = None) -> T:
+    """
+    Run fn(engine) to completion on a fresh event loop and close the engine's connections.
+    """
+    engine = engine or Engine.from_env()
+    if engine is None:
+        raise EngineError(0, "DOCKER_HOST is not reachable through the asyncio engine")
+
+    async def main() -> T:
+        try:
+            return await fn(engine)
+        finally:
+            await engine.close()
+
+    return asyncio.run(main())
+
+
+def available() -> bool:
+    return _address_from_env() is not None
+
+
+def summary() -> Optional[str]:
+    """
+    Human readable report of engine API calls, or None if none were made.
+    """
+    if not STATS:
+        return None
+    lines = [f"Engine API calls: {sum(STATS.values())}"]
+    for endpoint, count in STATS.most_common():
+        lines.append(f"  {count:>4}  {endpoint}")
+    return "\n".join(lines)
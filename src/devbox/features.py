@@ -0,0 +1,320 @@
+"""
+Dev container features.
+
+`features` in devcontainer.json maps feature references to their options:
+
+    "features": {
+        "./features/tooling": {},
+        "ghcr.io/devcontainers/features/node:1": {"version": "20"}
+    }
+
+A reference starting with ./ or ../ is a folder relative to devcontainer.json.
+Any other reference is looked up in local feature registries: the folders
+listed in `customizations.devbox.featuresPath` and in $DEVBOX_FEATURES_PATH.
+The registry path is `<registry>/<reference without tag>/<tag>`, or the same
+path without the tag. Features are not downloaded from OCI registries.
+A feature folder holds devcontainer-feature.json and install.sh.
+
+Each feature is installed by its own image build on top of the previous one,
+in install order: overrideFeatureInstallOrder first, then declaration order
+adjusted for installsAfter. Layer i is tagged `devbox-features:<hash>`, where
+the hash chains the base image ID with the digests of features 1..i (files
+and options). Changing a feature therefore rebuilds it and the layers above
+it and reuses every layer below. The final layer is tagged
+`devbox_features_<project>` and containers run from it. The digest of the
+whole feature set is part of the run spec, so a changed set recreates the
+container.
+"""
+import io
+import os
+import json
+import shlex
+import hashlib
+import tarfile
+import time
+from typing import Any, Dict, List
+
+from devbox import trace
+from devbox.build import BuildFailed, BuildProgress, stream_build
+
+LAYER_REPO = "devbox-features"
+FEATURE_HASH_LABEL = "devbox.feature_hash"
+FEATURE_LABEL = "devbox.feature"
+METADATA_FILE = "devcontainer-feature.json"
+INSTALL_SCRIPT = "install.sh"
+INSTALL_DIR = "/tmp/devbox-feature"
+
+
+class FeatureError(Exception):
+    """
+    Raised when a feature cannot be resolved or installed.
+    """
+
+
+def registry_dirs(options: Dict[str, Any], base_dir: str) -> List[str]:
+    configured = options.get("featuresPath") or []
+    if isinstance(configured, str):
+        configured = [configured]
+    dirs = [os.path.normpath(os.path.join(base_dir, os.path.expanduser(d))) for d in configured if isinstance(d, str)]
+    dirs.extend(d for d in os.environ.get("DEVBOX_FEATURES_PATH", "").split(os.pathsep) if d)
+    return dirs
+
+
+def locate(ref: str, base_dir: str, registries: List[str]) -> str:
+    """
+    Folder of a feature reference; raises FeatureError if no local copy exists.
+    """
+    if ref.startswith(("./", "../")):
+        path = os.path.normpath(os.path.join(base_dir, ref))
+        if os.path.isdir(path):
+            return path
+        raise FeatureError(f"Feature {ref} not found at {path}")
+    from devbox.pull import split_ref
+
+    name, tag = split_ref(ref.split("@", 1)[0])
+    for registry in registries:
+        candidates = [os.path.join(registry, name, tag)] if tag else []
+        candidates.append(os.path.join(registry, name))
+        for path in candidates:
+            if os.path.isfile(os.path.join(path, METADATA_FILE)):
+                return path
+    searched = ", ".join(registries) or "no featuresPath or DEVBOX_FEATURES_PATH configured"
+    raise FeatureError(f"Feature {ref} not found in local feature registries ({searched})")
+
+
+def _files(folder: str) -> List[str]:
+    found = []
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames.sort()
+        found.extend(os.path.relpath(os.path.join(dirpath, f), folder) for f in sorted(filenames))
+    return found
+
+
+def env_name(option: str) -> str:
+    """
+    Environment variable an option is passed to install.sh as (the spec's option name mangling).
+    """
+    name = "".join(c if c.isalnum() or c == "_" else "_" for c in option).upper()
+    return "_" + name if name[:1].isdigit() else name
+
+
+def load(ref: str, value: Any, base_dir: str, registries: List[str]) -> Dict[str, Any]:
+    """
+    Resolve one feature: its folder, metadata, effective options and content digest.
+    """
+    path = locate(ref, base_dir, registries)
+    try:
+        with open(os.path.join(path, METADATA_FILE), "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError) as e:
+        raise FeatureError(f"Feature {ref}: cannot read {METADATA_FILE}: {e}")
+    if not os.path.isfile(os.path.join(path, INSTALL_SCRIPT)):
+        raise FeatureError(f"Feature {ref}: {INSTALL_SCRIPT} missing in {path}")
+
+    if isinstance(value, str):
+        value = {"version": value}
+    elif not isinstance(value, dict):
+        value = {}
+    options = {k: spec.get("default") for k, spec in (meta.get("options") or {}).items() if isinstance(spec, dict)}
+    options.update(value)
+
+    h = hashlib.sha256(json.dumps([ref, options], sort_keys=True).encode("utf-8"))
+    for rel in _files(path):
+        with open(os.path.join(path, rel), "rb") as f:
+            h.update(b"\0" + rel.encode("utf-8") + b"\0" + hashlib.sha256(f.read()).digest())
+    return {
+        "ref": ref,
+        "id": meta.get("id") or os.path.basename(path),
+        "path": path,
+        "options": options,
+        "container_env": meta.get("containerEnv") or {},
+        "installs_after": meta.get("installsAfter") or [],
+        "digest": h.hexdigest(),
+    }
+
+
+def _ref_name(ref: str) -> str:
+    from devbox.pull import split_ref
+
+    return split_ref(ref.split("@", 1)[0])[0]
+
+
+def order(features: List[Dict[str, Any]], override: List[str]) -> List[Dict[str, Any]]:
+    """
+    Install order: overrideFeatureInstallOrder entries first, the rest in declaration
+    order except that a feature waits for the ones named in its installsAfter.
+    """
+    def names(f: Dict[str, Any]) -> set:
+        return {f["ref"], _ref_name(f["ref"]), f["id"]}
+
+    forced = []
+    for wanted in override:
+        for f in features:
+            if f not in forced and {wanted, _ref_name(wanted)} & names(f):
+                forced.append(f)
+    remaining = [f for f in features if f not in forced]
+    ordered = list(forced)
+    while remaining:
+        for f in remaining:
+            waits = {_ref_name(a) for a in f["installs_after"]} | set(f["installs_after"])
+            if not any(waits & names(other) for other in remaining if other is not f):
+                break
+        else:
+            f = remaining[0]  # a cycle: fall back to declaration order
+        ordered.append(f)
+        remaining.remove(f)
+    return ordered
+
+
+def resolve(devcjson: Dict[str, Any], base_dir: str) -> List[Dict[str, Any]]:
+    """
+    Features of a devcontainer.json in install order. Raises FeatureError.
+    """
+    from devbox.devcontainer import devbox_options
+
+    raw = devcjson.get("features")
+    if not raw:
+        return []
+    if not isinstance(raw, dict):
+        raise FeatureError("'features' must be an object mapping feature references to options")
+    registries = registry_dirs(devbox_options(devcjson), base_dir)
+    loaded = [load(ref, value, base_dir, registries) for ref, value in raw.items()]
+    override = devcjson.get("overrideFeatureInstallOrder") or []
+    return order(loaded, [o for o in override if isinstance(o, str)])
+
+
+def digest(features: List[Dict[str, Any]]) -> str:
+    """
+    Digest of a resolved feature set, independent of the base image (part of the run spec).
+    """
+    return hashlib.sha256("".join(f["digest"] for f in features).encode("ascii")).hexdigest()
+
+
+def image_name(project: str) -> str:
+    """
+    Image containers of a project with features run from.
+    """
+    return f"devbox_features_{project}"
+
+
+def _chain(parent_hash: str, feature: Dict[str, Any]) -> str:
+    return hashlib.sha256(f"{parent_hash}\0{feature['digest']}".encode("ascii")).hexdigest()
+
+
+def layer_ref(layer_hash: str) -> str:
+    return f"{LAYER_REPO}:{layer_hash[:32]}"
+
+
+def _dockerfile(parent: str, feature: Dict[str, Any], user: str) -> str:
+    lines = [
+        f"FROM {parent}",
+        "USER root",
+        f"COPY feature/ {INSTALL_DIR}/",
+        f"RUN cd {INSTALL_DIR} && chmod +x {INSTALL_SCRIPT} && set -a && . ./devbox-feature.env && set +a"
+        f" && ./{INSTALL_SCRIPT} && rm -rf {INSTALL_DIR}",
+    ]
+    for key, value in feature["container_env"].items():
+        lines.append(f"ENV {key}={json.dumps(str(value))}")
+    lines.append(f"USER {user or 'root'}")
+    return "\n".join(lines) + "\n"
+
+
+def build_context(parent: str, feature: Dict[str, Any], user: str) -> io.BytesIO:
+    """
+    In-memory build context for one feature layer: the feature folder, its option env file and a Dockerfile.
+    """
+    buf = io.BytesIO()
+
+    def add_bytes(name: str, data: bytes, mode: int = 0o644) -> None:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mode = mode
+        tar.addfile(info, io.BytesIO(data))
+
+    with tarfile.open(fileobj=buf, mode="w") as tar:
+        for rel in _files(feature["path"]):
+            tar.add(os.path.join(feature["path"], rel), arcname=f"feature/{rel}")
+        env = "".join(f"{env_name(k)}={shlex.quote(str(v))}\n" for k, v in feature["options"].items() if v is not None)
+        add_bytes("feature/devbox-feature.env", env.encode("utf-8"))
+        add_bytes("Dockerfile", _dockerfile(parent, feature, user).encode("utf-8"))
+    buf.seek(0)
+    return buf
+
+
+def _is_built(client: Any, ref: str, layer_hash: str) -> bool:
+    try:
+        image = client.images.get(ref)
+    except Exception:
+        return False
+    return (getattr(image, "labels", None) or {}).get(FEATURE_HASH_LABEL) == layer_hash
+
+
+def plan(client: Any, base_id: str, features: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    One entry per feature layer with its chained hash, tag and whether it is already built.
+    """
+    steps = []
+    parent_hash = base_id
+    for feature in features:
+        layer_hash = _chain(parent_hash, feature)
+        ref = layer_ref(layer_hash)
+        steps.append({"feature": feature, "hash": layer_hash, "ref": ref, "hit": _is_built(client, ref, layer_hash)})
+        parent_hash = layer_hash
+    return steps
+
+
+def print_plan(base: str, steps: List[Dict[str, Any]]) -> None:
+    print(f"Feature layers on {base}:")
+    width = max(len(s["feature"]["ref"]) for s in steps)
+    for i, step in enumerate(steps, 1):
+        print(f"  {i}. {step['feature']['ref']:<{width}}  {'HIT  ' if step['hit'] else 'BUILD'}  {step['ref']}")
+
+
+@trace.traced("apply features")
+def apply(client: Any, base: str, features: List[Dict[str, Any]], target: str) -> bool:
+    """
+    Build the missing feature layers on top of base and tag the top layer as target. Returns True on success.
+    """
+    try:
+        info = client.api.inspect_image(base)
+    except Exception as e:
+        print(f"Base image {base} not available for features: {e}")
+        return False
+    user = (info.get("Config") or {}).get("User") or ""
+    steps = plan(client, info["Id"], features)
+    print_plan(base, steps)
+
+    started = time.monotonic()
+    parent = base
+    built = 0
+    for step in steps:
+        if not step["hit"]:
+            feature = step["feature"]
+            print(f"Installing feature {feature['ref']}...")
+            with trace.span("build feature layer", feature=feature["ref"]):
+                try:
+                    progress = stream_build(
+                        client.api,
+                        BuildProgress(out=lambda line: None),
+                        fileobj=build_context(parent, feature, user),
+                        custom_context=True,
+                        tag=step["ref"],
+                        labels={FEATURE_HASH_LABEL: step["hash"], FEATURE_LABEL: feature["ref"]},
+                    )
+                except Exception as e:
+                    print(f"Feature {feature['ref']} failed: {e}")
+                    if isinstance(e, BuildFailed):
+                        for line in e.log_tail[-20:]:
+                            print(f"  {line}")
+                    return False
+            print(f"  installed in {progress.total_seconds:.1f}s")
+            built += 1
+        parent = step["ref"]
+
+    from devbox.pull import split_ref
+
+    repo, tag = split_ref(target)
+    client.api.tag(parent, repo, tag or "latest")
+    hits = len(steps) - built
+    print(f"Features: {hits} layer(s) cached, {built} built in {time.monotonic() - started:.1f}s; image {target}")
+    return True
@@ -0,0 +1,235 @@
+"""
+devcontainer lifecycle hooks.
+
+After start has a container, the hooks of devcontainer.json run inside it in
+spec order: onCreateCommand, updateContentCommand, postCreateCommand, then
+postStartCommand. A command is a string (run by /bin/sh -c), an argv list, or
+an object of named commands that run in parallel. A failing hook stops the
+ones after it.
+
+Each hook's result is cached by a hash of its command, the contents of the
+input files declared for it in `customizations.devbox.hookInputs` (lockfiles
+and the like, relative to the project folder), and for postStartCommand the
+container's start time. After a hook succeeds its hash is written to
+/var/lib/devbox/hooks/<hook> inside the container, so the record lives with
+the container and is carried into snapshots. A hook runs only when its hash
+differs from the recorded one.
+
+The hashes are also remembered on the host per container ID, so starting an
+up-to-date container runs no exec at all. The in-container record is only
+read on a host miss, e.g. for a container created from a snapshot.
+"""
+import os
+import glob
+import json
+import shlex
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from devbox import trace
+from devbox.utils import get_cache_dir, hash_file
+
+HOOKS = ("onCreateCommand", "updateContentCommand", "postCreateCommand", "postStartCommand")
+STATE_DIR = "/var/lib/devbox/hooks"
+HOOK_CACHE = "hooks.json"
+# Containers remembered in the host-side cache.
+HOOK_CACHE_SIZE = 200
+
+_print_lock = threading.Lock()
+
+
+def commands(devcjson: Dict[str, Any]) -> List[Tuple[str, Dict[str, List[str]]]]:
+    """
+    Configured hooks in run order as (hook, {entry name: argv}); the single-command forms use the name "".
+    """
+    result = []
+    for hook in HOOKS:
+        raw = devcjson.get(hook)
+        if not raw:
+            continue
+        entries = raw if isinstance(raw, dict) else {"": raw}
+        argvs: Dict[str, List[str]] = {}
+        for name, command in entries.items():
+            if isinstance(command, str) and command.strip():
+                argvs[name] = ["/bin/sh", "-c", command]
+            elif isinstance(command, list) and command and all(isinstance(a, str) for a in command):
+                argvs[name] = list(command)
+            else:
+                print(f"Ignoring invalid {hook} entry {name or ''}: {command!r}")
+        if argvs:
+            result.append((hook, argvs))
+    return result
+
+
+def inputs(options: Dict[str, Any], hook: str) -> List[str]:
+    """
+    Input file patterns declared for a hook: hookInputs is a list for every hook or {hook: [patterns]}.
+    """
+    raw = options.get("hookInputs")
+    if isinstance(raw, dict):
+        raw = raw.get(hook)
+    if isinstance(raw, str):
+        raw = [raw]
+    return [p for p in raw or [] if isinstance(p, str)]
+
+
+def hook_hash(hook: str, argvs: Dict[str, List[str]], patterns: List[str], project_dir: str, started_at: str = "") -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps([hook, argvs, started_at], sort_keys=True).encode("utf-8"))
+    for pattern in patterns:
+        matches = sorted(glob.glob(os.path.join(project_dir, pattern), recursive=True))
+        h.update(f"\0{pattern}\0".encode("utf-8"))
+        for path in matches:
+            if os.path.isfile(path):
+                h.update(os.path.relpath(path, project_dir).encode("utf-8") + b"\0" + hash_file(path).encode("ascii"))
+    return h.hexdigest()
+
+
+def _cache_path() -> str:
+    return os.path.join(get_cache_dir(), HOOK_CACHE)
+
+
+def _load_cache() -> Dict[str, Dict[str, str]]:
+    try:
+        with open(_cache_path(), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _remember(container_id: str, state: Dict[str, str]) -> None:
+    cache = _load_cache()
+    cache.pop(container_id, None)
+    cache[container_id] = state
+    while len(cache) > HOOK_CACHE_SIZE:
+        cache.pop(next(iter(cache)))
+    try:
+        with open(_cache_path(), "w") as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+
+
+def _exec(api: Any, container_id: str, argv: List[str], workdir: Optional[str] = None, prefix: Optional[str] = None) -> Tuple[int, bytes]:
+    """
+    Run argv in the container; stream its output with prefix on each line (or collect it). Returns (exit code, output).
+    """
+    exec_id = api.exec_create(container_id, argv, workdir=workdir)["Id"]
+    collected = b""
+    pending = b""
+    for chunk in api.exec_start(exec_id, stream=True):
+        if prefix is None:
+            collected += chunk
+            continue
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        with _print_lock:
+            for line in lines:
+                print(f"{prefix} {line.decode('utf-8', 'replace').rstrip()}")
+    if pending and prefix is not None:
+        with _print_lock:
+            print(f"{prefix} {pending.decode('utf-8', 'replace').rstrip()}")
+    return int(api.exec_inspect(exec_id).get("ExitCode") or 0), collected
+
+
+def recorded(api: Any, container_id: str) -> Dict[str, str]:
+    """
+    Hook hashes recorded inside the container.
+    """
+    script = f'for f in {STATE_DIR}/*; do [ -f "$f" ] && echo "${{f##*/}} $(cat "$f")"; done; true'
+    try:
+        code, output = _exec(api, container_id, ["/bin/sh", "-c", script])
+    except Exception:
+        return {}
+    state = {}
+    for line in output.decode("utf-8", "replace").splitlines():
+        hook, _, value = line.partition(" ")
+        if hook in HOOKS and value:
+            state[hook] = value.strip()
+    return state
+
+
+def _record(api: Any, container_id: str, hook: str, value: str) -> None:
+    script = f"mkdir -p {STATE_DIR} && printf %s {shlex.quote(value)} > {STATE_DIR}/{hook}"
+    try:
+        code, _ = _exec(api, container_id, ["/bin/sh", "-c", script])
+    except Exception:
+        code = 1
+    if code != 0:
+        print(f"Could not record {hook} in the container; it will run again in a new container.")
+
+
+def run_hook(api: Any, container_id: str, hook: str, argvs: Dict[str, List[str]], workdir: Optional[str]) -> bool:
+    """
+    Run one hook; the entries of the object form run in parallel. Returns True if every entry succeeded.
+    """
+    def run_entry(name: str) -> bool:
+        label = f"{hook}:{name}" if name else hook
+        try:
+            code, _ = _exec(api, container_id, argvs[name], workdir=workdir, prefix=f"[{label}]")
+        except Exception as e:
+            print(f"[{label}] failed to run: {e}")
+            return False
+        if code != 0:
+            print(f"[{label}] exited with code {code}")
+        return code == 0
+
+    with ThreadPoolExecutor(max_workers=max(1, len(argvs))) as pool:
+        return all(list(pool.map(run_entry, argvs)))
+
+
+def run_lifecycle(
+    client: Any,
+    container: Any,
+    devcjson: Dict[str, Any],
+    project_dir: str,
+    workspace_folder: Optional[str] = None,
+) -> bool:
+    """
+    Run the hooks whose hash changed since they last succeeded in this container. Returns False if one failed.
+    """
+    from devbox.devcontainer import devbox_options
+
+    configured = commands(devcjson)
+    if not configured:
+        return True
+    options = devbox_options(devcjson)
+    started_at = ""
+    if any(hook == "postStartCommand" for hook, _ in configured):
+        try:
+            container.reload()
+            started_at = (container.attrs.get("State") or {}).get("StartedAt") or ""
+        except Exception:
+            pass
+    wanted = {
+        hook: hook_hash(hook, argvs, inputs(options, hook), project_dir, started_at if hook == "postStartCommand" else "")
+        for hook, argvs in configured
+    }
+
+    state = _load_cache().get(container.id) or {}
+    if all(state.get(hook) == value for hook, value in wanted.items()):
+        print("Lifecycle hooks are up to date.")
+        return True
+    with trace.span("read hook state"):
+        state = dict(state, **recorded(client.api, container.id))
+
+    ok = True
+    for hook, argvs in configured:
+        if state.get(hook) == wanted[hook]:
+            print(f"{hook}: up to date")
+            continue
+        print(f"Running {hook}...")
+        started = time.monotonic()
+        with trace.span(f"hook {hook}"):
+            ok = run_hook(client.api, container.id, hook, argvs, workspace_folder)
+        if not ok:
+            print(f"{hook} failed after {time.monotonic() - started:.1f}s; skipping the remaining hooks.")
+            break
+        print(f"{hook} finished in {time.monotonic() - started:.1f}s")
+        _record(client.api, container.id, hook, wanted[hook])
+        state[hook] = wanted[hook]
+    _remember(container.id, {k: v for k, v in state.items() if wanted.get(k) == v})
+    return ok
@@ -0,0 +1,28 @@
+"""
+Container labels and project identity.
+
+Every container devbox creates carries these labels, so lookups can use a
+server-side label filter. They live apart from devcontainer.py so commands
+that only read state (`devbox list`, `devbox status`) do not import the
+docker SDK.
+"""
+import os
+import hashlib
+from typing import Optional
+
+MANAGED_LABEL = "devbox.managed"
+PROJECT_LABEL = "devbox.project"
+IMAGE_LABEL = "devbox.image"
+SPEC_HASH_LABEL = "devbox.spec_hash"
+# Canonical run spec JSON, used to explain drift when the spec hash differs.
+SPEC_LABEL = "devbox.spec"
+
+
+def project_hash(path: Optional[str] = None, variant: Optional[str] = None) -> str:
+    """
+    Return a short stable hash identifying a project by its absolute path (defaults to cwd)
+    and, for `.devcontainer/<variant>/` configs, the variant name.
+    """
+    path = os.path.abspath(path or os.getcwd())
+    key = path if not variant else f"{path}\0{variant}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
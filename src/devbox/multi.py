@@ -0,0 +1,262 @@
+"""
+Parallel startup of every devcontainer config under a root (`devbox start --all`).
+
+All configs are planned up front so shared work happens once: base images
+referenced by several Dockerfiles (or `image` entries) are fetched once, and
+configs with identical build inputs are built once and tagged for the others.
+Builds and container starts then run on a bounded thread pool that shares the
+invocation's Docker session.
+"""
+import os
+import re
+import time
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from devbox import buildcache, cachevolumes, devcontainer as dc, features, hooks, pool as warm_pool, pull, resources, sync, trace
+from devbox.build import BuildFailed
+from devbox.utils import DEFAULT_JOBS, find_all_devcontainer_configs
+
+_FROM_RE = re.compile(r"^\s*FROM\s+(?:--\S+\s+)*(\S+)(?:\s+AS\s+(\S+))?", re.IGNORECASE)
+
+
+def base_images(dockerfile_path: str) -> List[str]:
+    """
+    Return the external images a Dockerfile builds FROM, skipping scratch,
+    earlier build stages and references that depend on build args.
+    """
+    stages = set()
+    refs: List[str] = []
+    try:
+        with open(dockerfile_path, "r") as f:
+            lines = f.readlines()
+    except OSError:
+        return refs
+    for line in lines:
+        m = _FROM_RE.match(line)
+        if not m:
+            continue
+        ref, alias = m.group(1), m.group(2)
+        if ref.lower() != "scratch" and "$" not in ref and ref not in stages and ref not in refs:
+            refs.append(ref)
+        if alias:
+            stages.add(alias)
+    return refs
+
+
+@functools.lru_cache(maxsize=1)
+def _host_info() -> Dict[str, Any]:
+    # Shared by every config that auto-sizes its resources: one info call per run.
+    return dc.get_session().client.info()
+
+
+@trace.traced("plan config")
+def plan_config(config_path: str, root: str) -> Dict[str, Any]:
+    """
+    Load one devcontainer.json and resolve everything needed to build and start it.
+    """
+    devcontainer_dir = os.path.dirname(os.path.abspath(config_path))
+    if os.path.basename(devcontainer_dir) == ".devcontainer":
+        project_dir, variant = os.path.dirname(devcontainer_dir), None
+    else:
+        # .devcontainer/<variant>/devcontainer.json
+        project_dir, variant = os.path.dirname(os.path.dirname(devcontainer_dir)), os.path.basename(devcontainer_dir)
+
+    # Shares `devbox start`'s config cache entry; a miss only costs a re-parse.
+    config = dc.load_config_file(os.path.abspath(config_path), project_dir, variant)
+    devcjson = config["devcjson"]
+    build_config = devcjson.get("build")
+    image_name = config["image_name"]
+    mounts = dc.parsed_mounts(config)
+    project = dc.project_hash(project_dir, variant)
+    options = dc.devbox_options(devcjson)
+    sync_workspace = sync.workspace_mode(options) == "volume"
+    if sync_workspace:
+        ws = sync.workspace_volume_mount(project, config["workspace_folder"])
+    else:
+        ws = dc.workspace_mount(devcjson, project_dir)
+    if ws is not None:
+        mounts.append(ws)
+
+    plan: Dict[str, Any] = {
+        "label": os.path.relpath(config_path, root),
+        "project": project,
+        "project_dir": project_dir,
+        "mounts": mounts,
+        "image_name": image_name,
+        "context": None,
+        "build_hash": None,
+        "build_secs": 0.0,
+        "start_secs": 0.0,
+        "status": None,
+        "pool": warm_pool.pool_config(options),
+        "cache": cachevolumes.cache_config(options),
+        "sync": sync_workspace,
+        "devcjson": devcjson,
+    }
+    plan["resources"] = resources.resolve(devcjson, _host_info)
+    try:
+        plan["features"] = features.resolve(devcjson, devcontainer_dir)
+    except features.FeatureError as e:
+        plan["features"] = []
+        plan["status"] = f"skipped: {e}"
+    if build_config:
+        context = dc.make_build_context(devcontainer_dir, build_config.get("dockerfile"), build_config)
+        plan["context"] = context
+        plan["build_hash"] = dc.context_build_hash(context, build_config)
+        plan["build_cache"] = buildcache.cache_config(build_config, devcontainer_dir)
+    elif not plan["image_name"]:
+        plan["status"] = "skipped: neither 'build' nor 'image'"
+    return plan
+
+
+@trace.traced("prefetch base images")
+def _prefetch(plans: List[Dict[str, Any]], session: Any, jobs: int) -> None:
+    refs: List[str] = []
+    for plan in plans:
+        if plan["status"]:
+            continue
+        wanted = base_images(plan["context"].dockerfile_path) if plan["context"] else [plan["image_name"]]
+        refs.extend(r for r in wanted if r not in refs)
+
+    if not refs:
+        return
+    print(f"Resolving {len(refs)} distinct base image(s)")
+    pull.pull_all(refs, only_missing=True, jobs=jobs, session=session)
+
+
+@trace.traced("build images")
+def _build_all(plans: List[Dict[str, Any]], session: Any, pool: ThreadPoolExecutor, rebuild: bool) -> None:
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for plan in plans:
+        if plan["build_hash"] and not plan["status"]:
+            groups.setdefault(plan["build_hash"], []).append(plan)
+
+    def build_group(group: List[Dict[str, Any]]) -> None:
+        primary = group[0]
+        started = time.monotonic()
+        try:
+            dc.build_image(
+                primary["context"],
+                primary["image_name"],
+                primary["build_hash"],
+                rebuild=rebuild,
+                session=session,
+                cache=primary.get("build_cache"),
+            )
+            for other in group[1:]:
+                if other["image_name"] == primary["image_name"]:
+                    continue
+                if rebuild or not dc.image_is_current(session.client, other["image_name"], other["build_hash"]):
+                    repo, tag = pull.split_ref(other["image_name"])
+                    session.client.api.tag(primary["image_name"], repo, tag)
+                    print(f"Tagged {primary['image_name']} as {other['image_name']} (identical build inputs)")
+        except BuildFailed as e:
+            dc.print_build_failure(primary["image_name"], e)
+            for plan in group:
+                plan["status"] = "build failed"
+        except Exception as e:
+            print(f"Failed to build image {primary['image_name']}: {e}")
+            for plan in group:
+                plan["status"] = "build failed"
+        elapsed = time.monotonic() - started
+        for plan in group:
+            plan["build_secs"] = elapsed
+
+    if groups:
+        duplicates = sum(len(g) - 1 for g in groups.values())
+        print(f"Building {len(groups)} image(s) ({duplicates} duplicate build(s) shared)")
+        list(pool.map(build_group, groups.values()))
+
+
+def _start_one(plan: Dict[str, Any], session: Any, recreate: bool = False) -> None:
+    """
+    Start one planned config; failures are recorded in its status so the other configs carry on.
+    """
+    started = time.monotonic()
+    try:
+        container = _start_container(plan, session, recreate)
+    except Exception as e:
+        print(f"Failed to start {plan['label']}: {e}")
+        plan["status"] = f"start failed: {e}"
+    else:
+        plan["status"] = f"running {container.name}" if container is not None else "start failed"
+    plan["start_secs"] = time.monotonic() - started
+
+
+def _start_container(plan: Dict[str, Any], session: Any, recreate: bool) -> Any:
+    if plan["cache"]:
+        cachevolumes.ensure(session.client, plan["cache"], plan["image_name"])
+    run_image = dc.apply_features(plan["image_name"], plan["features"], project=plan["project"], session=session)
+    container = None
+    if run_image is not None:
+        container = dc.start_dev_container(
+            run_image,
+            dc.generate_random_name(),
+            plan["mounts"],
+            session=session,
+            project=plan["project"],
+            pool=plan["pool"],
+            spec=dc.devcontainer_spec(plan["devcjson"], run_image, plan["mounts"], plan["features"], plan["resources"]),
+            recreate=recreate,
+        )
+    if container is not None:
+        workspace_folder = plan["devcjson"].get("workspaceFolder", "/workspace")
+        if plan["sync"]:
+            dc.start_workspace_sync(container, workspace_folder, dc.devbox_options(plan["devcjson"]), root=plan["project_dir"])
+        hooks.run_lifecycle(session.client, container, plan["devcjson"], plan["project_dir"], workspace_folder)
+    return container
+
+
+def print_report(plans: List[Dict[str, Any]], wall_secs: float) -> None:
+    """
+    Print per-config build/start timings and the aggregate wall time.
+    """
+    width = max([len("Config")] + [len(p["label"]) for p in plans])
+    print(f"{'Config':<{width}}  {'Build':>8}  {'Start':>8}  Result")
+    sequential = 0.0
+    for plan in plans:
+        sequential += plan["build_secs"] + plan["start_secs"]
+        print(f"{plan['label']:<{width}}  {plan['build_secs']:7.1f}s  {plan['start_secs']:7.1f}s  {plan['status']}")
+    print(f"Total: {len(plans)} config(s) in {wall_secs:.1f}s wall time ({sequential:.1f}s of build/start work)")
+
+
+def start_all(root: Optional[str] = None, jobs: int = DEFAULT_JOBS, rebuild: bool = False, recreate: bool = False) -> None:
+    """
+    Find every devcontainer config under root (default: cwd), then build and start them concurrently.
+
+    recreate replaces running containers whose spec has changed (see start_dev_container).
+    """
+    if dc.docker is None:
+        print("docker SDK not available; cannot start containers.")
+        return
+
+    root = os.path.abspath(root or os.getcwd())
+    configs = find_all_devcontainer_configs(root)
+    if not configs:
+        print(f"No devcontainer.json found under {root}.")
+        return
+    print(f"Found {len(configs)} devcontainer config(s) under {root}")
+
+    started = time.monotonic()
+    plans = []
+    for config_path in configs:
+        try:
+            plans.append(plan_config(config_path, root))
+        except Exception as e:
+            print(f"Skipping {config_path}: {e}")
+
+    try:
+        session = dc.get_session()
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            _prefetch(plans, session, jobs)
+            _build_all(plans, session, pool, rebuild)
+            with trace.span("start containers"):
+                list(pool.map(lambda p: _start_one(p, session, recreate), [p for p in plans if not p["status"]]))
+    except Exception as e:
+        print(f"An error occurred while starting containers: {e}")
+    finally:
+        for plan in plans:
+            plan["status"] = plan["status"] or "not started"
+        print_report(plans, time.monotonic() - started)
@@ -0,0 +1,167 @@
+"""
+Warm container pool.
+
+For projects that opt in with `customizations.devbox.warmPool` in
+devcontainer.json, devbox keeps a few containers pre-created for the
+project's run spec. Pooled containers are named `devbox_pool_<random>` and
+carry the usual devbox labels plus the ID of the image they were created
+from. In "paused" mode they are started (so the entrypoint has already run)
+and then paused; in "stopped" mode they are only created.
+
+`devbox start` claims a pooled container by unpausing (or starting) it and
+renaming it to the requested name, which is much faster than creating one.
+Mounts are fixed at creation, so only containers whose spec hash matches the
+requested spec are claimable; members with a different spec hash or built
+from an older image are evicted. After a claim the pool is refilled by a
+detached background process (`python -m devbox.pool`).
+"""
+import os
+import sys
+import json
+import random
+import string
+import subprocess
+from typing import Any, Dict, List, Optional
+
+from devbox.labels import MANAGED_LABEL, PROJECT_LABEL, SPEC_HASH_LABEL
+
+POOL_PREFIX = "devbox_pool_"
+POOL_LABEL = "devbox.pool"
+IMAGE_ID_LABEL = "devbox.image_id"
+POOL_MODES = ("paused", "stopped")
+
+
+def pool_config(options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize the warmPool option: an int size or {"size": N, "mode": "paused"|"stopped"}.
+    """
+    raw = options.get("warmPool")
+    if isinstance(raw, bool) or raw is None:
+        raw = {"size": 1 if raw else 0}
+    elif isinstance(raw, int):
+        raw = {"size": raw}
+    elif not isinstance(raw, dict):
+        print(f"Ignoring invalid warmPool setting: {raw!r}")
+        raw = {}
+    mode = raw.get("mode", "paused")
+    if mode not in POOL_MODES:
+        print(f"Unknown warmPool mode '{mode}'; using 'paused'.")
+        mode = "paused"
+    return {"size": max(0, int(raw.get("size", 0) or 0)), "mode": mode}
+
+
+def _pool_name() -> str:
+    return POOL_PREFIX + "".join(random.choices(string.ascii_lowercase + string.digits, k=10))
+
+
+def is_pooled(container: Any) -> bool:
+    name = getattr(container, "name", None)
+    return isinstance(name, str) and name.startswith(POOL_PREFIX)
+
+
+def image_id(client: Any, image_name: str) -> Optional[str]:
+    try:
+        return client.images.get(image_name).id
+    except Exception:
+        return None
+
+
+def members(client: Any, labels: Dict[str, str]) -> List[Any]:
+    """
+    Pooled (unclaimed) containers of a project.
+    """
+    filters = {
+        "label": [f"{MANAGED_LABEL}=true", f"{PROJECT_LABEL}={labels[PROJECT_LABEL]}", f"{POOL_LABEL}=true"],
+        "name": POOL_PREFIX,
+    }
+    return [c for c in client.containers.list(all=True, filters=filters) if is_pooled(c)]
+
+
+def _fresh(client: Any, labels: Dict[str, str], current_image_id: Optional[str]) -> List[Any]:
+    """
+    Return claimable pool members, evicting those with another spec hash or an older image.
+    """
+    fresh = []
+    for c in members(client, labels):
+        c_labels = getattr(c, "labels", None) or {}
+        if c_labels.get(SPEC_HASH_LABEL) == labels[SPEC_HASH_LABEL] and c_labels.get(IMAGE_ID_LABEL) == current_image_id:
+            fresh.append(c)
+            continue
+        try:
+            c.remove(force=True)
+            print(f"Evicted stale pooled container {c.name}")
+        except Exception as e:
+            print(f"Failed to evict pooled container {c.name}: {e}")
+    return fresh
+
+
+def claim(client: Any, labels: Dict[str, str], current_image_id: Optional[str], name: str) -> Optional[Any]:
+    """
+    Claim a warm container matching labels' spec hash, rename it to name and make sure it runs.
+    """
+    for c in _fresh(client, labels, current_image_id):
+        try:
+            if c.status == "paused":
+                c.unpause()
+            elif c.status != "running":
+                c.start()
+            c.rename(name)
+            c.reload()
+            return c
+        except Exception as e:
+            print(f"Could not claim pooled container {c.name}: {e}")
+    return None
+
+
+def fill(client: Any, run_kwargs: Dict[str, Any], current_image_id: Optional[str], config: Dict[str, Any]) -> int:
+    """
+    Create pooled containers until config["size"] fresh members exist. Returns the number created.
+    """
+    labels = run_kwargs["labels"]
+    missing = config["size"] - len(_fresh(client, labels, current_image_id))
+    created = 0
+    for _ in range(max(0, missing)):
+        kwargs = {k: v for k, v in run_kwargs.items() if k != "detach"}
+        kwargs["name"] = _pool_name()
+        kwargs["labels"] = dict(labels, **{POOL_LABEL: "true", IMAGE_ID_LABEL: current_image_id or ""})
+        try:
+            c = client.containers.create(**kwargs)
+            if config["mode"] == "paused":
+                c.start()
+                c.pause()
+            created += 1
+        except Exception as e:
+            print(f"Failed to create pooled container: {e}")
+            break
+    return created
+
+
+def refill_in_background(run_kwargs: Dict[str, Any], current_image_id: Optional[str], config: Dict[str, Any]) -> None:
+    """
+    Top the pool up from a detached process so the current command can return immediately.
+    """
+    payload = json.dumps({"run_kwargs": run_kwargs, "image_id": current_image_id, "config": config}, default=dict)
+    try:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "devbox.pool"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p)),
+        )
+        proc.stdin.write(payload.encode("utf-8"))
+        proc.stdin.close()
+    except Exception as e:
+        print(f"Failed to start warm pool refill: {e}")
+
+
+def main() -> None:
+    from devbox.devcontainer import get_session
+
+    request = json.loads(sys.stdin.read())
+    fill(get_session().client, request["run_kwargs"], request["image_id"], request["config"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Image pulls with per-layer progress.
+
+start pulls an `image` that is missing locally instead of failing, and
+`devbox pull` / `devbox prefetch` fetch every image referenced by one or many
+devcontainer configs (the `image` field and the FROM lines of Dockerfiles).
+References are de-duplicated and pulled concurrently through the asyncio
+engine when the daemon socket is reachable, on a thread pool otherwise.
+
+Progress is rendered from the daemon's pull stream: one line per layer as it
+finishes, a periodic byte total while layers download, and a summary.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from devbox import engine, trace
+from devbox.utils import DEFAULT_JOBS
+
+# Seconds between download total lines for one image.
+PROGRESS_INTERVAL = 2.0
+
+
+def split_ref(ref: str) -> Tuple[str, Optional[str]]:
+    """
+    Split an image reference into (repository, tag); tag is None for digests and untagged refs.
+    """
+    if "@" in ref:
+        return ref, None
+    repo, sep, tag = ref.rpartition(":")
+    if not sep or "/" in tag:
+        return ref, None
+    return repo, tag
+
+
+def _mb(n: int) -> str:
+    return f"{n / 1e6:.1f} MB"
+
+
+class PullProgress:
+    """
+    Consume decoded pull stream messages and render per-layer progress for one image.
+    """
+
+    def __init__(
+        self,
+        ref: str,
+        out: Callable[[str], Any] = print,
+        clock: Callable[[], float] = time.monotonic,
+        interval: float = PROGRESS_INTERVAL,
+    ):
+        self.ref = ref
+        self.layers: Dict[str, Dict[str, Any]] = {}
+        self.digest: Optional[str] = None
+        self._out = out
+        self._clock = clock
+        self._interval = interval
+        self._started = clock()
+        self._last_report = self._started
+
+    def feed(self, message: Dict[str, Any]) -> None:
+        if "error" in message:
+            detail = message.get("errorDetail") or {}
+            raise engine.EngineError(0, detail.get("message") or message["error"])
+        status = message.get("status") or ""
+        layer_id = message.get("id")
+        if status.startswith("Digest:"):
+            self.digest = status.split(":", 1)[1].strip()
+        if not layer_id or layer_id == (split_ref(self.ref)[1] or "latest"):
+            return
+        layer = self.layers.setdefault(layer_id, {"current": 0, "total": 0, "done": False})
+        detail = message.get("progressDetail") or {}
+        if status == "Downloading" and detail.get("total"):
+            layer["current"], layer["total"] = detail.get("current", 0), detail["total"]
+        elif status in ("Pull complete", "Already exists") and not layer["done"]:
+            layer["done"] = True
+            layer["current"] = layer["total"]
+            size = f" ({_mb(layer['total'])})" if layer["total"] else ""
+            self._out(f"  [{self.ref}] {layer_id}: {status}{size}")
+        now = self._clock()
+        if status == "Downloading" and now - self._last_report >= self._interval:
+            self._last_report = now
+            current = sum(entry["current"] for entry in self.layers.values())
+            total = sum(entry["total"] for entry in self.layers.values())
+            done = sum(1 for entry in self.layers.values() if entry["done"])
+            self._out(f"  [{self.ref}] {done}/{len(self.layers)} layers, {_mb(current)} / {_mb(total)}")
+
+    def report(self) -> None:
+        total = sum(layer["total"] for layer in self.layers.values())
+        secs = self._clock() - self._started
+        self._out(f"Pulled {self.ref}: {len(self.layers)} layer(s), {_mb(total)} in {secs:.1f}s")
+
+
+def _auth_header(repo: str) -> Optional[str]:
+    """
+    X-Registry-Auth value from the docker CLI config for repo's registry, if any.
+    """
+    try:
+        from docker import auth
+
+        registry, _ = auth.resolve_repository_name(repo)
+        config = auth.resolve_authconfig(auth.load_config(), registry)
+        return auth.encode_header(config).decode("ascii") if config else None
+    except Exception:
+        return None
+
+
+@trace.traced("pull image")
+def pull_image(ref: str, session: Any = None, out: Callable[[str], Any] = print) -> bool:
+    """
+    Pull one image over the SDK session with streamed progress. Returns True on success.
+    """
+    if session is None:
+        from devbox.devcontainer import get_session
+
+        session = get_session()
+    repo, tag = split_ref(ref)
+    print(f"Pulling image {ref}...")
+    progress = PullProgress(ref, out=out)
+    try:
+        for message in session.client.api.pull(repo, tag=tag, stream=True, decode=True):
+            progress.feed(message)
+    except Exception as e:
+        print(f"Failed to pull {ref}: {e}")
+        return False
+    progress.report()
+    return True
+
+
+async def _pull_all_async(eng: Any, refs: List[str], only_missing: bool) -> Dict[str, bool]:
+    import asyncio
+
+    if only_missing:
+        found = await eng.inspect_images(refs)
+        present = {ref for ref, info in zip(refs, found) if isinstance(info, dict)}
+    else:
+        present = set()
+
+    async def pull(ref: str) -> bool:
+        if ref in present:
+            return True
+        repo, tag = split_ref(ref)
+        print(f"Pulling image {ref}...")
+        progress = PullProgress(ref)
+        try:
+            await eng.pull_image(repo, tag, on_progress=progress.feed, auth=_auth_header(repo))
+        except Exception as e:
+            print(f"Failed to pull {ref}: {e}")
+            return False
+        progress.report()
+        return True
+
+    results = await asyncio.gather(*(pull(ref) for ref in refs))
+    return dict(zip(refs, results))
+
+
+def pull_all(refs: List[str], only_missing: bool = True, jobs: int = DEFAULT_JOBS, session: Any = None) -> Dict[str, bool]:
+    """
+    Pull every distinct reference concurrently (only those missing locally unless
+    only_missing is False). Returns {ref: success}.
+    """
+    unique: List[str] = []
+    for ref in refs:
+        if ref and ref not in unique:
+            unique.append(ref)
+    if not unique:
+        return {}
+
+    with trace.span("pull images", count=len(unique)):
+        eng = engine.Engine.from_env(limit=max(1, jobs))
+        if eng is not None:
+            return engine.run(lambda e: _pull_all_async(e, unique, only_missing), eng)
+
+        if session is None:
+            from devbox.devcontainer import get_session
+
+            session = get_session()
+        client = session.client
+
+        def fetch(ref: str) -> bool:
+            if only_missing:
+                try:
+                    client.images.get(ref)
+                    return True
+                except Exception:
+                    pass
+            return pull_image(ref, session=session)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(unique)))) as pool:
+            return dict(zip(unique, pool.map(fetch, unique)))
+
+
+def referenced_images(config_path: str, devcjson: Dict[str, Any]) -> List[str]:
+    """
+    Images a config needs from a registry: its `image` (when it does not build)
+    or the external FROM images of its Dockerfile.
+    """
+    import os
+
+    from devbox.multi import base_images
+
+    build_config = devcjson.get("build")
+    if not build_config:
+        image = devcjson.get("image")
+        return [image] if image else []
+    devcontainer_dir = os.path.dirname(os.path.abspath(config_path))
+    return base_images(os.path.join(devcontainer_dir, build_config.get("dockerfile") or "Dockerfile"))
+
+
+def images_under(root: Optional[str] = None) -> List[str]:
+    """
+    Distinct images referenced by every devcontainer config under root (default: cwd).
+    """
+    import os
+
+    from devbox.utils import find_all_devcontainer_configs, read_json_file
+
+    refs: List[str] = []
+    for config_path in find_all_devcontainer_configs(os.path.abspath(root or os.getcwd())):
+        try:
+            devcjson = read_json_file(config_path)
+        except Exception as e:
+            print(f"Skipping {config_path}: {e}")
+            continue
+        refs.extend(r for r in referenced_images(config_path, devcjson) if r not in refs)
+    return refs
@@ -0,0 +1,255 @@
+"""
+Local registry of devbox-managed containers.
+
+An on-disk index (`registry.json` in the cache dir) maps container IDs to
+their name, project, image, spec hash, state and creation time. It is kept
+current from the daemon's event stream: each refresh replays the container
+events with the devbox.managed label since the previous one (one bounded
+`/events` call, since..until now) and applies them in order. The final
+state comes from the newest event, so replaying a slightly overlapping
+window is harmless.
+
+The daemon keeps a bounded event backlog, so events older than it are
+silently gone. A full reconcile (one `containers/json` call filtered by the
+managed label) rebuilds the index instead when there is no index yet, when
+the last reconcile is older than RECONCILE_INTERVAL, when a replay returns
+a full backlog, or when the event replay fails.
+
+`devbox list` and `devbox status` answer from the index and never import
+the docker SDK. The index is also kept in memory while its file is
+unchanged, so the agent does not re-read it on every command.
+"""
+import os
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from devbox import trace
+from devbox.labels import IMAGE_LABEL, MANAGED_LABEL, PROJECT_LABEL, SPEC_HASH_LABEL
+from devbox.pool import POOL_PREFIX
+from devbox.utils import get_cache_dir
+
+INDEX_FILE = "registry.json"
+# Bump when the shape of the index changes.
+INDEX_VERSION = 1
+# Seconds after which a refresh rescans instead of replaying events.
+RECONCILE_INTERVAL = 600
+# Events the daemon keeps for replay; a replay this long may have lost some.
+EVENTS_BACKLOG = 256
+# Seconds each replay reaches back before the previous one ended, to cover clock jitter.
+EVENT_OVERLAP = 1.0
+
+_STATES = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+    "stop": "exited",
+}
+
+# (path, file mtime, index) of the last index read or written by this process.
+_loaded: Optional[Tuple[str, int, Dict[str, Any]]] = None
+
+
+def _path() -> str:
+    return os.path.join(get_cache_dir(), INDEX_FILE)
+
+
+def empty() -> Dict[str, Any]:
+    return {"version": INDEX_VERSION, "synced": None, "reconciled": None, "containers": {}}
+
+
+def load() -> Dict[str, Any]:
+    """
+    The index as last saved, or an empty one.
+    """
+    global _loaded
+    path = _path()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        if _loaded is not None and _loaded[:2] == (path, mtime):
+            return _loaded[2]
+        with open(path, "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return empty()
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        return empty()
+    _loaded = (path, mtime, index)
+    return index
+
+
+def save(index: Dict[str, Any]) -> None:
+    global _loaded
+    path = _path()
+    try:
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp, path)
+        _loaded = (path, os.stat(path).st_mtime_ns, index)
+    except (OSError, TypeError, ValueError):
+        pass
+
+
+def _entry(name: str, labels: Dict[str, Any], state: str, created: Any) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "project": labels.get(PROJECT_LABEL) or "",
+        "image": labels.get(IMAGE_LABEL) or "",
+        "spec_hash": labels.get(SPEC_HASH_LABEL) or "",
+        "state": state,
+        "created": int(created or 0),
+    }
+
+
+def from_listing(container: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Index entry for one item of a containers/json listing.
+    """
+    name = ((container.get("Names") or [""])[0] or "").lstrip("/") or container["Id"][:12]
+    return _entry(name, container.get("Labels") or {}, container.get("State") or "", container.get("Created"))
+
+
+def apply_event(index: Dict[str, Any], event: Dict[str, Any]) -> None:
+    """
+    Update the index for one container event; unrelated events are ignored.
+    """
+    if event.get("Type", "container") != "container":
+        return
+    actor = event.get("Actor") or {}
+    container_id = actor.get("ID") or event.get("id")
+    attrs = actor.get("Attributes") or {}
+    action = (event.get("Action") or event.get("status") or "").split(":", 1)[0]
+    if not container_id or attrs.get(MANAGED_LABEL) != "true":
+        return
+    containers = index["containers"]
+    if action == "destroy":
+        containers.pop(container_id, None)
+        return
+    entry = containers.get(container_id)
+    if entry is None:
+        if action not in _STATES and action != "rename":
+            return
+        entry = containers[container_id] = _entry(attrs.get("name") or container_id[:12], attrs, "created", event.get("time"))
+    if attrs.get("name"):
+        entry["name"] = attrs["name"]
+    if action in _STATES:
+        entry["state"] = _STATES[action]
+
+
+def reconcile(index: Dict[str, Any], listing: List[Dict[str, Any]], now: float) -> None:
+    index["containers"] = {c["Id"]: from_listing(c) for c in listing}
+    index["synced"] = index["reconciled"] = now
+
+
+def _filters() -> Dict[str, List[str]]:
+    return {"type": ["container"], "label": [f"{MANAGED_LABEL}=true"]}
+
+
+def _list_managed() -> List[Dict[str, Any]]:
+    from devbox import engine
+
+    filters = {"label": [f"{MANAGED_LABEL}=true"]}
+    eng = engine.Engine.from_env()
+    if eng is not None:
+        return engine.run(lambda e: e.list_containers(all=True, filters=filters), eng)
+    from devbox.devcontainer import get_session
+
+    return get_session().client.api.containers(all=True, filters=filters)
+
+
+def _events(since: float, until: float) -> List[Dict[str, Any]]:
+    from devbox import engine
+
+    eng = engine.Engine.from_env()
+    if eng is not None:
+        return engine.run(lambda e: e.events(since=since, until=until, filters=_filters()), eng)
+    from devbox.devcontainer import get_session
+
+    api = get_session().client.api
+    return list(api.events(since=f"{since:.9f}", until=f"{until:.9f}", filters=_filters(), decode=True))
+
+
+def refresh(
+    force: bool = False,
+    list_managed: Optional[Callable[[], List[Dict[str, Any]]]] = None,
+    events: Optional[Callable[[float, float], List[Dict[str, Any]]]] = None,
+) -> Dict[str, Any]:
+    """
+    Bring the index up to date from the daemon and save it. force rescans instead of replaying events.
+    """
+    list_managed = list_managed or _list_managed
+    events = events or _events
+    index = load()
+    now = time.time()
+    stale = index["reconciled"] is None or now - index["reconciled"] > RECONCILE_INTERVAL
+    if not force and not stale:
+        try:
+            with trace.span("replay events"):
+                replayed = events(index["synced"] - EVENT_OVERLAP, now)
+        except Exception as e:
+            print(f"Could not read daemon events ({e}); rescanning.")
+            replayed = None
+        if replayed is not None and len(replayed) < EVENTS_BACKLOG:
+            for event in replayed:
+                apply_event(index, event)
+            index["synced"] = now
+            save(index)
+            return index
+    with trace.span("reconcile registry"):
+        reconcile(index, list_managed(), now)
+    save(index)
+    return index
+
+
+def is_pooled(entry: Dict[str, Any]) -> bool:
+    return entry["name"].startswith(POOL_PREFIX)
+
+
+def select(index: Dict[str, Any], project: Optional[str] = None, pooled: bool = False) -> List[Dict[str, Any]]:
+    """
+    Entries (with their "id") of one project or all, newest first; warm-pool members only if pooled.
+    """
+    rows = [
+        dict(entry, id=container_id)
+        for container_id, entry in index["containers"].items()
+        if (project is None or entry["project"] == project) and (pooled or not is_pooled(entry))
+    ]
+    return sorted(rows, key=lambda r: (-r["created"], r["name"]))
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    header = ("CONTAINER ID", "NAME", "STATE", "PROJECT", "IMAGE")
+    table = [header] + [(r["id"][:12], r["name"], r["state"], r["project"], r["image"]) for r in rows]
+    widths = [max(len(row[i]) for row in table) for i in range(len(header) - 1)]
+    for row in table:
+        print("  ".join(cell.ljust(w) for cell, w in zip(row, widths)) + "  " + row[-1])
+
+
+def _age(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def status(index: Dict[str, Any], project: str, image_name: Optional[str] = None) -> None:
+    """
+    Print the current project's containers and a summary of the whole registry.
+    """
+    rows = select(index, project)
+    print(f"Project {project}" + (f" (image {image_name})" if image_name else "") + f": {len(rows)} container(s)")
+    for r in rows:
+        print(f"  {r['id'][:12]}  {r['name']}  {r['state']}  spec {r['spec_hash'][:12] or '-'}")
+    entries = list(index["containers"].values())
+    running = sum(1 for e in entries if e["state"] == "running")
+    pooled = sum(1 for e in entries if is_pooled(e))
+    now = time.time()
+    print(
+        f"Registry: {len(entries)} managed container(s), {running} running, {pooled} pooled; "
+        f"synced {_age(now - (index['synced'] or now))} ago, full rescan {_age(now - (index['reconciled'] or now))} ago"
+    )
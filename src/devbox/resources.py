@@ -0,0 +1,247 @@
+"""
+Container resource settings.
+
+Resources are fixed when a container is created. They come from three
+places, highest precedence first:
+
+- `runArgs`: the docker run flags that size a container (--cpus, --memory,
+  --memory-swap, --shm-size, --ulimit, --cpuset-cpus, --pids-limit, --tmpfs,
+  --init, --cap-add, --security-opt, --privileged). Other flags are reported
+  and ignored.
+- `customizations.devbox.resources`: "auto", or {"cpus", "memory", "shmSize"}
+  with numbers, sizes such as "8g", or "auto".
+- `hostRequirements`: the minimum cpus/memory the project needs. The host is
+  checked against them, and they also turn on auto-sizing.
+
+Auto-sizing reads the host's core and memory counts (one `info` call). It
+leaves one core and a quarter of the memory to the host, and gives /dev/shm
+a quarter of the container memory (at most 2 GiB) instead of Docker's 64 MB.
+
+Settings are kept as a plain dict so they can be part of the run spec;
+run_kwargs turns them into docker SDK arguments.
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+GIB = 1024 ** 3
+MAX_AUTO_SHM = 2 * GIB
+
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?\s*$", re.IGNORECASE)
+_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+# runArgs flags that take a value, mapped to their settings key.
+_VALUE_FLAGS = {
+    "--cpus": "cpus",
+    "--memory": "memory",
+    "-m": "memory",
+    "--memory-swap": "memory_swap",
+    "--shm-size": "shm_size",
+    "--ulimit": "ulimits",
+    "--cpuset-cpus": "cpuset_cpus",
+    "--pids-limit": "pids_limit",
+    "--tmpfs": "tmpfs",
+    "--cap-add": "cap_add",
+    "--security-opt": "security_opt",
+}
+_BOOL_FLAGS = {"--init": "init", "--privileged": "privileged"}
+
+
+def parse_size(value: Any) -> Optional[int]:
+    """
+    Bytes in a size such as 512m, 8gb, 2GiB or a plain number; None if unparseable. Units are binary.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    m = _SIZE_RE.match(str(value))
+    if not m:
+        return None
+    return int(float(m.group(1)) * _UNITS[m.group(2).lower()])
+
+
+def format_size(n: int) -> str:
+    return f"{n / GIB:.1f} GiB" if n >= GIB else f"{n / 1024 ** 2:.0f} MiB"
+
+
+def _ulimit(value: str) -> Optional[int]:
+    if value == "unlimited":
+        return -1
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _apply_flag(settings: Dict[str, Any], key: str, value: str, flag: str) -> None:
+    if key in ("memory", "memory_swap", "shm_size"):
+        size = -1 if key == "memory_swap" and value == "-1" else parse_size(value)
+        if size is None:
+            print(f"Ignoring runArgs {flag} with invalid size: {value}")
+            return
+        settings[key] = size
+    elif key == "cpus":
+        try:
+            settings[key] = float(value)
+        except ValueError:
+            print(f"Ignoring runArgs {flag} with invalid value: {value}")
+    elif key == "pids_limit":
+        try:
+            settings[key] = int(value)
+        except ValueError:
+            print(f"Ignoring runArgs {flag} with invalid value: {value}")
+    elif key == "ulimits":
+        name, _, limits = value.partition("=")
+        if not name or not all(_ulimit(v) is not None for v in limits.split(":", 1)):
+            print(f"Ignoring runArgs {flag} {value}: expected name=soft[:hard]")
+            return
+        settings.setdefault("ulimits", {})[name] = limits
+    elif key == "tmpfs":
+        path, _, options = value.partition(":")
+        settings.setdefault("tmpfs", {})[path] = options
+    elif key in ("cap_add", "security_opt"):
+        settings.setdefault(key, []).append(value)
+    else:
+        settings[key] = value
+
+
+def parse_run_args(run_args: Any) -> Dict[str, Any]:
+    """
+    Resource settings from a runArgs list (both `--flag value` and `--flag=value` forms).
+    """
+    settings: Dict[str, Any] = {}
+    if not isinstance(run_args, list):
+        return settings
+    args = [str(a) for a in run_args]
+    i = 0
+    while i < len(args):
+        flag, eq, inline = args[i].partition("=")
+        i += 1
+        if flag in _BOOL_FLAGS:
+            settings[_BOOL_FLAGS[flag]] = inline.lower() != "false" if eq else True
+        elif flag in _VALUE_FLAGS:
+            if not eq:
+                if i >= len(args):
+                    print(f"Ignoring runArgs {flag} without a value")
+                    break
+                inline = args[i]
+                i += 1
+            _apply_flag(settings, _VALUE_FLAGS[flag], inline, flag)
+        else:
+            print(f"Ignoring unsupported runArgs entry: {args[i - 1]}")
+    return settings
+
+
+def _auto(host: Dict[str, Any]) -> Dict[str, Any]:
+    cpus = int(host.get("NCPU") or 0)
+    memory = int(host.get("MemTotal") or 0)
+    sized: Dict[str, Any] = {}
+    if cpus:
+        sized["cpus"] = float(max(1, cpus - 1))
+    if memory:
+        sized["memory"] = memory * 3 // 4
+        sized["shm_size"] = min(sized["memory"] // 4, MAX_AUTO_SHM)
+    return sized
+
+
+def resolve(devcjson: Dict[str, Any], host_info: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Resource settings for a devcontainer.json. host_info (docker info) is only called when auto-sizing
+    or checking hostRequirements.
+    """
+    from devbox.devcontainer import devbox_options
+
+    explicit = parse_run_args(devcjson.get("runArgs"))
+    configured = devbox_options(devcjson).get("resources")
+    requirements = devcjson.get("hostRequirements") if isinstance(devcjson.get("hostRequirements"), dict) else {}
+    if configured is None and not requirements:
+        return explicit
+
+    try:
+        host = host_info() or {}
+    except Exception as e:
+        print(f"Could not read host resources ({e}); skipping auto-sizing.")
+        host = {}
+    auto = _auto(host)
+
+    settings: Dict[str, Any] = {}
+    if configured == "auto" or (configured is None and requirements):
+        settings.update(auto)
+    elif isinstance(configured, dict):
+        for key, name in (("cpus", "cpus"), ("memory", "memory"), ("shmSize", "shm_size")):
+            value = configured.get(key)
+            if value == "auto":
+                if name in auto:
+                    settings[name] = auto[name]
+            elif value is not None:
+                parsed = (float(value) if isinstance(value, (int, float)) else None) if name == "cpus" else parse_size(value)
+                if parsed is None:
+                    print(f"Ignoring invalid resources.{key} setting: {value!r}")
+                else:
+                    settings[name] = parsed
+    elif configured is not None:
+        print(f"Ignoring invalid resources setting: {configured!r}")
+
+    _check_requirements(requirements, host, settings)
+    settings.update(explicit)
+    return settings
+
+
+def _check_requirements(requirements: Dict[str, Any], host: Dict[str, Any], settings: Dict[str, Any]) -> None:
+    """
+    Warn when the host is below hostRequirements; raise sized limits that fall below them.
+    """
+    cpus = requirements.get("cpus")
+    if isinstance(cpus, (int, float)) and not isinstance(cpus, bool):
+        if host.get("NCPU") and host["NCPU"] < cpus:
+            print(f"Host has {host['NCPU']} CPU(s); devcontainer.json requires {cpus}.")
+        if settings.get("cpus") and settings["cpus"] < cpus:
+            settings["cpus"] = float(min(cpus, host.get("NCPU") or cpus))
+    memory = parse_size(requirements.get("memory")) if requirements.get("memory") is not None else None
+    if memory:
+        if host.get("MemTotal") and host["MemTotal"] < memory:
+            print(f"Host has {format_size(host['MemTotal'])} memory; devcontainer.json requires {format_size(memory)}.")
+        if settings.get("memory") and settings["memory"] < memory:
+            settings["memory"] = min(memory, host.get("MemTotal") or memory)
+
+
+def run_kwargs(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    docker SDK containers.run keyword arguments for resource settings.
+    """
+    kwargs: Dict[str, Any] = {}
+    if settings.get("cpus"):
+        kwargs["nano_cpus"] = int(settings["cpus"] * 1e9)
+    if settings.get("memory"):
+        kwargs["mem_limit"] = settings["memory"]
+    if settings.get("memory_swap"):
+        kwargs["memswap_limit"] = settings["memory_swap"]
+    if settings.get("shm_size"):
+        kwargs["shm_size"] = settings["shm_size"]
+    if settings.get("ulimits"):
+        from docker.types import Ulimit
+
+        ulimits: List[Any] = []
+        for name, limits in settings["ulimits"].items():
+            soft, _, hard = str(limits).partition(":")
+            ulimits.append(Ulimit(name=name, soft=_ulimit(soft), hard=_ulimit(hard or soft)))
+        kwargs["ulimits"] = ulimits
+    for key in ("cpuset_cpus", "pids_limit", "tmpfs", "init", "cap_add", "security_opt", "privileged"):
+        if settings.get(key):
+            kwargs[key] = settings[key]
+    return kwargs
+
+
+def describe(settings: Dict[str, Any]) -> str:
+    parts = []
+    if settings.get("cpus"):
+        parts.append(f"{settings['cpus']:g} CPU(s)")
+    if settings.get("memory"):
+        parts.append(f"{format_size(settings['memory'])} memory")
+    if settings.get("shm_size"):
+        parts.append(f"{format_size(settings['shm_size'])} /dev/shm")
+    for name, limits in (settings.get("ulimits") or {}).items():
+        parts.append(f"ulimit {name}={limits}")
+    for path, options in (settings.get("tmpfs") or {}).items():
+        parts.append(f"tmpfs {path}" + (f" ({options})" if options else ""))
+    return ", ".join(parts)
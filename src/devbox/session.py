@@ -0,0 +1,111 @@
+"""
+Shared Docker session for a single devbox invocation.
+
+One DockerSession wraps one docker client, so every function in a command
+reuses the same keep-alive HTTP connection pool. The negotiated API version
+is cached on disk per DOCKER_HOST and pinned on later runs, which removes
+the version probe round-trip. Every API response is counted so commands can
+report how many round-trips they made.
+"""
+import os
+import re
+import json
+from collections import Counter
+from typing import Any, Callable, Optional
+from urllib.parse import urlparse
+
+from devbox import trace
+from devbox.utils import get_cache_dir
+
+API_VERSION_ENV = "DOCKER_API_VERSION"
+API_VERSION_CACHE = "api_version.json"
+DEFAULT_POOL_SIZE = 10
+
+_VERSION_PREFIX = re.compile(r"^/v\d+\.\d+")
+
+
+def _docker_host() -> str:
+    return os.environ.get("DOCKER_HOST") or "default"
+
+
+def load_api_version() -> Optional[str]:
+    path = os.path.join(get_cache_dir(), API_VERSION_CACHE)
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get(_docker_host())
+    except (OSError, ValueError):
+        return None
+
+
+def save_api_version(version: Optional[str]) -> None:
+    if not version:
+        return
+    path = os.path.join(get_cache_dir(), API_VERSION_CACHE)
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    data[_docker_host()] = version
+    try:
+        with open(path, "w") as f:
+            json.dump(data, f)
+    except OSError:
+        pass
+
+
+class DockerSession:
+    """
+    A docker client plus per-invocation API call accounting.
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+        self.api_calls = 0
+        self.calls_by_endpoint: Counter = Counter()
+        # docker's APIClient is a requests.Session; response hooks see every round-trip.
+        hooks = getattr(getattr(client, "api", None), "hooks", None)
+        if isinstance(hooks, dict):
+            hooks.setdefault("response", []).append(self._on_response)
+
+    @classmethod
+    def create(cls, from_env: Callable[..., Any]) -> "DockerSession":
+        """
+        Build a session from a docker.from_env-compatible factory.
+
+        DOCKER_API_VERSION overrides the pinned version; set it to "auto" to force negotiation.
+        """
+        version = os.environ.get(API_VERSION_ENV)
+        if not version:
+            version = load_api_version()
+        client = from_env(version=version or "auto", max_pool_size=DEFAULT_POOL_SIZE)
+        if not version or version == "auto":
+            save_api_version(getattr(getattr(client, "api", None), "api_version", None))
+        return cls(client)
+
+    def _on_response(self, response: Any, *args: Any, **kwargs: Any) -> Any:
+        self.api_calls += 1
+        request = getattr(response, "request", None)
+        if request is not None:
+            path = _VERSION_PREFIX.sub("", urlparse(request.url).path)
+            endpoint = f"{request.method} {path}"
+            self.calls_by_endpoint[endpoint] += 1
+            elapsed = getattr(response, "elapsed", None)
+            if elapsed is not None:
+                # elapsed covers request to response headers; streamed bodies may take longer
+                trace.record(endpoint, elapsed.total_seconds(), status=getattr(response, "status_code", ""))
+        return response
+
+    def summary(self) -> str:
+        """
+        Human readable API call report.
+        """
+        lines = [f"Docker API calls: {self.api_calls}"]
+        for endpoint, count in self.calls_by_endpoint.most_common():
+            lines.append(f"  {count:>4}  {endpoint}")
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        close = getattr(self.client, "close", None)
+        if callable(close):
+            close()
@@ -0,0 +1,164 @@
+"""
+Container snapshots.
+
+`devbox snapshot` commits a prepared devbox container (dependencies
+installed, caches warm) to an image tagged
+`devbox-snapshot/<project image>:<timestamp>`. The image is labeled with the
+project image name and the ID of the base image the container ran on.
+
+When start has to create a container, it uses the newest snapshot whose base
+ID still matches the current project image instead of the image itself. A
+rebuilt or re-pulled base image invalidates every older snapshot, since
+their layers sit on top of the previous base. Containers created from a
+snapshot keep the project image in their labels and run spec, so reuse and
+drift detection treat them like any other container of the project.
+
+Each snapshot prunes the project's invalid snapshots and all but the newest
+`snapshotRetention` (default 3) valid ones. Snapshots still used by a
+container are kept until the container is gone.
+"""
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+SNAPSHOT_REPO_PREFIX = "devbox-snapshot/"
+SNAPSHOT_OF_LABEL = "devbox.snapshot_of"
+SNAPSHOT_BASE_LABEL = "devbox.snapshot_base"
+SNAPSHOT_TIME_LABEL = "devbox.snapshot_time"
+DEFAULT_RETENTION = 3
+
+
+def retention(options: Dict[str, Any]) -> int:
+    """
+    Number of valid snapshots kept per project image (customizations.devbox.snapshotRetention).
+    """
+    raw = options.get("snapshotRetention", DEFAULT_RETENTION)
+    if isinstance(raw, bool) or not isinstance(raw, int) or raw < 1:
+        print(f"Ignoring invalid snapshotRetention setting: {raw!r}")
+        return DEFAULT_RETENTION
+    return raw
+
+
+def repository(image_name: str) -> str:
+    """
+    Snapshot repository for a project image; characters not allowed in repository names become '-'.
+    """
+    return SNAPSHOT_REPO_PREFIX + (re.sub(r"[^a-z0-9]+", "-", image_name.lower()).strip("-") or "image")
+
+
+def _labels(image: Any) -> Dict[str, str]:
+    return (getattr(image, "attrs", None) or {}).get("Labels") or getattr(image, "labels", None) or {}
+
+
+def _ref(image: Any) -> str:
+    tags = getattr(image, "tags", None) or []
+    return tags[0] if tags else image.id
+
+
+def list_snapshots(client: Any, image_name: str) -> List[Any]:
+    """
+    Snapshot images of image_name, newest first.
+    """
+    images = client.images.list(filters={"label": [f"{SNAPSHOT_OF_LABEL}={image_name}"]})
+
+    def taken(image: Any) -> float:
+        try:
+            return float(_labels(image).get(SNAPSHOT_TIME_LABEL) or 0)
+        except ValueError:
+            return 0.0
+
+    return sorted(images, key=taken, reverse=True)
+
+
+def base_id(client: Any, image_name: str) -> Optional[str]:
+    try:
+        return client.images.get(image_name).id
+    except Exception:
+        return None
+
+
+def latest(client: Any, image_name: str) -> Optional[str]:
+    """
+    Reference of the newest snapshot still based on the current image_name, or None.
+    """
+    try:
+        snapshots = list_snapshots(client, image_name)
+    except Exception:
+        return None
+    if not snapshots:
+        return None
+    current = base_id(client, image_name)
+    for image in snapshots:
+        if current and _labels(image).get(SNAPSHOT_BASE_LABEL) == current:
+            return _ref(image)
+    return None
+
+
+def create(client: Any, container: Any, image_name: str, keep: int = DEFAULT_RETENTION) -> Optional[str]:
+    """
+    Commit container as a snapshot of image_name, prune old snapshots and return the new reference.
+    """
+    current = base_id(client, image_name)
+    if current is None:
+        print(f"Image {image_name} not found; cannot snapshot a container without its base image.")
+        return None
+    source = (getattr(container, "attrs", None) or {}).get("Image")
+    valid_sources = {current} | {
+        image.id for image in list_snapshots(client, image_name) if _labels(image).get(SNAPSHOT_BASE_LABEL) == current
+    }
+    if source and source not in valid_sources:
+        print(f"Container {container.name} runs on an older version of {image_name}; recreate it before taking a snapshot.")
+        return None
+
+    now = time.time()
+    repo = repository(image_name)
+    tag = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{container.id[:8]}"
+    labels = {SNAPSHOT_OF_LABEL: image_name, SNAPSHOT_BASE_LABEL: current, SNAPSHOT_TIME_LABEL: f"{now:.3f}"}
+    print(f"Committing container {container.name} to {repo}:{tag}...")
+    started = time.monotonic()
+    container.commit(repository=repo, tag=tag, changes=[f'LABEL {k}="{v}"' for k, v in labels.items()])
+    print(f"Snapshot {repo}:{tag} taken in {time.monotonic() - started:.1f}s")
+    prune(client, image_name, keep)
+    return f"{repo}:{tag}"
+
+
+def prune(client: Any, image_name: str, keep: int = DEFAULT_RETENTION) -> int:
+    """
+    Remove snapshots of image_name that are invalid or beyond the newest `keep` valid ones. Returns the count removed.
+    """
+    current = base_id(client, image_name)
+    kept = 0
+    removed = 0
+    for image in list_snapshots(client, image_name):
+        if current and _labels(image).get(SNAPSHOT_BASE_LABEL) == current and kept < keep:
+            kept += 1
+            continue
+        try:
+            client.images.remove(image.id)
+            removed += 1
+            print(f"Removed snapshot {_ref(image)}")
+        except Exception as e:
+            print(f"Kept snapshot {_ref(image)}: {e}")
+    return removed
+
+
+def report(client: Any, image_name: str) -> None:
+    """
+    Print the snapshots of image_name, marking the one start would use.
+    """
+    snapshots = list_snapshots(client, image_name)
+    if not snapshots:
+        print(f"No snapshots of {image_name}.")
+        return
+    current = base_id(client, image_name)
+    chosen = latest(client, image_name)
+    for image in snapshots:
+        labels = _labels(image)
+        taken = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(float(labels.get(SNAPSHOT_TIME_LABEL) or 0)))
+        if _ref(image) == chosen:
+            state = "in use by start"
+        elif labels.get(SNAPSHOT_BASE_LABEL) == current:
+            state = "valid"
+        else:
+            state = "stale (base image changed)"
+        print(f"  {_ref(image)}  {taken}  {state}")
@@ -0,0 +1,466 @@
+"""
+Volume-backed workspace sync.
+
+With `customizations.devbox.workspaceMode: "volume"` the project is not
+bind-mounted; a named volume (`devbox_ws_<project>`) is mounted at
+workspaceFolder instead and kept in sync with the host tree:
+
+- initial bulk copy: the whole tree is streamed as one tar archive
+  (put_archive), or reconciled against the volume if it already has content;
+- incremental updates: a polling watcher stats the tree, waits until it has
+  been quiet for a debounce period, then sends changed files as one tar batch
+  and removes deleted paths with a single `rm` exec;
+- periodic reconciliation: the volume is listed and compared against the
+  host, repairing anything a batch missed.
+
+The watcher does not use filesystem events: every poll walks the tree and
+lstats each non-ignored entry, so one poll costs several microseconds per file
+(roughly 70 ms of CPU for a 10,000-file tree) and that cost recurs
+every `workspaceSyncInterval` seconds (default 0.5). Ignored directories are
+pruned from the walk, so listing large generated trees in
+`workspaceSyncIgnore` is the main way to keep polling cheap; a longer
+interval trades sync latency for less CPU.
+
+Paths matching `workspaceSyncIgnore` (.dockerignore syntax) are neither sent
+nor deleted, so directories generated inside the container (node_modules,
+target/) can live only in the volume. `devbox start` runs the watcher as a
+detached background process (`python -m devbox.sync`); `devbox sync` runs it
+in the foreground.
+"""
+import io
+import os
+import sys
+import json
+import stat
+import time
+import tarfile
+import subprocess
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from devbox.context import DockerIgnore, pack
+from devbox.utils import get_cache_dir
+
+WORKSPACE_VOLUME_PREFIX = "devbox_ws_"
+WORKSPACE_MODES = ("bind", "volume")
+POLL_INTERVAL = 0.5
+DEBOUNCE_SECS = 0.3
+# Upper bound on how long a continuously changing tree delays a batch.
+MAX_BATCH_DELAY = 2.0
+RECONCILE_SECS = 60.0
+# Paths per `rm` exec, well below typical ARG_MAX.
+RM_BATCH = 500
+
+# rel path -> (kind, size, mtime_ns); kind is "f", "d" or "l".
+Snapshot = Dict[str, Tuple[str, int, int]]
+Entry = Tuple[str, str, os.stat_result]
+
+
+def workspace_mode(options: Dict[str, Any]) -> str:
+    mode = options.get("workspaceMode", "bind")
+    if mode not in WORKSPACE_MODES:
+        print(f"Unknown workspaceMode '{mode}'; using 'bind'.")
+        return "bind"
+    return mode
+
+
+def sync_interval(options: Dict[str, Any]) -> float:
+    interval = options.get("workspaceSyncInterval", POLL_INTERVAL)
+    if isinstance(interval, bool) or not isinstance(interval, (int, float)) or interval <= 0:
+        print(f"Invalid workspaceSyncInterval '{interval}'; using {POLL_INTERVAL}.")
+        return POLL_INTERVAL
+    return float(interval)
+
+
+def volume_name(project: str) -> str:
+    return WORKSPACE_VOLUME_PREFIX + project
+
+
+def _kind(mode: int) -> Optional[str]:
+    if stat.S_ISREG(mode):
+        return "f"
+    if stat.S_ISDIR(mode):
+        return "d"
+    if stat.S_ISLNK(mode):
+        return "l"
+    return None
+
+
+def scan(root: str, matcher: DockerIgnore) -> Tuple[Snapshot, Dict[str, Entry]]:
+    """
+    Stat every non-ignored entry under root. Returns the snapshot and the entries for packing.
+
+    Ignored directories are pruned before os.walk descends into them (unless a '!'
+    exception can re-include something below), so their contents are never listed.
+    """
+    snap: Snapshot = {}
+    entries: Dict[str, Entry] = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root).replace(os.sep, "/")
+        rel_dir = "" if rel_dir == "." else rel_dir + "/"
+        dirnames[:] = sorted(d for d in dirnames if not matcher.can_prune(rel_dir + d))
+        kept = []
+        for name in dirnames + sorted(filenames):
+            rel = rel_dir + name
+            full = os.path.join(dirpath, name)
+            try:
+                st = os.lstat(full)
+            except OSError:
+                continue  # removed while walking
+            kind = _kind(st.st_mode)
+            if kind is None:
+                continue
+            if kind == "d":
+                kept.append(name)
+            if not matcher.excluded(rel):
+                snap[rel] = (kind, 0 if kind == "d" else st.st_size, st.st_mtime_ns)
+                entries[rel] = (rel, full, st)
+        dirnames[:] = kept
+    return snap, entries
+
+
+def diff(old: Snapshot, new: Snapshot) -> Tuple[List[str], List[str]]:
+    """
+    Return (changed, removed) paths between two snapshots. Removed paths below a removed
+    directory are folded into the directory.
+    """
+    changed = sorted(rel for rel, info in new.items() if old.get(rel) != info)
+    gone = sorted(rel for rel in old if rel not in new)
+    removed: List[str] = []
+    for rel in gone:
+        if removed and rel.startswith(removed[-1] + "/"):
+            continue
+        removed.append(rel)
+    # A directory replaced by a file (or the reverse) must be removed before it is re-sent.
+    removed += sorted(rel for rel in changed if rel in old and old[rel][0] != new[rel][0])
+    return changed, removed
+
+
+def _differs(host: Tuple[str, int, int], remote: Tuple[str, int, int]) -> bool:
+    kind, size, mtime_ns = host
+    if kind != remote[0]:
+        return True
+    if kind == "d":
+        return False
+    if kind == "l":
+        return size != remote[1]
+    # tar carries whole-second mtimes
+    return size != remote[1] or mtime_ns // 1_000_000_000 != remote[2] // 1_000_000_000
+
+
+class DirectoryTarget:
+    """
+    Sync target backed by a local directory (a volume's mountpoint, or a test directory).
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def put(self, chunks: Iterator[bytes], rels: List[str]) -> None:
+        for rel in rels:
+            path = os.path.join(self.root, rel)
+            if os.path.islink(path) or (os.path.lexists(path) and not os.path.isdir(path)):
+                os.unlink(path)
+        with tarfile.open(fileobj=io.BytesIO(b"".join(chunks)), mode="r:") as tar:
+            if hasattr(tarfile, "data_filter"):
+                tar.extractall(self.root, filter="tar")
+            else:
+                tar.extractall(self.root)
+
+    def remove(self, rels: List[str]) -> None:
+        import shutil
+
+        for rel in rels:
+            path = os.path.join(self.root, rel)
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.lexists(path):
+                os.unlink(path)
+
+    def listing(self) -> Optional[Snapshot]:
+        snap, _ = scan(self.root, DockerIgnore([]))
+        return snap
+
+    def alive(self) -> bool:
+        return os.path.isdir(self.root)
+
+
+class ContainerTarget:
+    """
+    Sync target that writes into a container's workspace folder through the Docker API.
+    """
+
+    def __init__(self, container: Any, workspace: str):
+        self.container = container
+        self.workspace = workspace
+
+    def put(self, chunks: Iterator[bytes], rels: List[str]) -> None:
+        # requests streams a generator body with chunked encoding; no temporary archive.
+        if not self.container.put_archive(self.workspace, chunks):
+            raise RuntimeError(f"put_archive into {self.workspace} failed")
+
+    def remove(self, rels: List[str]) -> None:
+        for i in range(0, len(rels), RM_BATCH):
+            batch = [f"./{rel}" for rel in rels[i:i + RM_BATCH]]
+            code, output = self.container.exec_run(["rm", "-rf", "--"] + batch, workdir=self.workspace)
+            if code:
+                raise RuntimeError(f"rm failed: {output.decode(errors='replace').strip()}")
+
+    def listing(self) -> Optional[Snapshot]:
+        """
+        List the workspace with find -printf, or None if the image's find cannot do that.
+        """
+        code, output = self.container.exec_run(
+            ["find", ".", "-mindepth", "1", "-printf", r"%y %s %T@ %P\0"], workdir=self.workspace
+        )
+        if code:
+            return None
+        snap: Snapshot = {}
+        for record in output.split(b"\0"):
+            if not record:
+                continue
+            kind, size, mtime, rel = record.decode("utf-8", "surrogateescape").split(" ", 3)
+            if kind in ("f", "d", "l"):
+                snap[rel] = (kind, 0 if kind == "d" else int(size), int(float(mtime) * 1_000_000_000))
+        return snap
+
+    def alive(self) -> bool:
+        try:
+            self.container.reload()
+            return self.container.status == "running"
+        except Exception:
+            return False
+
+
+class WorkspaceSync:
+    """
+    Keeps a target in sync with a host tree: initial copy, debounced batches, reconciliation.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        target: Any,
+        ignore: Optional[List[str]] = None,
+        interval: float = POLL_INTERVAL,
+        debounce: float = DEBOUNCE_SECS,
+        max_delay: float = MAX_BATCH_DELAY,
+        reconcile_every: float = RECONCILE_SECS,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.root = os.path.abspath(root)
+        self.target = target
+        self.matcher = DockerIgnore(ignore or [])
+        self.interval = interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.reconcile_every = reconcile_every
+        self.clock = clock
+        self.sleep = sleep
+        self.state: Snapshot = {}
+        self.batches = 0
+
+    def _send(self, changed: List[str], removed: List[str], entries: Dict[str, Entry]) -> None:
+        if removed:
+            self.target.remove(removed)
+        if changed:
+            self.target.put(pack([entries[rel] for rel in changed]), changed)
+        self.batches += 1
+
+    def initial(self) -> Tuple[int, int]:
+        """
+        Bring the target in line with the host. An empty target gets one bulk copy;
+        a populated one (an existing volume) is reconciled. Returns (sent, removed).
+        """
+        snap, entries = scan(self.root, self.matcher)
+        remote = self.target.listing()
+        if not remote:
+            changed = sorted(snap)
+            self._send(changed, [], entries)
+            self.state = snap
+            return len(changed), 0
+        return self._reconcile(snap, entries, remote)
+
+    def reconcile(self) -> Tuple[int, int]:
+        """
+        Compare the target's listing with the host tree and repair differences. Returns (sent, removed).
+        """
+        snap, entries = scan(self.root, self.matcher)
+        remote = self.target.listing()
+        if remote is None:
+            # Target cannot be listed; fall back to diffing against what was last applied.
+            changed, removed = diff(self.state, snap)
+            self._send(changed, removed, entries)
+            self.state = snap
+            return len(changed), len(removed)
+        return self._reconcile(snap, entries, remote)
+
+    def _reconcile(self, snap: Snapshot, entries: Dict[str, Entry], remote: Snapshot) -> Tuple[int, int]:
+        changed = sorted(rel for rel, info in snap.items() if rel not in remote or _differs(info, remote[rel]))
+        extra = {rel: info for rel, info in remote.items() if rel not in snap and not self.matcher.excluded(rel)}
+        _, removed = diff(extra, {})
+        removed += [rel for rel in changed if rel in remote and remote[rel][0] != snap[rel][0]]
+        if changed or removed:
+            self._send(changed, removed, entries)
+        self.state = snap
+        return len(changed), len(removed)
+
+    def run(self, should_stop: Optional[Callable[[], bool]] = None, verbose: bool = True) -> None:
+        """
+        Watch the host tree until should_stop() returns True or the target goes away.
+        """
+        should_stop = should_stop or (lambda: False)
+        seen = self.state
+        first_change: Optional[float] = None
+        last_change = 0.0
+        last_reconcile = self.clock()
+        while not should_stop():
+            self.sleep(self.interval)
+            snap, entries = scan(self.root, self.matcher)
+            now = self.clock()
+            if snap != seen:
+                seen = snap
+                last_change = now
+                first_change = first_change if first_change is not None else now
+            if first_change is not None and (
+                now - last_change >= self.debounce or now - first_change >= self.max_delay
+            ):
+                changed, removed = diff(self.state, snap)
+                try:
+                    self._send(changed, removed, entries)
+                except Exception as e:
+                    if not self.target.alive():
+                        return
+                    print(f"Sync batch failed ({e}); reconciling.")
+                    last_reconcile = now - self.reconcile_every
+                else:
+                    self.state = snap
+                    if verbose and (changed or removed):
+                        print(f"Synced {len(changed)} changed, {len(removed)} removed")
+                first_change = None
+            if now - last_reconcile >= self.reconcile_every:
+                if not self.target.alive():
+                    return
+                sent, removed_count = self.reconcile()
+                if verbose and (sent or removed_count):
+                    print(f"Reconciled {sent} changed, {removed_count} removed")
+                last_reconcile = now
+                seen = self.state
+
+
+def workspace_volume_mount(project: str, workspace_folder: str):
+    """
+    Named volume mount replacing the cwd bind mount, or None without docker SDK.
+    """
+    try:
+        from docker.types import Mount
+    except ImportError:
+        return None
+    return Mount(source=volume_name(project), target=workspace_folder, type="volume", read_only=False)
+
+
+def _pid_path(container_id: str) -> str:
+    return os.path.join(get_cache_dir(), "sync", f"{container_id[:12]}.pid")
+
+
+def _watcher_running(container_id: str) -> bool:
+    try:
+        with open(_pid_path(container_id)) as f:
+            os.kill(int(f.read().strip()), 0)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def start_watcher(
+    container_id: str,
+    root: str,
+    workspace: str,
+    ignore: List[str],
+    state: Optional[Snapshot] = None,
+    interval: float = POLL_INTERVAL,
+) -> None:
+    """
+    Run the watcher for a container as a detached background process, unless one already runs.
+    state is the snapshot of an initial copy just made; the watcher then skips its own.
+    """
+    if _watcher_running(container_id):
+        return
+    path = _pid_path(container_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    log = open(path[:-len(".pid")] + ".log", "ab")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "devbox.sync"],
+        stdin=subprocess.PIPE,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+        start_new_session=True,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p)),
+    )
+    proc.stdin.write(json.dumps({
+        "container": container_id, "root": root, "workspace": workspace, "ignore": ignore, "state": state,
+        "interval": interval,
+    }).encode("utf-8"))
+    proc.stdin.close()
+    log.close()
+    with open(path, "w") as f:
+        f.write(str(proc.pid))
+    print(f"Workspace sync running in the background (log: {log.name})")
+
+
+def watch(
+    client: Any,
+    container_id: str,
+    root: str,
+    workspace: str,
+    ignore: List[str],
+    verbose: bool = True,
+    state: Optional[Snapshot] = None,
+    interval: float = POLL_INTERVAL,
+) -> None:
+    """
+    Sync once (unless state, the snapshot of a copy already made, is given), then keep the
+    container's workspace in sync until it stops, polling every interval seconds.
+    """
+    container = client.containers.get(container_id)
+    syncer = WorkspaceSync(root, ContainerTarget(container, workspace), ignore, interval=interval)
+    if state is None:
+        sent, removed = syncer.initial()
+        if verbose:
+            print(f"Workspace in sync ({sent} sent, {removed} removed); watching {root}")
+    else:
+        # Changes made since that copy show up in the watcher's first scan.
+        syncer.state = state
+        if verbose:
+            print(f"Watching {root}")
+    try:
+        syncer.run(verbose=verbose)
+    except KeyboardInterrupt:
+        pass
+
+
+def main() -> None:
+    import docker
+
+    args = json.loads(sys.stdin.read())
+    # JSON turns the snapshot's tuples into lists; diff compares tuples.
+    state = {rel: tuple(info) for rel, info in args["state"].items()} if args.get("state") is not None else None
+    try:
+        watch(
+            docker.from_env(),
+            args["container"],
+            args["root"],
+            args["workspace"],
+            args["ignore"],
+            state=state,
+            interval=args.get("interval", POLL_INTERVAL),
+        )
+    finally:
+        try:
+            os.unlink(_pid_path(args["container"]))
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
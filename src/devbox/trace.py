@@ -0,0 +1,129 @@
+"""
+Phase and API call timing.
+
+Code wraps its phases in `with trace.span("name"):`; the Docker session and
+the asyncio engine record one span per API round-trip. Recording is off
+unless a command runs with `--profile` (summary table) or `--trace-file`
+(Chrome trace JSON, viewable in chrome://tracing or Perfetto), so spans cost
+one attribute check otherwise.
+"""
+import os
+import json
+import time
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+PHASE = "phase"
+API = "api"
+
+_enabled = False
+_origin_ns = 0
+# (name, category, start_ns, duration_ns, thread id, args)
+_spans: List[tuple] = []
+
+
+def enable() -> None:
+    global _enabled, _origin_ns
+    _enabled = True
+    _origin_ns = time.perf_counter_ns()
+    _spans.clear()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def span(name: str, category: str = PHASE, **args: Any) -> Iterator[None]:
+    """
+    Time the enclosed block as one span. Extra keyword arguments are attached to the trace event.
+    """
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        _spans.append((name, category, start, time.perf_counter_ns() - start, threading.get_ident(), args))
+
+
+def traced(name: str, category: str = PHASE) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator form of span for functions that are one phase.
+    """
+    def decorate(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name, category):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record(name: str, duration_secs: float, category: str = API, **args: Any) -> None:
+    """
+    Record a span that just ended and took duration_secs (e.g. a response's elapsed time).
+    """
+    if not _enabled:
+        return
+    duration = int(duration_secs * 1e9)
+    _spans.append((name, category, time.perf_counter_ns() - duration, duration, threading.get_ident(), args))
+
+
+def spans() -> List[tuple]:
+    return list(_spans)
+
+
+def summary() -> str:
+    """
+    Table of spans aggregated by name: count, total and max time, sorted by total time.
+    """
+    wall = (time.perf_counter_ns() - _origin_ns) / 1e9
+    totals: Dict[str, List[float]] = {}
+    for name, category, _, duration, _, _ in _spans:
+        entry = totals.setdefault(f"{category}: {name}", [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += duration / 1e9
+        entry[2] = max(entry[2], duration / 1e9)
+    lines = [f"Profile (wall {wall:.3f}s)", f"  {'span':<48} {'count':>5} {'total':>9} {'max':>9} {'%wall':>6}"]
+    for key, (count, total, longest) in sorted(totals.items(), key=lambda kv: -kv[1][1]):
+        share = 100 * total / wall if wall else 0.0
+        lines.append(f"  {key[:48]:<48} {count:>5} {total:>8.3f}s {longest:>8.3f}s {share:>5.1f}%")
+    return "\n".join(lines)
+
+
+def chrome_trace() -> Dict[str, Any]:
+    """
+    Spans as a Chrome trace-event document ("X" complete events, microsecond timestamps).
+    """
+    pid = os.getpid()
+    events = [
+        {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - _origin_ns) / 1000,
+            "dur": duration / 1000,
+            "pid": pid,
+            "tid": tid,
+            "args": {k: str(v) for k, v in args.items()},
+        }
+        for name, category, start, duration, tid, args in _spans
+    ]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write(path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(chrome_trace(), f)
+    print(f"Wrote trace with {len(_spans)} span(s) to {path}")
+
+
+def report(profile: bool = False, trace_file: Optional[str] = None) -> None:
+    if profile:
+        print(summary())
+    if trace_file:
+        write(trace_file)
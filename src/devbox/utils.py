@@ -6,10 +6,31 @@ def read_json_file(file_path):
     return data
 
 
-def find_devcontainer_config_folder():
+def get_cache_dir():
     import os
 
-    current_dir = os.getcwd()
+    base = os.environ.get("DEVBOX_CACHE_DIR")
+    if not base:
+        xdg = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        base = os.path.join(xdg, "devbox")
+    os.makedirs(base, exist_ok=True)
+    return base
+
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    import hashlib
+
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def find_devcontainer_config_folder(start_dir=None):
+    import os
+
+    current_dir = start_dir or os.getcwd()
     while True:
         devcontainer_dir = os.path.join(current_dir, ".devcontainer")
         if os.path.isdir(devcontainer_dir):
@@ -32,3 +53,35 @@ def find_devcontainer_config(devcontainer_dir=None):
     if os.path.isfile(config_path):
         return config_path
     return None
+
+
+# Default worker pool size for commands that operate on several configs/containers.
+DEFAULT_JOBS = 4
+
+# Directories never searched for nested devcontainer configs.
+SKIP_SEARCH_DIRS = {"node_modules", "vendor", "target", "dist", "build", "__pycache__"}
+
+
+def find_all_devcontainer_configs(root):
+    """
+    Return every devcontainer.json under root, in both the `.devcontainer/devcontainer.json`
+    and the `.devcontainer/<name>/devcontainer.json` layouts.
+    """
+    import os
+
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        if os.path.basename(dirpath) == ".devcontainer":
+            if "devcontainer.json" in filenames:
+                found.append(os.path.join(dirpath, "devcontainer.json"))
+            for d in sorted(dirnames):
+                config_path = os.path.join(dirpath, d, "devcontainer.json")
+                if os.path.isfile(config_path):
+                    found.append(config_path)
+            dirnames[:] = []
+            continue
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if d not in SKIP_SEARCH_DIRS and (d == ".devcontainer" or not d.startswith("."))
+        )
+    return found
@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """
+    Keep devbox's on-disk caches out of the real home directory.
+    """
+    cache_dir = tmp_path / "devbox-cache"
+    monkeypatch.setenv("DEVBOX_CACHE_DIR", str(cache_dir))
+    return cache_dir
@@ -0,0 +1,46 @@
+import pytest
+
+from benchmarks import bench
+from benchmarks.fakedaemon import FakeDaemon
+from devbox import agent
+from devbox.labels import MANAGED_LABEL, PROJECT_LABEL
+
+
+@pytest.fixture
+def daemon_and_agent(tmp_path, monkeypatch):
+    monkeypatch.delenv("DOCKER_API_VERSION", raising=False)
+    monkeypatch.delenv("DEVBOX_NO_AGENT", raising=False)
+    path = str(tmp_path / "agent.sock")
+    monkeypatch.setenv("DEVBOX_AGENT_SOCKET", path)
+    with FakeDaemon(str(tmp_path / "docker.sock"), containers=50, images=[bench.IMAGE]) as daemon:
+        monkeypatch.setenv("DOCKER_HOST", daemon.url)
+        assert agent.start_background() is not None
+        yield daemon
+        assert agent.stop(path)
+
+
+def test_commands_are_served_by_the_agent(daemon_and_agent, tmp_path, monkeypatch, capsys):
+    container = daemon_and_agent.add_container("devbox_mine", bench.IMAGE, {MANAGED_LABEL: "true", PROJECT_LABEL: "p1"})
+    monkeypatch.chdir(tmp_path)
+
+    assert agent.forward(["list", "-q"]) == 0
+    assert capsys.readouterr().out == container["Id"][:12] + "\n"
+    assert agent.forward(["list", "--bogus"]) == 2
+    assert "No such option: --bogus" in capsys.readouterr().err
+    assert agent.ping()["served"] == 2
+
+
+def test_in_process_fallbacks(daemon_and_agent, tmp_path, monkeypatch):
+    assert agent.forward(["--api-stats", "list"]) is None
+    assert agent.forward(["list", "--help"]) is None
+    assert agent.forward(["it", "abc", "--docker-cli"]) is None
+    # any DOCKER_*/DEVBOX_* setting the agent does not share runs in-process
+    for name, value in (("DOCKER_HOST", "unix:///elsewhere.sock"), ("DOCKER_API_VERSION", "1.41"), ("DEVBOX_CACHE_DIR", "/tmp/x")):
+        with monkeypatch.context() as m:
+            m.setenv(name, value)
+            assert agent.forward(["list"]) is None
+    assert "DEVBOX_AGENT_SOCKET" not in agent.settings()
+    assert agent.forward(["list", "-q"]) == 0
+    monkeypatch.setenv("DEVBOX_AGENT_SOCKET", str(tmp_path / "missing.sock"))
+    assert agent.forward(["list"]) is None
+    assert agent.ping() is None
@@ -0,0 +1,64 @@
+import os
+import socket
+import threading
+import types
+
+from devbox import attach
+
+
+class FakeContainer:
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = []
+
+    def exec_run(self, cmd, **kwargs):
+        self.calls.append(cmd)
+        exit_code, output = self.results.pop(0)
+        return types.SimpleNamespace(exit_code=exit_code, output=output)
+
+
+def test_probe_shell_uses_single_exec():
+    container = FakeContainer([(0, b"/bin/sh\n")])
+    assert attach.probe_shell(container) == "/bin/sh"
+    assert len(container.calls) == 1
+    assert container.calls[0][:2] == ["/bin/sh", "-c"]
+
+
+def test_probe_shell_none_found():
+    container = FakeContainer([(1, b"")])
+    assert attach.probe_shell(container) is None
+    assert len(container.calls) == 1
+
+
+def test_probe_shell_falls_back_without_bin_sh():
+    container = FakeContainer([(127, b"exec failed"), (127, b""), (0, b"")])
+    assert attach.probe_shell(container, ["/bin/bash", "/bin/zsh"]) == "/bin/zsh"
+
+
+def test_shell_cache_roundtrip():
+    container_id = "ab" * 32
+    assert attach.is_full_id(container_id) and not attach.is_full_id("devbox_x")
+    assert attach.cached_shell(container_id) is None
+    attach.remember_shell("/bin/zsh", container_id)
+    assert attach.cached_shell(container_id) == "/bin/zsh"
+
+
+def test_bridge_copies_both_directions():
+    local, remote = socket.socketpair()
+    stdin_r, stdin_w = os.pipe()
+    stdout_r, stdout_w = os.pipe()
+
+    def container_side():
+        assert remote.recv(1024) == b"echo hi\n"
+        remote.sendall(b"hi\n")
+        remote.close()
+
+    t = threading.Thread(target=container_side)
+    t.start()
+    os.write(stdin_w, b"echo hi\n")
+    attach.bridge(local, stdin_r, stdout_w)
+    t.join()
+    assert os.read(stdout_r, 1024) == b"hi\n"
+    for fd in (stdin_r, stdin_w, stdout_r, stdout_w):
+        os.close(fd)
+    local.close()
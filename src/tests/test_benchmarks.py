@@ -0,0 +1,51 @@
+import json
+
+from benchmarks import bench
+from benchmarks.fakedaemon import FakeDaemon
+from devbox import devcontainer as dc
+
+
+def test_start_and_stop_against_fake_daemon(tmp_path, monkeypatch, capsys):
+    project = tmp_path / "project"
+    (project / ".devcontainer").mkdir(parents=True)
+    (project / ".devcontainer" / "devcontainer.json").write_text(json.dumps({"image": bench.IMAGE}))
+    monkeypatch.chdir(project)
+    monkeypatch.delenv("DOCKER_API_VERSION", raising=False)
+    monkeypatch.setattr(dc, "_session", None)
+    monkeypatch.setattr(dc, "_project_config", None)
+
+    with FakeDaemon(str(tmp_path / "docker.sock"), containers=20, images=[bench.IMAGE]) as daemon:
+        monkeypatch.setenv("DOCKER_HOST", daemon.url)
+        dc.start()
+        (mine,) = [c for c in daemon.containers.values() if c["Labels"].get(dc.PROJECT_LABEL) == dc.project_hash()]
+        assert mine["State"] == "running"
+        assert mine["Mounts"][0]["Target"] == "/workspace"
+
+        dc.stop_containers(project=True, timeout=1)
+        assert mine["State"] == "exited"
+    assert "Stopped 1/1 container(s)" in capsys.readouterr().out
+
+
+def test_stop_and_remove_with_bodiless_replies(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("DOCKER_API_VERSION", raising=False)
+    labels = {dc.MANAGED_LABEL: "true", dc.PROJECT_LABEL: dc.project_hash()}
+
+    with FakeDaemon(str(tmp_path / "docker.sock"), images=[bench.IMAGE]) as daemon:
+        monkeypatch.setenv("DOCKER_HOST", daemon.url)
+        for name in ("one", "two", "three"):
+            daemon.add_container(name, bench.IMAGE, labels)
+        # stop and remove both answer 204 without Content-Length; each remove reuses its stop's connection
+        results = dc.stop_containers(project=True, timeout=1, remove=True)
+        assert [error for _, error, _ in results] == [None] * 3
+        assert daemon.containers == {}
+    assert "Stopped and removed 3/3 container(s)" in capsys.readouterr().out
+
+
+def test_compare_flags_call_and_time_regressions():
+    baselines = {"stop": {"api_calls": 1, "secs": 0.010}, "start": {"api_calls": 4, "secs": 0.020}}
+    results = {"stop": {"api_calls": 2, "secs": 0.011}, "start": {"api_calls": 4, "secs": 0.050}, "new": {"api_calls": 9, "secs": 1}}
+    assert bench.compare(results, baselines, tolerance=1.0) == [
+        "stop: 2 API calls (baseline 1)",
+        "start: 50.0 ms (baseline 20.0 ms)",
+    ]
@@ -0,0 +1,71 @@
+import pytest
+
+from devbox.build import BuildFailed, BuildProgress, stream_build
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_progress_times_each_step():
+    clock = FakeClock()
+    lines = []
+    progress = BuildProgress(out=lines.append, clock=clock)
+
+    progress.feed({"stream": "Step 1/3 : FROM alpine\n"})
+    clock.now = 1.0
+    progress.feed({"stream": "Step 2/3 : RUN apk add git\n ---> Running in abc\n"})
+    clock.now = 11.0
+    progress.feed({"stream": "Step 3/3 : COPY . /src\n"})
+    clock.now = 11.5
+    progress.feed({"aux": {"ID": "sha256:123"}})
+    progress.finish()
+
+    assert [desc for desc, _ in progress.steps] == [
+        "[1/3] FROM alpine",
+        "[2/3] RUN apk add git",
+        "[3/3] COPY . /src",
+    ]
+    assert progress.slowest(1) == [("[2/3] RUN apk add git", 10.0)]
+    assert progress.image_id == "sha256:123"
+    assert "[2/3] RUN apk add git" in lines
+
+
+def test_progress_keeps_bounded_tail():
+    progress = BuildProgress(tail_lines=5, out=lambda _: None)
+    for i in range(100):
+        progress.feed({"stream": f"line {i}\n"})
+    assert list(progress.tail) == [f"line {i}" for i in range(95, 100)]
+
+
+def test_stream_build_raises_with_tail():
+    class API:
+        def build(self, **kwargs):
+            assert kwargs["decode"] is True
+            yield {"stream": "Step 1/1 : RUN false\n"}
+            yield {"stream": "oops\n"}
+            yield {"error": "failed", "errorDetail": {"message": "command failed"}}
+
+    with pytest.raises(BuildFailed) as exc:
+        stream_build(API(), progress=BuildProgress(out=lambda _: None), path=".")
+    assert exc.value.reason == "command failed"
+    assert exc.value.log_tail[-1] == "oops"
+
+
+def test_progress_reports_cache_hits_and_misses():
+    lines = []
+    progress = BuildProgress(out=lines.append, clock=FakeClock())
+    progress.feed({"stream": "Step 1/3 : FROM alpine\n ---> 1234\n"})
+    progress.feed({"stream": "Step 2/3 : RUN apk add git\n ---> Using cache\n ---> 5678\n"})
+    progress.feed({"stream": "Step 3/3 : COPY . /src\n ---> 9abc\n"})
+    progress.finish()
+    progress.cache_report()
+
+    assert progress.cache_hits == ["[2/3] RUN apk add git"]
+    assert progress.cache_misses == ["[3/3] COPY . /src"]
+    assert "Build cache: 1/2 steps cached, 1 rebuilt" in lines
+    assert "  miss  [3/3] COPY . /src" in lines
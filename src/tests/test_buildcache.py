@@ -0,0 +1,105 @@
+import types
+
+from devbox import buildcache
+from devbox import devcontainer as dc
+
+
+def test_cache_config_parses_entry_forms(tmp_path):
+    config = buildcache.cache_config(
+        {
+            "dockerfile": "Dockerfile",
+            "cacheFrom": ["ghcr.io/org/app:cache", "type=tar,src=cache/app.tar", "type=gha"],
+            "cacheTo": "type=local,dest=/var/cache/devbox",
+        },
+        str(tmp_path),
+    )
+    assert config["from"] == [
+        {"type": "registry", "ref": "ghcr.io/org/app:cache"},
+        {"type": "tar", "path": str(tmp_path / "cache" / "app.tar")},
+    ]
+    assert config["to"] == [{"type": "local", "path": "/var/cache/devbox"}]
+    assert buildcache.tarball_path(config["to"][0], "devbox/app:1") == "/var/cache/devbox/devbox_app_1.tar"
+
+
+def test_cache_keys_do_not_change_build_hash(tmp_path):
+    context = tmp_path / "context"
+    context.mkdir()
+    (context / "Dockerfile").write_text("FROM alpine\n")
+    plain = dc.compute_build_hash(str(context), "Dockerfile", {"dockerfile": "Dockerfile"})
+    cached = dc.compute_build_hash(str(context), "Dockerfile", {"dockerfile": "Dockerfile", "cacheTo": "x:cache"})
+    assert plain == cached
+
+
+class FakeClient:
+    def __init__(self):
+        self.saved = {}
+        self.loaded = []
+        self.api = types.SimpleNamespace(get_image=self.get_image)
+        self.images = types.SimpleNamespace(load=self.load, get=self.get)
+
+    def get_image(self, name):
+        yield b"layers-of-"
+        yield name.encode()
+
+    def load(self, f):
+        self.loaded.append(f.read())
+        return [types.SimpleNamespace(id="sha256:1", tags=["devbox/app:1"])]
+
+    def get(self, name):
+        raise Exception("not found")
+
+
+def test_tar_cache_round_trip(tmp_path, capsys):
+    client = FakeClient()
+    entry = {"type": "local", "path": str(tmp_path / "cache")}
+
+    assert buildcache.import_caches(client, [entry], "devbox/app:1") == []
+    buildcache.export_caches(client, [entry], "devbox/app:1")
+    assert buildcache.import_caches(client, [entry], "devbox/app:1") == ["devbox/app:1"]
+
+    assert client.loaded == [b"layers-of-devbox/app:1"]
+    assert not [p for p in (tmp_path / "cache").iterdir() if p.suffix == ".tmp"]
+    out = capsys.readouterr().out
+    assert "not found; continuing without it" in out
+    assert "Exported build cache to" in out
+
+
+def test_registry_cache_failures_do_not_fail(monkeypatch, capsys):
+    client = FakeClient()
+
+    def push(repo, tag=None, **kwargs):
+        yield {"error": "denied"}
+
+    client.api.tag = lambda *args: True
+    client.api.push = push
+    monkeypatch.setattr(dc.pull, "pull_image", lambda ref, **kwargs: False)
+
+    entry = {"type": "registry", "ref": "localhost:5000/app:cache"}
+    assert buildcache.import_caches(client, [entry], "devbox/app:1") == []
+    buildcache.export_caches(client, [entry], "devbox/app:1")
+
+    out = capsys.readouterr().out
+    assert "localhost:5000/app:cache unavailable" in out
+    assert "Failed to export build cache to localhost:5000/app:cache: denied" in out
+
+
+def test_build_image_builds_with_imported_cache(tmp_path, monkeypatch):
+    (tmp_path / "Dockerfile").write_text("FROM alpine\n")
+    calls = {}
+
+    def build(**kwargs):
+        calls.update(kwargs)
+        yield {"stream": "Step 1/1 : FROM alpine\n"}
+
+    client = types.SimpleNamespace(api=types.SimpleNamespace(build=build))
+    monkeypatch.setattr(dc, "image_is_current", lambda *args: False)
+    monkeypatch.setattr(dc.buildcache, "import_caches", lambda client, entries, name: ["ghcr.io/org/app:cache"])
+    exported = []
+    monkeypatch.setattr(dc.buildcache, "export_caches", lambda client, entries, name: exported.append(name))
+
+    context = dc.make_build_context(str(tmp_path), "Dockerfile", None)
+    cache = {"from": [{"type": "registry", "ref": "ghcr.io/org/app:cache"}], "to": [{"type": "tar", "path": "x.tar"}]}
+    assert dc.build_image(context, "devbox/app:1", "hash", session=types.SimpleNamespace(client=client), cache=cache)
+
+    assert calls["cache_from"] == ["ghcr.io/org/app:cache"]
+    assert exported == ["devbox/app:1"]
@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock
+
+from devbox import cachevolumes
+from devbox import devcontainer as dc
+
+
+def _volume(name, kind="pip", image="img"):
+    v = MagicMock()
+    v.name = name
+    v.attrs = {"Labels": cachevolumes.volume_labels(image, kind)}
+    return v
+
+
+def test_cache_config_forms():
+    assert cachevolumes.cache_config({}) == {}
+    assert cachevolumes.cache_config({"cacheVolumes": True}) == cachevolumes.CACHE_DIRS
+    assert cachevolumes.cache_config({"cacheVolumes": ["pip", "npm"]}) == {
+        "pip": "/root/.cache/pip",
+        "npm": "/root/.npm",
+    }
+    assert cachevolumes.cache_config({"cacheVolumes": {"go": True, "uv": "/root/.cache/uv", "bogus": True}}) == {
+        "go": "/go/pkg/mod",
+        "uv": "/root/.cache/uv",
+    }
+
+
+def test_volume_name_is_docker_safe():
+    assert cachevolumes.volume_name("registry:5000/team/app:dev", "pip") == "devbox_cache_registry_5000_team_app_dev_pip"
+
+
+def test_get_mounts_appends_cache_volumes():
+    devcjson = {
+        "mounts": ["source=/host/npm,target=/root/.npm,type=bind"],
+        "customizations": {"devbox": {"cacheVolumes": ["pip", "npm"]}},
+    }
+    mounts = [dc._mount_to_dict(m) for m in dc.get_mounts(devcjson, "img")]
+    assert [(m["source"], m["target"], m["type"]) for m in mounts] == [
+        ("/host/npm", "/root/.npm", "bind"),
+        ("devbox_cache_img_pip", "/root/.cache/pip", "volume"),
+    ]
+    # Without an image name there is nothing to share the volumes with.
+    assert len(dc.get_mounts(devcjson)) == 1
+
+
+def test_ensure_creates_only_missing_volumes():
+    client = MagicMock()
+    client.volumes.list.return_value = [_volume("devbox_cache_img_pip")]
+    created = cachevolumes.ensure(client, {"pip": "/root/.cache/pip", "npm": "/root/.npm"}, "img")
+    assert created == ["devbox_cache_img_npm"]
+    client.volumes.create.assert_called_once_with(
+        name="devbox_cache_img_npm", labels=cachevolumes.volume_labels("img", "npm")
+    )
+    filters = client.volumes.list.call_args.kwargs["filters"]
+    assert f"{dc.IMAGE_LABEL}=img" in filters["label"]
+
+
+def test_report_and_prune(capsys):
+    pip, npm = _volume("devbox_cache_img_pip"), _volume("devbox_cache_img_npm", kind="npm")
+    npm.remove.side_effect = Exception("volume is in use")
+    client = MagicMock()
+    client.volumes.list.return_value = [pip, npm]
+    client.df.return_value = {"Volumes": [
+        {"Name": "devbox_cache_img_pip", "UsageData": {"Size": 3 * 1024 * 1024}},
+        {"Name": "devbox_cache_img_npm", "UsageData": {"Size": -1}},
+    ]}
+    rows = cachevolumes.report(client, "img")
+    assert [(r["kind"], r["size"]) for r in rows] == [("npm", -1), ("pip", 3 * 1024 * 1024)]
+    assert "3.0 MB total" in capsys.readouterr().out
+
+    assert cachevolumes.prune(client, "img") == ["devbox_cache_img_pip"]
+    assert "Kept cache volume devbox_cache_img_npm" in capsys.readouterr().out
@@ -0,0 +1,91 @@
+import io
+import tarfile
+
+from devbox import context as ctx
+from devbox.context import BuildContext, DigestCache, DockerIgnore
+
+
+def _tree(root, files):
+    for rel, content in files.items():
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(content)
+
+
+def test_dockerignore_patterns():
+    m = DockerIgnore(["# comment", "node_modules", "**/*.pyc", "build/*", "!build/keep.txt", "/.git"])
+    assert m.excluded("node_modules")
+    assert m.excluded("node_modules/pkg/index.js")
+    assert m.excluded("src/deep/mod.pyc")
+    assert m.excluded("mod.pyc")
+    assert m.excluded("build/out.o")
+    assert not m.excluded("build/keep.txt")
+    assert m.excluded(".git/HEAD")
+    assert not m.excluded("src/main.py")
+
+
+def test_prune_respects_exceptions():
+    m = DockerIgnore(["node_modules", "vendor", "!vendor/keep"])
+    assert m.can_prune("node_modules")
+    assert not m.can_prune("vendor")
+    assert not m.can_prune("src")
+
+
+def test_entries_skip_ignored_and_keep_dockerfile(tmp_path):
+    # The isolated cache dir lives in tmp_path; keep it out of the context.
+    root = tmp_path / "ctx"
+    _tree(root, {
+        ".dockerignore": "node_modules\n.git\nDockerfile\n",
+        "Dockerfile": "FROM alpine\n",
+        "src/app.py": "print(1)\n",
+        "node_modules/pkg/index.js": "x",
+        ".git/HEAD": "ref",
+    })
+    names = [rel for rel, _, _ in BuildContext(str(root), str(root / "Dockerfile")).entries()]
+    assert "Dockerfile" in names
+    assert "src/app.py" in names
+    assert not any(n.startswith("node_modules") or n.startswith(".git/") for n in names)
+
+
+def test_stream_is_valid_tar(tmp_path):
+    root = tmp_path / "ctx"
+    big = "x" * (ctx.STREAM_CHUNK_SIZE * 2 + 7)
+    _tree(root, {"Dockerfile": "FROM alpine\n", "data/big.bin": big, "empty/.keep": ""})
+    context = BuildContext(str(root), str(root / "Dockerfile"))
+    chunks = list(context.stream())
+    assert all(len(c) <= ctx.STREAM_CHUNK_SIZE * 2 for c in chunks)
+    with tarfile.open(fileobj=io.BytesIO(b"".join(chunks))) as tar:
+        assert tar.extractfile("data/big.bin").read().decode() == big
+        assert tar.extractfile("Dockerfile").read() == b"FROM alpine\n"
+        assert tar.getmember("empty").isdir()
+
+
+def test_external_dockerfile_is_packed(tmp_path):
+    root = tmp_path / "ctx"
+    _tree(root, {".devcontainer/Dockerfile": "FROM alpine\n", "app/main.py": "print(1)\n"})
+    context = BuildContext(str(root / "app"), str(root / ".devcontainer" / "Dockerfile"))
+    assert context.dockerfile == ctx.EXTERNAL_DOCKERFILE
+    with tarfile.open(fileobj=io.BytesIO(b"".join(context.stream()))) as tar:
+        assert tar.extractfile(ctx.EXTERNAL_DOCKERFILE).read() == b"FROM alpine\n"
+
+
+def test_digest_cache_skips_unchanged_files(tmp_path, monkeypatch):
+    root = tmp_path / "ctx"
+    _tree(root, {"Dockerfile": "FROM alpine\n", "a.txt": "a", "b.txt": "b"})
+    reads = []
+    real_hash = ctx.hash_file
+    monkeypatch.setattr(ctx, "hash_file", lambda p: reads.append(p) or real_hash(p))
+
+    first = BuildContext(str(root), str(root / "Dockerfile")).digest()
+    assert len(reads) == 3
+
+    reads.clear()
+    cache = DigestCache(str(root))
+    assert BuildContext(str(root), str(root / "Dockerfile")).digest(cache) == first
+    assert reads == []
+    assert cache.hits == 3
+
+    (root / "b.txt").write_text("changed")
+    reads.clear()
+    assert BuildContext(str(root), str(root / "Dockerfile")).digest() != first
+    assert [p.endswith("b.txt") for p in reads] == [True]
@@ -8,12 +8,14 @@ from devbox import devcontainer as dc
 
 
 class DummyMount:
-    def __init__(self, target, source=None, type="bind", read_only=False, consistency=None):
+    def __init__(self, target, source=None, type="bind", read_only=False, consistency=None, tmpfs_size=None, tmpfs_mode=None):
         self.target = target
         self.source = source
         self.type = type
         self.read_only = read_only
         self.consistency = consistency
+        self.tmpfs_size = tmpfs_size
+        self.tmpfs_mode = tmpfs_mode
 
 
 @pytest.fixture(autouse=True)
@@ -30,11 +32,17 @@ def patch_mount_and_docker(monkeypatch):
     class StubImages:
         def __init__(self):
             self.build_calls = []
+            self.labels = {}
 
         def build(self, **kwargs):
             self.build_calls.append(kwargs)
             return ("image_obj", {"Warnings": None})
 
+        def get(self, name):
+            if name in self.labels:
+                return types.SimpleNamespace(labels=self.labels[name])
+            raise Exception("Image not found")
+
     class StubContainersManager:
         def __init__(self):
             self.run_calls = []
@@ -48,7 +56,8 @@ def patch_mount_and_docker(monkeypatch):
             c.status = "running"
             return c
 
-        def list(self, all=False):
+        def list(self, all=False, filters=None):
+            self.list_filters = filters
             return self.list_containers
 
         def get(self, cid):
@@ -56,18 +65,36 @@ def patch_mount_and_docker(monkeypatch):
                 return self.get_map[cid]
             raise Exception("Not found")
 
+    class StubAPI:
+        def __init__(self):
+            self.build_calls = []
+            self.build_stream = [
+                {"stream": "Step 1/2 : FROM alpine\n"},
+                {"stream": "Step 2/2 : RUN true\n"},
+                {"aux": {"ID": "sha256:built"}},
+            ]
+
+        def build(self, **kwargs):
+            self.build_calls.append(kwargs)
+            return iter(self.build_stream)
+
     class StubClient:
         def __init__(self):
             self.images = StubImages()
             self.containers = StubContainersManager()
+            self.api = StubAPI()
 
-    def from_env():
+    def from_env(**kwargs):
         return StubClient()
 
     stub_docker.from_env = from_env
     stub_docker.errors = types.SimpleNamespace(ImageNotFound=Exception)
 
     monkeypatch.setattr(dc, "docker", stub_docker)
+    monkeypatch.setattr(dc, "_session", None)
+    monkeypatch.setattr(dc, "_project_config", None)
+    # Daemon calls go through the stubbed SDK, never the asyncio engine.
+    monkeypatch.setattr(dc.engine.Engine, "from_env", classmethod(lambda cls, **kwargs: None))
 
     return stub_docker  # In case a test wants direct access
 
@@ -111,6 +138,14 @@ def test_parse_mount_string_missing_target_returns_none():
     assert dc._parse_mount_string("source=/x,type=bind") is None
 
 
+def test_parse_mount_tmpfs_size_and_mode():
+    m = dc._parse_mount_string("type=tmpfs,target=/scratch,tmpfs-size=512m,tmpfs-mode=1777")
+    assert (m.type, m.source, m.tmpfs_size, m.tmpfs_mode) == ("tmpfs", None, 512 * 1024 ** 2, 0o1777)
+    d = dc._parse_mount_dict({"type": "tmpfs", "target": "/cache", "size": "1g"})
+    assert d.tmpfs_size == 1024 ** 3 and d.tmpfs_mode is None
+    assert dc._mount_to_dict(m)["tmpfs"] == {"SizeBytes": 512 * 1024 ** 2, "Mode": 0o1777}
+
+
 def test_parse_mount_dict_read_only():
     entry = {
         "source": "/opt/src",
@@ -154,11 +189,66 @@ def test_get_mounts_non_list_ignored(monkeypatch):
     assert mounts == []
 
 
+def _project(tmp_path, config='{"image": "img", "mounts": ["target=/cache,type=volume"]}'):
+    project = tmp_path / "project"
+    (project / ".devcontainer").mkdir(parents=True)
+    (project / "src").mkdir()
+    (project / ".devcontainer" / "devcontainer.json").write_text(config)
+    return project
+
+
+def test_load_project_config_uses_cache(monkeypatch, tmp_path):
+    project = _project(tmp_path)
+    monkeypatch.chdir(project / "src")
+    reads = []
+    real_read = dc.read_json_file
+    monkeypatch.setattr(dc, "read_json_file", lambda p: reads.append(p) or real_read(p))
+
+    first = dc.load_project_config()
+    assert first["config_path"] == str(project / ".devcontainer" / "devcontainer.json")
+    assert first["image_name"] == "img"
+    second = dc.load_project_config()
+    assert len(reads) == 1
+    # Anonymous volume names stay stable because parsed mounts come from the cache
+    assert second["mounts"] == first["mounts"]
+    volume = [m for m in dc.resolve_mounts(second["devcjson"]) if m.target == "/cache"][0]
+    assert volume.source == first["mounts"][0]["source"]
+
+
+def test_load_project_config_invalidated_by_edit(monkeypatch, tmp_path):
+    import os
+
+    project = _project(tmp_path)
+    monkeypatch.chdir(project / "src")
+    dc.load_project_config()
+
+    config_file = project / ".devcontainer" / "devcontainer.json"
+    config_file.write_text('{"image": "other"}')
+    st = os.stat(config_file)
+    os.utime(config_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert dc.load_project_config()["image_name"] == "other"
+
+
+def test_load_project_config_sees_closer_devcontainer(monkeypatch, tmp_path):
+    import os
+
+    project = _project(tmp_path)
+    monkeypatch.chdir(project / "src")
+    dc.load_project_config()
+
+    st = os.stat(project / "src")
+    (project / "src" / ".devcontainer").mkdir()
+    (project / "src" / ".devcontainer" / "devcontainer.json").write_text('{"image": "inner"}')
+    os.utime(project / "src", ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert dc.load_project_config()["image_name"] == "inner"
+
+
 def test_start_dev_container_existing_running(monkeypatch, patch_mount_and_docker):
     existing = MagicMock()
     existing.status = "running"
     existing.id = "existing_running"
-    monkeypatch.setattr(dc, "find_running_container_by_image", lambda image: existing)
+    existing.labels = {dc.SPEC_HASH_LABEL: dc.compute_spec_hash("some-image", [])}
+    monkeypatch.setattr(dc, "find_running_container_by_image", lambda image, **kwargs: existing)
 
     result = dc.start_dev_container("some-image", "new_name", mounts=[])
     assert result is existing  # Should reuse running container
@@ -168,16 +258,88 @@ def test_start_dev_container_existing_exited(monkeypatch, patch_mount_and_docker
     existing = MagicMock()
     existing.status = "exited"
     existing.id = "existing_exited"
+    existing.labels = {dc.SPEC_HASH_LABEL: dc.compute_spec_hash("some-image", [])}
     existing.start = MagicMock()
-    monkeypatch.setattr(dc, "find_running_container_by_image", lambda image: existing)
+    monkeypatch.setattr(dc, "find_running_container_by_image", lambda image, **kwargs: existing)
 
     result = dc.start_dev_container("some-image", "new_name", mounts=[])
     existing.start.assert_called_once()
     assert result is existing
 
 
+def test_start_dev_container_recreates_on_spec_drift(monkeypatch, patch_mount_and_docker, capsys):
+    old_mounts = [DummyMount(target="/t", source="/old")]
+    new_mounts = [DummyMount(target="/t", source="/new")]
+    existing = MagicMock()
+    existing.status = "running"
+    existing.name = "devbox_old"
+    old_spec = dc.run_spec("some-image", old_mounts, env={"A": "1"})
+    existing.labels = {
+        dc.SPEC_HASH_LABEL: dc.spec_hash_of(old_spec),
+        dc.SPEC_LABEL: dc.json.dumps(old_spec),
+    }
+    monkeypatch.setattr(dc, "find_running_container_by_image", lambda image, **kwargs: existing)
+
+    spec = dc.run_spec("some-image", new_mounts, env={"A": "2"})
+    # a running container is left alone unless asked to recreate it
+    assert dc.start_dev_container("some-image", "new_name", mounts=new_mounts, spec=spec) is None
+    existing.remove.assert_not_called()
+    out = capsys.readouterr().out
+    assert "- mount /old -> /t (bind)" in out
+    assert "+ mount /new -> /t (bind)" in out
+    assert "~ env A: 1 -> 2" in out
+    assert "--recreate" in out
+
+    result = dc.start_dev_container("some-image", "new_name", mounts=new_mounts, spec=spec, recreate=True)
+    existing.remove.assert_called_once_with(force=True)
+    assert result is not existing
+    assert "Recreating devbox_old." in capsys.readouterr().out
+
+
+def test_start_dev_container_replaces_stopped_container_on_drift(monkeypatch, patch_mount_and_docker):
+    existing = MagicMock(status="exited", labels={dc.SPEC_HASH_LABEL: "old"})
+    monkeypatch.setattr(dc, "find_running_container_by_image", lambda image, **kwargs: existing)
+
+    result = dc.start_dev_container("some-image", "new_name", mounts=[])
+    existing.remove.assert_called_once_with(force=True)
+    existing.start.assert_not_called()
+    assert result is not existing
+
+
+def test_anonymous_volume_names_are_deterministic(monkeypatch, patch_mount_and_docker):
+    first = dc._parse_mount_string("type=volume,target=/data", project="p1")
+    again = dc._parse_mount_dict({"type": "volume", "target": "/data"}, project="p1")
+    assert first.source == again.source == dc.anonymous_volume_name("p1", "/data")
+    assert dc._parse_mount_string("type=volume,target=/cache", project="p1").source != first.source
+    assert dc._parse_mount_string("type=volume,target=/data", project="p2").source != first.source
+
+
+def test_start_dev_container_applies_spec(monkeypatch, patch_mount_and_docker):
+    client = dc.docker.from_env()
+    monkeypatch.setattr(dc.docker, "from_env", lambda **kwargs: client)
+    monkeypatch.setattr(dc, "find_running_container_by_image", lambda image, **kwargs: None)
+    spec = dc.devcontainer_spec(
+        {"workspaceFolder": "/src", "containerEnv": {"MODE": "dev"}, "name": "My Box"}, "img", []
+    )
+    dc.start_dev_container("img", "new_name", mounts=[], spec=spec)
+    run = client.containers.run_calls[0]
+    assert run["environment"] == {"MODE": "dev"}
+    assert run["working_dir"] == "/src"
+    assert run["labels"][dc.SPEC_HASH_LABEL] == dc.spec_hash_of(spec)
+    assert dc.json.loads(run["labels"][dc.SPEC_LABEL])["name"] == "My Box"
+
+
+def test_find_running_container_prefers_matching_spec(monkeypatch, patch_mount_and_docker):
+    client = dc.docker.from_env()
+    monkeypatch.setattr(dc.docker, "from_env", lambda **kwargs: client)
+    drifted = MagicMock(status="running", labels={dc.SPEC_HASH_LABEL: "old"})
+    matching = MagicMock(status="exited", labels={dc.SPEC_HASH_LABEL: "new"})
+    client.containers.list_containers = [drifted, matching]
+    assert dc.find_running_container_by_image("img", project="p", spec_hash="new") is matching
+
+
 def test_start_dev_container_new(monkeypatch, patch_mount_and_docker):
-    monkeypatch.setattr(dc, "find_running_container_by_image", lambda image: None)
+    monkeypatch.setattr(dc, "find_running_container_by_image", lambda image, **kwargs: None)
     mounts = [DummyMount(target="/t", source="/s")]
     result = dc.start_dev_container("some-image", "new_name", mounts=mounts)
     assert result is not None
@@ -190,10 +352,46 @@ def test_start_dev_container_new(monkeypatch, patch_mount_and_docker):
     # --
 
 
+def test_start_dev_container_stamps_labels(monkeypatch, patch_mount_and_docker):
+    client = dc.docker.from_env()
+    monkeypatch.setattr(dc.docker, "from_env", lambda **kwargs: client)
+    monkeypatch.setattr(dc, "find_running_container_by_image", lambda image, **kwargs: None)
+    mounts = [DummyMount(target="/t", source="/s")]
+    dc.start_dev_container("some-image", "new_name", mounts=mounts)
+    labels = client.containers.run_calls[0]["labels"]
+    assert labels[dc.MANAGED_LABEL] == "true"
+    assert labels[dc.PROJECT_LABEL] == dc.project_hash()
+    assert labels[dc.IMAGE_LABEL] == "some-image"
+    assert labels[dc.SPEC_HASH_LABEL] == dc.compute_spec_hash("some-image", mounts)
+
+
+def test_compute_spec_hash_depends_on_mounts():
+    a = dc.compute_spec_hash("img", [DummyMount(target="/t", source="/s")])
+    b = dc.compute_spec_hash("img", [DummyMount(target="/t", source="/other")])
+    assert a != b
+    assert a == dc.compute_spec_hash("img", [DummyMount(target="/t", source="/s")])
+
+
+def test_find_running_container_uses_label_filter(monkeypatch, patch_mount_and_docker):
+    client = dc.docker.from_env()
+    monkeypatch.setattr(dc.docker, "from_env", lambda **kwargs: client)
+    exited = MagicMock(status="exited")
+    running = MagicMock(status="running")
+    client.containers.list_containers = [exited, running]
+
+    assert dc.find_running_container_by_image("img", project="abc") is running
+    labels = client.containers.list_filters["label"]
+    assert f"{dc.PROJECT_LABEL}=abc" in labels
+    assert f"{dc.IMAGE_LABEL}=img" in labels
+
+    client.containers.list_containers = []
+    assert dc.find_running_container_by_image("img", project="abc") is None
+
+
 def test_build_dev_container_invokes_build_and_start(monkeypatch, patch_mount_and_docker):
     # Avoid calling start_dev_container logic complexity; patch to track call
     called = {}
-    def fake_start(image_name, container_name, mounts):
+    def fake_start(image_name, container_name, mounts, **kwargs):
         called["image"] = image_name
         called["container_name"] = container_name
         called["mounts"] = mounts
@@ -202,12 +400,84 @@ def test_build_dev_container_invokes_build_and_start(monkeypatch, patch_mount_an
     monkeypatch.setattr(dc, "start_dev_container", fake_start)
     mounts = [DummyMount(target="/data", source="/host/data")]
     dc.build_dev_container("Dockerfile", "image-name-test", mounts)
-    client = dc.docker.from_env()
-    # Image build invocation assertion skipped (stub type may not expose build_calls)
     assert called["image"] == "image-name-test"
     assert called["mounts"] == mounts
 
 
+def _build_client(monkeypatch, labels=None):
+    """
+    Pin a single stub client so build calls and image labels can be inspected.
+    """
+    client = dc.docker.from_env()
+    client.images.labels = labels or {}
+    monkeypatch.setattr(dc.docker, "from_env", lambda **kwargs: client)
+    monkeypatch.setattr(dc, "start_dev_container", lambda image, name, mounts, **kwargs: None)
+    return client
+
+
+def test_compute_build_hash_tracks_context_changes(tmp_path):
+    tmp_path = tmp_path / "ctx"
+    tmp_path.mkdir()
+    (tmp_path / "Dockerfile").write_text("FROM alpine\n")
+    (tmp_path / "setup.sh").write_text("echo one\n")
+    first = dc.compute_build_hash(str(tmp_path), "Dockerfile", {"dockerfile": "Dockerfile"})
+    assert first == dc.compute_build_hash(str(tmp_path), "Dockerfile", {"dockerfile": "Dockerfile"})
+
+    (tmp_path / "setup.sh").write_text("echo two\n")
+    second = dc.compute_build_hash(str(tmp_path), "Dockerfile", {"dockerfile": "Dockerfile"})
+    assert second != first
+
+    with_args = dc.compute_build_hash(str(tmp_path), "Dockerfile", {"dockerfile": "Dockerfile", "args": {"A": "1"}})
+    assert with_args != second
+
+
+def test_build_dev_container_skips_when_hash_matches(monkeypatch, tmp_path, capsys):
+    tmp_path = tmp_path / "project"
+    (tmp_path / ".devcontainer").mkdir(parents=True)
+    (tmp_path / ".devcontainer" / "Dockerfile").write_text("FROM alpine\n")
+    monkeypatch.chdir(tmp_path)
+    build_hash = dc.compute_build_hash(str(tmp_path / ".devcontainer/"), "Dockerfile", None)
+    client = _build_client(monkeypatch, {"img": {dc.BUILD_HASH_LABEL: build_hash}})
+
+    dc.build_dev_container("Dockerfile", "img", [])
+    assert client.api.build_calls == []
+    assert "up to date" in capsys.readouterr().out
+
+    dc.build_dev_container("Dockerfile", "img", [], rebuild=True)
+    assert len(client.api.build_calls) == 1
+
+
+def test_build_dev_container_labels_built_image(monkeypatch, tmp_path):
+    tmp_path = tmp_path / "project"
+    (tmp_path / ".devcontainer").mkdir(parents=True)
+    (tmp_path / ".devcontainer" / "Dockerfile").write_text("FROM alpine\n")
+    monkeypatch.chdir(tmp_path)
+    client = _build_client(monkeypatch, {"img": {dc.BUILD_HASH_LABEL: "stale"}})
+
+    dc.build_dev_container("Dockerfile", "img", [])
+    assert len(client.api.build_calls) == 1
+    assert client.api.build_calls[0]["labels"][dc.BUILD_HASH_LABEL] != "stale"
+    assert client.api.build_calls[0]["decode"] is True
+
+
+def test_build_dev_container_reports_failure_tail(monkeypatch, tmp_path, capsys):
+    tmp_path = tmp_path / "project"
+    (tmp_path / ".devcontainer").mkdir(parents=True)
+    (tmp_path / ".devcontainer" / "Dockerfile").write_text("FROM alpine\n")
+    monkeypatch.chdir(tmp_path)
+    client = _build_client(monkeypatch)
+    client.api.build_stream = [
+        {"stream": "Step 1/1 : RUN false\n"},
+        {"stream": "boom happened\n"},
+        {"error": "returned a non-zero code: 1", "errorDetail": {"message": "returned a non-zero code: 1"}},
+    ]
+
+    dc.build_dev_container("Dockerfile", "img", [])
+    out = capsys.readouterr().out
+    assert "Failed to build image img: returned a non-zero code: 1" in out
+    assert "boom happened" in out
+
+
 # def test_stop_dev_container_success(monkeypatch, patch_mount_and_docker):
 #     stub_client = dc.docker.from_env()
 #     container = MagicMock()
@@ -217,11 +487,114 @@ def test_build_dev_container_invokes_build_and_start(monkeypatch, patch_mount_an
 #     container.stop.assert_called_once()
 
 
+def test_session_is_shared_across_calls(monkeypatch, patch_mount_and_docker):
+    created = []
+
+    def from_env(**kwargs):
+        created.append(kwargs)
+        return types.SimpleNamespace(images=None, containers=None)
+
+    monkeypatch.setattr(dc.docker, "from_env", from_env)
+    assert dc.current_session() is None
+    first = dc.get_session()
+    assert dc.get_session() is first
+    assert dc.current_session() is first
+    assert len(created) == 1
+
+
+def test_container_cli_cached_shell_skips_probe(monkeypatch, patch_mount_and_docker, capsys):
+    import subprocess
+
+    runs = []
+    monkeypatch.setattr(subprocess, "run", lambda cmd: runs.append(cmd))
+    monkeypatch.setattr(dc.attach, "can_attach_in_process", lambda: False)
+    cid = "c1" * 32
+    dc.attach.remember_shell("/bin/zsh", cid)
+
+    # containers.get on the stub raises: a cache hit by full ID must not inspect or probe
+    dc.container_cli(cid)
+    assert runs == [["docker", "exec", "-it", cid, "/bin/zsh"]]
+    assert "Using shell: /bin/zsh" in capsys.readouterr().out
+
+
+def test_find_shell_reprobes_a_recreated_container(monkeypatch):
+    old, new = types.SimpleNamespace(id="0a" * 32), types.SimpleNamespace(id="0b" * 32)
+    containers = {"devbox_app": old}
+    client = types.SimpleNamespace(containers=types.SimpleNamespace(get=lambda ref: containers[ref]))
+    probed = []
+    monkeypatch.setattr(dc.attach, "probe_shell", lambda c: probed.append(c) or ("/bin/bash" if c is old else "/bin/sh"))
+
+    assert dc.find_shell(client, "devbox_app") == "/bin/bash"
+    assert dc.find_shell(client, "devbox_app") == "/bin/bash"
+    # same name, new container without bash: the old container's shell is not reused
+    containers["devbox_app"] = new
+    assert dc.find_shell(client, "devbox_app") == "/bin/sh"
+    assert probed == [old, new]
+
+
 def test_stop_dev_container_not_found(patch_mount_and_docker, capsys):
     # No entry inserted, should print error
     dc.stop_dev_container("missing")
     captured = capsys.readouterr()
-    assert "An error occurred while stopping the container" in captured.out
+    assert "missing" in captured.out and "failed:" in captured.out
+    assert "Stopped 0/1 container(s)" in captured.out
+
+
+def test_stop_dev_container_uses_engine(monkeypatch, patch_mount_and_docker, capsys):
+    stopped = []
+
+    class FakeEngine:
+        async def stop_container(self, container_id, timeout=None):
+            stopped.append(container_id)
+
+        async def close(self):
+            pass
+
+    monkeypatch.setattr(dc.engine.Engine, "from_env", classmethod(lambda cls, **kwargs: FakeEngine()))
+    dc.stop_dev_container("cid")
+    assert stopped == ["cid"]
+    assert "Stopped 1/1 container(s)" in capsys.readouterr().out
+
+
+def test_stop_containers_by_project_concurrently(monkeypatch, patch_mount_and_docker, capsys):
+    import asyncio
+
+    calls = []
+
+    class FakeEngine:
+        async def list_containers(self, all=False, filters=None):
+            calls.append(("list", all, filters))
+            return [
+                {"Id": "a" * 64, "Names": ["/devbox_one"]},
+                {"Id": "b" * 64, "Names": ["/devbox_two"]},
+                {"Id": "c" * 64, "Names": ["/devbox_pool_x"]},
+            ]
+
+        async def stop_container(self, container_id, timeout=None):
+            calls.append(("stop", container_id[0], timeout))
+            await asyncio.sleep(0.2)
+
+        async def remove_container(self, container_id, force=False, volumes=False):
+            calls.append(("remove", container_id[0]))
+
+        async def close(self):
+            pass
+
+    monkeypatch.setattr(dc.engine.Engine, "from_env", classmethod(lambda cls, **kwargs: FakeEngine()))
+    results = dc.stop_containers(project=True, timeout=2, remove=True)
+    assert [label for label, error, _ in results] == ["devbox_one", "devbox_two"]
+    # both stops overlapped
+    assert all(secs < 0.35 for _, _, secs in results)
+    _, listed_all, filters = calls[0]
+    assert listed_all is True
+    assert f"{dc.PROJECT_LABEL}={dc.project_hash()}" in filters["label"]
+    assert sorted(c for c in calls[1:]) == [("remove", "a"), ("remove", "b"), ("stop", "a", 2), ("stop", "b", 2)]
+    assert "Stopped and removed 2/2 container(s)" in capsys.readouterr().out
+
+
+def test_stop_containers_requires_a_selection(patch_mount_and_docker, capsys):
+    assert dc.stop_containers() == []
+    assert "Nothing to stop" in capsys.readouterr().out
 
 
 def test_start_function_with_build(monkeypatch, patch_mount_and_docker, capsys):
@@ -231,7 +604,7 @@ def test_start_function_with_build(monkeypatch, patch_mount_and_docker, capsys):
         "mounts": ["source=/h,target=/c,type=bind"],
     }
     monkeypatch.setattr(dc, "get_devcontainer_json", lambda: devcjson)
-    monkeypatch.setattr(dc, "build_dev_container", lambda dfile, image, mounts: print(f"BUILD:{dfile}:{image}:{len(mounts)}"))
+    monkeypatch.setattr(dc, "build_dev_container", lambda dfile, image, mounts, **kwargs: print(f"BUILD:{dfile}:{image}:{len(mounts)}"))
     dc.start()
     out = capsys.readouterr().out
     assert "BUILD:Dockerfile" in out
@@ -241,7 +614,7 @@ def test_start_function_with_build(monkeypatch, patch_mount_and_docker, capsys):
 def test_start_function_with_image(monkeypatch, patch_mount_and_docker, capsys):
     devcjson = {"image": "my-image", "mounts": []}
     monkeypatch.setattr(dc, "get_devcontainer_json", lambda: devcjson)
-    monkeypatch.setattr(dc, "start_dev_container", lambda image, name, mounts: print(f"RUN:{image}:{name}:{len(mounts)}"))
+    monkeypatch.setattr(dc, "start_dev_container", lambda image, name, mounts, **kwargs: print(f"RUN:{image}:{name}:{len(mounts)}"))
     dc.start()
     out = capsys.readouterr().out
     assert "RUN:my-image:" in out
@@ -0,0 +1,146 @@
+import json
+import time
+import asyncio
+
+import pytest
+
+from devbox import engine
+
+
+class FakeDaemon:
+    """
+    Minimal Engine API over a unix socket: keep-alive, chunked and content-length responses.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connections = 0
+        self.requests = []
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_unix_server(self._handle, path=self.path)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            method, target, _ = line.decode().split(" ")
+            headers = {}
+            while (h := await reader.readline()) != b"\r\n":
+                k, _, v = h.decode().partition(":")
+                headers[k.lower()] = v.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            self.requests.append((method, target, body))
+            await self._respond(writer, method, target)
+        writer.close()
+
+    async def _respond(self, writer, method, target):
+        path = target.split("?")[0]
+        if path == "/version":
+            return self._send(writer, 200, {"ApiVersion": "1.45"})
+        if path.endswith("/stop"):
+            await asyncio.sleep(0.2)
+            return self._send(writer, 204, None)
+        if path == "/v1.45/containers/missing/json":
+            return self._send(writer, 404, {"message": "No such container: missing"})
+        if path.startswith("/v1.45/containers/") and path.endswith("/json"):
+            return self._send(writer, 200, {"Id": path.split("/")[3]}, chunked=True)
+        if path == "/v1.45/images/create":
+            lines = [{"status": "Pulling fs layer", "id": "a"}, {"status": "Download complete", "id": "a"}]
+            if "fromImage=bad" in target:
+                lines.append({"error": "manifest unknown"})
+            return self._send(writer, 200, lines, chunked=True)
+        self._send(writer, 404, {"message": "not found"})
+
+    def _send(self, writer, status, payload, chunked=False):
+        if isinstance(payload, list):
+            data = b"".join(json.dumps(p).encode() + b"\r\n" for p in payload)
+        else:
+            data = json.dumps(payload).encode() if payload is not None else b""
+        head = f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+        if status in (204, 304):
+            # dockerd sends these with neither Content-Length nor Transfer-Encoding
+            writer.write((head + "\r\n").encode())
+        elif chunked:
+            # split in two chunks to exercise chunk reassembly
+            half = len(data) // 2
+            body = b"".join(f"{len(c):x}\r\n".encode() + c + b"\r\n" for c in (data[:half], data[half:]) if c)
+            writer.write((head + "Transfer-Encoding: chunked\r\n\r\n").encode() + body + b"0\r\n\r\n")
+        else:
+            writer.write((head + f"Content-Length: {len(data)}\r\n\r\n").encode() + data)
+
+
+@pytest.fixture
+def socket_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "docker.sock")
+    monkeypatch.setenv("DOCKER_HOST", f"unix://{path}")
+    monkeypatch.delenv("DOCKER_API_VERSION", raising=False)
+    return path
+
+
+def _run(socket_path, fn):
+    async def main():
+        async with FakeDaemon(socket_path) as daemon:
+            eng = engine.Engine.from_env()
+            try:
+                return daemon, await fn(eng)
+            finally:
+                await eng.close()
+
+    return asyncio.run(main())
+
+
+def test_from_env_addresses(monkeypatch):
+    monkeypatch.setenv("DOCKER_HOST", "tcp://10.0.0.5:2375")
+    monkeypatch.delenv("DOCKER_TLS_VERIFY", raising=False)
+    assert engine.Engine.from_env().address == ("tcp", ("10.0.0.5", 2375))
+    monkeypatch.setenv("DOCKER_HOST", "ssh://me@box")
+    assert engine.Engine.from_env() is None
+
+
+def test_negotiates_version_and_reuses_connections(socket_path):
+    daemon, results = _run(socket_path, lambda e: e.inspect_containers(["a", "missing", "b"]))
+    assert results[0] == {"Id": "a"} and results[2] == {"Id": "b"}
+    assert isinstance(results[1], engine.EngineError) and results[1].status == 404
+    assert daemon.requests[0][1] == "/version"
+    # three inspects overlap on at most three connections, plus the version probe's
+    assert daemon.connections <= 4
+
+    daemon, _ = _run(socket_path, lambda e: e.inspect_container("a"))
+    # the negotiated version was pinned; no second probe
+    assert [r[1] for r in daemon.requests] == ["/v1.45/containers/a/json"]
+
+
+def test_stops_overlap(socket_path):
+    started = time.monotonic()
+    _, results = _run(socket_path, lambda e: e.stop_containers(["a", "b", "c", "d"], timeout=3))
+    assert results == [None] * 4
+    # each stop takes 0.2s in the fake daemon; serial would be 0.8s
+    assert time.monotonic() - started < 0.6
+
+
+def test_bodiless_replies_keep_the_connection(socket_path):
+    async def stop_twice(e):
+        await asyncio.wait_for(e.stop_container("a"), 2)
+        await asyncio.wait_for(e.stop_container("b"), 2)
+
+    daemon, _ = _run(socket_path, stop_twice)
+    # the version probe's connection serves both stops
+    assert daemon.connections == 1
+    assert [r[1] for r in daemon.requests][1:] == ["/v1.45/containers/a/stop", "/v1.45/containers/b/stop"]
+
+
+def test_pull_streams_progress_and_raises_embedded_errors(socket_path):
+    seen = []
+    _run(socket_path, lambda e: e.pull_image("alpine", "3.20", on_progress=seen.append))
+    assert [m["status"] for m in seen] == ["Pulling fs layer", "Download complete"]
+
+    with pytest.raises(engine.EngineError, match="manifest unknown"):
+        _run(socket_path, lambda e: e.pull_image("bad"))
@@ -0,0 +1,103 @@
+import json
+import tarfile
+import types
+
+import pytest
+
+from devbox import features
+
+
+def _feature(root, name, options=None, installs_after=None, script="echo install\n"):
+    root.mkdir(parents=True, exist_ok=True)
+    meta = {"id": name.rsplit("/", 1)[-1], "options": options or {}, "installsAfter": installs_after or []}
+    (root / "devcontainer-feature.json").write_text(json.dumps(meta))
+    (root / "install.sh").write_text(script)
+    return root
+
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    devcontainer = tmp_path / ".devcontainer"
+    _feature(devcontainer / "features" / "tooling", "tooling", installs_after=["ghcr.io/org/features/node"])
+    registry = tmp_path / "registry"
+    _feature(registry / "ghcr.io/org/features/node/1", "node", options={"version": {"default": "lts"}})
+    monkeypatch.setenv("DEVBOX_FEATURES_PATH", str(registry))
+    return devcontainer
+
+
+def test_resolve_locates_and_orders_features(config_dir):
+    devcjson = {"features": {"./features/tooling": {}, "ghcr.io/org/features/node:1": {"install-tools": True}}}
+    resolved = features.resolve(devcjson, str(config_dir))
+
+    # tooling installsAfter node
+    assert [f["ref"] for f in resolved] == ["ghcr.io/org/features/node:1", "./features/tooling"]
+    assert resolved[0]["options"] == {"version": "lts", "install-tools": True}
+    assert features.env_name("install-tools") == "INSTALL_TOOLS"
+
+    devcjson["overrideFeatureInstallOrder"] = ["./features/tooling"]
+    assert [f["ref"] for f in features.resolve(devcjson, str(config_dir))][0] == "./features/tooling"
+
+
+def test_resolve_reports_missing_feature(config_dir):
+    with pytest.raises(features.FeatureError, match="not found in local feature registries"):
+        features.resolve({"features": {"ghcr.io/org/features/go:1": {}}}, str(config_dir))
+
+
+def test_build_context_passes_options_and_restores_user(config_dir):
+    (feature,) = features.resolve({"features": {"ghcr.io/org/features/node:1": "20"}}, str(config_dir))
+    with tarfile.open(fileobj=features.build_context("base:1", feature, "vscode")) as tar:
+        names = tar.getnames()
+        dockerfile = tar.extractfile("Dockerfile").read().decode()
+        env = tar.extractfile("feature/devbox-feature.env").read().decode()
+    assert "feature/install.sh" in names
+    assert dockerfile.startswith("FROM base:1\nUSER root\n")
+    assert dockerfile.endswith("USER vscode\n")
+    assert env == "VERSION=20\n"
+
+
+class FakeClient:
+    def __init__(self):
+        self.built = []
+        self.tags = {}
+        self.api = types.SimpleNamespace(
+            inspect_image=lambda ref: {"Id": "sha256:base", "Config": {"User": ""}},
+            build=self.build,
+            tag=lambda src, repo, tag: self.tags.__setitem__(f"{repo}:{tag}", src),
+        )
+        self.images = types.SimpleNamespace(get=self.get)
+        self.labels = {}
+
+    def build(self, fileobj, tag, labels, **kwargs):
+        with tarfile.open(fileobj=fileobj) as tar:
+            parent = tar.extractfile("Dockerfile").read().decode().splitlines()[0].split()[1]
+        self.built.append((labels[features.FEATURE_LABEL], parent))
+        self.labels[tag] = labels
+        yield {"stream": "Step 1/1 : RUN install\n"}
+
+    def get(self, ref):
+        if ref not in self.labels:
+            raise Exception("No such image")
+        return types.SimpleNamespace(labels=self.labels[ref])
+
+
+def test_apply_reuses_layers_below_a_change(config_dir, capsys):
+    devcjson = {"features": {"ghcr.io/org/features/node:1": {}, "./features/tooling": {}}}
+    client = FakeClient()
+
+    assert features.apply(client, "base:1", features.resolve(devcjson, str(config_dir)), "devbox_features_p")
+    first = [parent for _, parent in client.built]
+    assert [ref for ref, _ in client.built] == ["ghcr.io/org/features/node:1", "./features/tooling"]
+    assert first[0] == "base:1" and first[1].startswith("devbox-features:")
+    assert client.tags["devbox_features_p:latest"].startswith("devbox-features:")
+
+    client.built.clear()
+    features.apply(client, "base:1", features.resolve(devcjson, str(config_dir)), "devbox_features_p")
+    assert client.built == []
+    assert "2 layer(s) cached, 0 built" in capsys.readouterr().out
+
+    (config_dir / "features" / "tooling" / "install.sh").write_text("echo changed\n")
+    features.apply(client, "base:1", features.resolve(devcjson, str(config_dir)), "devbox_features_p")
+    assert client.built == [("./features/tooling", first[1])]
+    out = capsys.readouterr().out
+    assert "1. ghcr.io/org/features/node:1  HIT" in out
+    assert "2. ./features/tooling           BUILD" in out
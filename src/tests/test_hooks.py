@@ -0,0 +1,125 @@
+import time
+import types
+
+from devbox import hooks
+
+
+class FakeAPI:
+    """
+    Exec API of one container: hook state files live in self.files, other commands are recorded.
+    """
+
+    def __init__(self, fail=()):
+        self.files = {}
+        self.ran = []
+        self.fail = set(fail)
+        self.execs = {}
+
+    def exec_create(self, container_id, argv, workdir=None):
+        exec_id = str(len(self.execs))
+        self.execs[exec_id] = (argv, workdir)
+        return {"Id": exec_id}
+
+    def exec_start(self, exec_id, stream=False):
+        argv, workdir = self.execs[exec_id]
+        script = argv[-1]
+        if script.startswith("for f in"):
+            yield "".join(f"{k} {v}\n" for k, v in self.files.items()).encode()
+        elif script.startswith("mkdir -p"):
+            value, path = script.split("printf %s ", 1)[1].split(" > ")
+            self.files[path.rsplit("/", 1)[1]] = value.strip("'")
+        else:
+            self.ran.append((script, workdir))
+            time.sleep(0.05)
+            yield f"ran {script}\npartial".encode()
+
+    def exec_inspect(self, exec_id):
+        argv, _ = self.execs[exec_id]
+        return {"ExitCode": 1 if argv[-1] in self.fail else 0}
+
+
+def _container(api, started="2026-01-01T00:00:00Z"):
+    container = types.SimpleNamespace(id="c1", attrs={"State": {"StartedAt": started}})
+    container.reload = lambda: None
+    return types.SimpleNamespace(api=api), container
+
+
+def test_commands_normalizes_forms():
+    devcjson = {
+        "postCreateCommand": {"a": "make deps", "b": ["npm", "ci"]},
+        "onCreateCommand": "echo hi",
+        "postStartCommand": 3,
+    }
+    assert hooks.commands(devcjson) == [
+        ("onCreateCommand", {"": ["/bin/sh", "-c", "echo hi"]}),
+        ("postCreateCommand", {"a": ["/bin/sh", "-c", "make deps"], "b": ["npm", "ci"]}),
+    ]
+
+
+def test_hooks_run_once_until_inputs_change(tmp_path, capsys):
+    (tmp_path / "requirements.txt").write_text("requests\n")
+    devcjson = {
+        "onCreateCommand": "setup",
+        "postCreateCommand": "pip install -r requirements.txt",
+        "customizations": {"devbox": {"hookInputs": {"postCreateCommand": ["requirements.txt"]}}},
+    }
+    api = FakeAPI()
+    client, container = _container(api)
+
+    assert hooks.run_lifecycle(client, container, devcjson, str(tmp_path), "/workspace")
+    assert api.ran == [("setup", "/workspace"), ("pip install -r requirements.txt", "/workspace")]
+    assert "[onCreateCommand] ran setup" in capsys.readouterr().out
+
+    api.ran.clear()
+    execs = len(api.execs)
+    assert hooks.run_lifecycle(client, container, devcjson, str(tmp_path), "/workspace")
+    assert api.ran == [] and len(api.execs) == execs
+    assert "Lifecycle hooks are up to date." in capsys.readouterr().out
+
+    (tmp_path / "requirements.txt").write_text("requests\nrich\n")
+    hooks.run_lifecycle(client, container, devcjson, str(tmp_path), "/workspace")
+    assert api.ran == [("pip install -r requirements.txt", "/workspace")]
+
+
+def test_state_recorded_in_container_is_used_on_host_miss(tmp_path):
+    devcjson = {"postCreateCommand": "slow setup"}
+    api = FakeAPI()
+    client, container = _container(api)
+    hooks.run_lifecycle(client, container, devcjson, str(tmp_path))
+
+    # e.g. a container created from a snapshot: same recorded files, unknown ID
+    snapshot_api = FakeAPI()
+    snapshot_api.files = dict(api.files)
+    client, container = _container(snapshot_api)
+    container.id = "c2"
+    hooks.run_lifecycle(client, container, devcjson, str(tmp_path))
+    assert snapshot_api.ran == []
+
+
+def test_post_start_reruns_after_restart(tmp_path):
+    devcjson = {"postStartCommand": "serve"}
+    api = FakeAPI()
+    client, container = _container(api)
+    hooks.run_lifecycle(client, container, devcjson, str(tmp_path))
+    hooks.run_lifecycle(client, container, devcjson, str(tmp_path))
+    container.attrs["State"]["StartedAt"] = "2026-01-02T00:00:00Z"
+    hooks.run_lifecycle(client, container, devcjson, str(tmp_path))
+    assert [script for script, _ in api.ran] == ["serve", "serve"]
+
+
+def test_object_entries_run_in_parallel_and_failure_stops_chain(tmp_path, capsys):
+    devcjson = {
+        "postCreateCommand": {"a": "one", "b": "two", "c": "three"},
+        "postStartCommand": "never",
+    }
+    api = FakeAPI(fail={"two"})
+    client, container = _container(api)
+
+    started = time.monotonic()
+    assert not hooks.run_lifecycle(client, container, devcjson, str(tmp_path))
+    assert time.monotonic() - started < 0.14
+    assert sorted(script for script, _ in api.ran) == ["one", "three", "two"]
+    assert "postCreateCommand" not in api.files
+    out = capsys.readouterr().out
+    assert "[postCreateCommand:b] exited with code 1" in out
+    assert "skipping the remaining hooks" in out
@@ -0,0 +1,171 @@
+import os
+import types
+from unittest.mock import MagicMock
+
+import pytest
+
+from devbox import devcontainer as dc
+from devbox import multi
+from devbox.utils import find_all_devcontainer_configs
+
+
+def _write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+@pytest.fixture
+def monorepo(tmp_path):
+    root = tmp_path / "repo"
+    build = '{"build": {"dockerfile": "Dockerfile"}}'
+    _write(root / ".devcontainer" / "devcontainer.json", '{"image": "python:3.12"}')
+    for name in ("api", "worker"):
+        _write(root / ".devcontainer" / name / "devcontainer.json", build)
+        _write(root / ".devcontainer" / name / "Dockerfile", "FROM node:20 AS base\nFROM base\n")
+    _write(root / "svc" / ".devcontainer" / "devcontainer.json", build)
+    _write(root / "svc" / ".devcontainer" / "Dockerfile", "FROM python:3.12\nRUN pip install x\n")
+    _write(root / "node_modules" / "pkg" / ".devcontainer" / "devcontainer.json", build)
+    return root
+
+
+def test_find_all_devcontainer_configs(monorepo):
+    found = [os.path.relpath(p, monorepo) for p in find_all_devcontainer_configs(str(monorepo))]
+    assert found == [
+        ".devcontainer/devcontainer.json",
+        ".devcontainer/api/devcontainer.json",
+        ".devcontainer/worker/devcontainer.json",
+        "svc/.devcontainer/devcontainer.json",
+    ]
+
+
+def test_base_images_skips_stages_and_args(tmp_path):
+    dockerfile = tmp_path / "Dockerfile"
+    dockerfile.write_text(
+        "ARG V=1\nFROM --platform=linux/amd64 golang:1.22 AS build\nFROM build\n"
+        "FROM alpine:${V}\nFROM scratch\nFROM debian:12\n"
+    )
+    assert multi.base_images(str(dockerfile)) == ["golang:1.22", "debian:12"]
+
+
+def test_start_all_dedups_builds_and_pulls(monorepo, monkeypatch, capsys):
+    api = MagicMock()
+    images = MagicMock()
+    images.get.side_effect = Exception("missing")
+    session = types.SimpleNamespace(client=types.SimpleNamespace(api=api, images=images))
+    builds, starts = [], []
+
+    monkeypatch.setattr(dc, "docker", object())
+    monkeypatch.setattr(dc, "Mount", lambda **kwargs: types.SimpleNamespace(**kwargs))
+    monkeypatch.setattr(dc, "get_session", lambda: session)
+    monkeypatch.setattr(multi.pull.engine.Engine, "from_env", classmethod(lambda cls, **kwargs: None))
+    monkeypatch.setattr(dc, "image_is_current", lambda client, name, build_hash: False)
+    monkeypatch.setattr(dc, "build_image", lambda context, name, build_hash, **kwargs: builds.append(name))
+
+    def fake_start(image, name, mounts, **kwargs):
+        starts.append((image, kwargs["project"]))
+        return types.SimpleNamespace(name=name)
+
+    monkeypatch.setattr(dc, "start_dev_container", fake_start)
+
+    multi.start_all(str(monorepo), jobs=3)
+
+    # api and worker share identical build inputs: one build plus one tag
+    assert len(builds) == 2
+    api.tag.assert_called_once()
+    pulled = sorted(call.args[0] for call in api.pull.call_args_list)
+    assert pulled == ["node", "python"]
+    assert len(starts) == 4
+    assert len({project for _, project in starts}) == 4
+    out = capsys.readouterr().out
+    assert "Total: 4 config(s)" in out
+
+
+
+def test_plan_config_keeps_anonymous_volume_names(tmp_path, monkeypatch):
+    project = tmp_path / "app"
+    config = project / ".devcontainer" / "devcontainer.json"
+    _write(config, '{"image": "python:3.12", "mounts": ["type=volume,target=/data"]}')
+    monkeypatch.setattr(dc, "docker", object())
+    monkeypatch.setattr(dc, "Mount", lambda **kwargs: types.SimpleNamespace(**kwargs))
+    monkeypatch.setattr(dc, "_project_config", None)
+
+    def data_source(plan):
+        (mount,) = [m for m in plan["mounts"] if m.target == "/data"]
+        return mount.source
+
+    first = multi.plan_config(str(config), str(tmp_path))
+    second = multi.plan_config(str(config), str(tmp_path))
+    assert data_source(first) == data_source(second)
+    # `devbox start` in the project reads the same cache entry
+    monkeypatch.chdir(project)
+    (mount,) = dc.load_project_config()["mounts"]
+    assert mount["source"] == data_source(first)
+
+
+def test_plan_config_survives_a_config_cache_miss(tmp_path, monkeypatch):
+    project = tmp_path / "app"
+    config = project / ".devcontainer" / "devcontainer.json"
+    _write(config, '{"image": "python:3.12", "mounts": ["type=volume,target=/data"]}')
+    monkeypatch.setattr(dc, "docker", object())
+    monkeypatch.setattr(dc, "Mount", lambda **kwargs: types.SimpleNamespace(**kwargs))
+    monkeypatch.setattr(dc, "_project_config", None)
+
+    def spec_of(plan):
+        return dc.devcontainer_spec(plan["devcjson"], plan["image_name"], plan["mounts"], plan["features"], plan["resources"])
+
+    first = multi.plan_config(str(config), str(tmp_path))
+    # a new file in the project root invalidates the cached entry
+    _write(project / "notes.txt", "x")
+    os.utime(project, (0, 0))
+    dc.configcache._memory.clear()
+    assert dc.configcache.load(str(project)) is None
+    second = multi.plan_config(str(config), str(tmp_path))
+    assert dc.spec_hash_of(spec_of(first)) == dc.spec_hash_of(spec_of(second))
+
+
+def test_start_all_syncs_volume_workspaces(tmp_path, monkeypatch):
+    project = tmp_path / "app"
+    config = project / ".devcontainer" / "devcontainer.json"
+    _write(config, '{"image": "python:3.12", "customizations": {"devbox": {"workspaceMode": "volume"}}}')
+    monkeypatch.setattr(dc, "docker", object())
+    monkeypatch.setattr(dc, "Mount", lambda **kwargs: types.SimpleNamespace(**kwargs))
+    monkeypatch.setattr(multi.sync, "workspace_volume_mount", lambda project, folder: types.SimpleNamespace(
+        source=multi.sync.volume_name(project), target=folder, type="volume"))
+    synced = []
+    monkeypatch.setattr(dc, "start_workspace_sync", lambda container, folder, options, root=None: synced.append(root))
+    monkeypatch.setattr(dc, "start_dev_container", lambda image, name, mounts, **kwargs: types.SimpleNamespace(name=name))
+    monkeypatch.setattr(multi.hooks, "run_lifecycle", lambda *args: None)
+
+    plan = multi.plan_config(str(config), str(tmp_path))
+    # same workspace volume `devbox start` mounts, not a bind mount of the project
+    (ws,) = [m for m in plan["mounts"] if m.target == "/workspace"]
+    assert (ws.type, ws.source) == ("volume", multi.sync.volume_name(dc.project_hash(str(project))))
+
+    multi._start_one(plan, types.SimpleNamespace(client=None))
+    assert synced == [str(project)]
+
+
+def test_start_all_reports_a_failing_config_and_continues(monorepo, monkeypatch, capsys):
+    images = MagicMock()
+    images.get.side_effect = Exception("missing")
+    session = types.SimpleNamespace(client=types.SimpleNamespace(api=MagicMock(), images=images))
+    monkeypatch.setattr(dc, "docker", object())
+    monkeypatch.setattr(dc, "Mount", lambda **kwargs: types.SimpleNamespace(**kwargs))
+    monkeypatch.setattr(dc, "get_session", lambda: session)
+    monkeypatch.setattr(multi.pull.engine.Engine, "from_env", classmethod(lambda cls, **kwargs: None))
+    monkeypatch.setattr(dc, "image_is_current", lambda client, name, build_hash: False)
+    monkeypatch.setattr(dc, "build_image", lambda context, name, build_hash, **kwargs: None)
+
+    def fake_start(image, name, mounts, **kwargs):
+        if "svc" in image:
+            raise RuntimeError("daemon said no")
+        return types.SimpleNamespace(name=name)
+
+    monkeypatch.setattr(dc, "start_dev_container", fake_start)
+
+    multi.start_all(str(monorepo), jobs=3)
+
+    out = capsys.readouterr().out
+    assert "start failed: daemon said no" in out
+    assert out.count("running devbox_") == 3
+    assert "Total: 4 config(s)" in out
@@ -0,0 +1,95 @@
+import types
+from unittest.mock import MagicMock
+
+from devbox import devcontainer as dc
+from devbox import pool
+
+
+LABELS = {
+    dc.MANAGED_LABEL: "true",
+    dc.PROJECT_LABEL: "proj",
+    dc.IMAGE_LABEL: "img",
+    dc.SPEC_HASH_LABEL: "spec1",
+}
+
+
+def _member(name, status="paused", spec="spec1", image_id="sha256:new"):
+    c = MagicMock()
+    c.name = name
+    c.status = status
+    c.labels = dict(LABELS, **{dc.SPEC_HASH_LABEL: spec, pool.IMAGE_ID_LABEL: image_id, pool.POOL_LABEL: "true"})
+    return c
+
+
+def _client(containers):
+    client = MagicMock()
+    client.containers.list.return_value = containers
+    return client
+
+
+def test_pool_config_forms():
+    assert pool.pool_config({}) == {"size": 0, "mode": "paused"}
+    assert pool.pool_config({"warmPool": 2}) == {"size": 2, "mode": "paused"}
+    assert pool.pool_config({"warmPool": {"size": 1, "mode": "stopped"}}) == {"size": 1, "mode": "stopped"}
+    assert pool.pool_config({"warmPool": {"size": 1, "mode": "bogus"}})["mode"] == "paused"
+
+
+def test_claim_unpauses_and_renames():
+    member = _member("devbox_pool_abc")
+    client = _client([member])
+    claimed = pool.claim(client, LABELS, "sha256:new", "devbox_wanted")
+    assert claimed is member
+    member.unpause.assert_called_once()
+    member.rename.assert_called_once_with("devbox_wanted")
+    filters = client.containers.list.call_args.kwargs["filters"]
+    assert f"{pool.POOL_LABEL}=true" in filters["label"]
+
+
+def test_claim_evicts_stale_members():
+    old_image = _member("devbox_pool_old", image_id="sha256:old")
+    other_spec = _member("devbox_pool_spec", spec="spec2")
+    client = _client([old_image, other_spec])
+    assert pool.claim(client, LABELS, "sha256:new", "devbox_wanted") is None
+    old_image.remove.assert_called_once_with(force=True)
+    other_spec.remove.assert_called_once_with(force=True)
+
+
+def test_fill_creates_missing_members():
+    client = _client([_member("devbox_pool_abc")])
+    created = MagicMock()
+    client.containers.create.return_value = created
+    run_kwargs = {"image": "img", "name": "x", "detach": True, "tty": True, "labels": LABELS}
+
+    assert pool.fill(client, run_kwargs, "sha256:new", {"size": 3, "mode": "paused"}) == 2
+    kwargs = client.containers.create.call_args.kwargs
+    assert kwargs["name"].startswith(pool.POOL_PREFIX)
+    assert "detach" not in kwargs
+    assert kwargs["labels"][pool.IMAGE_ID_LABEL] == "sha256:new"
+    created.pause.assert_called()
+
+
+def test_find_running_container_ignores_pool_members(monkeypatch):
+    running = MagicMock(status="running")
+    running.name = "devbox_real"
+    session = types.SimpleNamespace(client=_client([_member("devbox_pool_x", status="running"), running]))
+    monkeypatch.setattr(dc, "docker", object())
+    assert dc.find_running_container_by_image("img", project="proj", session=session) is running
+
+
+def test_start_dev_container_claims_from_pool(monkeypatch):
+    member = _member("devbox_pool_abc")
+    client = _client([member])
+    client.images.get.return_value = types.SimpleNamespace(id="sha256:new")
+    refills = []
+    monkeypatch.setattr(dc, "docker", types.SimpleNamespace(errors=types.SimpleNamespace(ImageNotFound=KeyError)))
+    monkeypatch.setattr(dc, "find_running_container_by_image", lambda image, **kwargs: None)
+    monkeypatch.setattr(dc, "spec_hash_of", lambda spec: "spec1")
+    monkeypatch.setattr(pool, "refill_in_background", lambda *args: refills.append(args))
+
+    result = dc.start_dev_container(
+        "img", "devbox_wanted", [], session=types.SimpleNamespace(client=client),
+        project="proj", pool={"size": 1, "mode": "paused"},
+    )
+    assert result is member
+    client.containers.run.assert_not_called()
+    assert len(refills) == 1
@@ -0,0 +1,94 @@
+import types
+import asyncio
+
+import pytest
+
+from devbox import devcontainer as dc
+from devbox import engine, pull
+
+
+def test_split_ref():
+    assert pull.split_ref("python:3.12") == ("python", "3.12")
+    assert pull.split_ref("localhost:5000/app") == ("localhost:5000/app", None)
+    assert pull.split_ref("alpine@sha256:abc") == ("alpine@sha256:abc", None)
+    assert pull.split_ref("node") == ("node", None)
+
+
+def test_progress_reports_layers_and_totals():
+    lines = []
+    now = [0.0]
+    progress = pull.PullProgress("python:3.12", out=lines.append, clock=lambda: now[0], interval=1.0)
+    progress.feed({"status": "Pulling from library/python", "id": "3.12"})
+    progress.feed({"status": "Already exists", "id": "aaa"})
+    now[0] = 1.5
+    progress.feed({"status": "Downloading", "id": "bbb", "progressDetail": {"current": 1_000_000, "total": 4_000_000}})
+    progress.feed({"status": "Pull complete", "id": "bbb"})
+    progress.feed({"status": "Digest: sha256:123"})
+    now[0] = 3.0
+    progress.report()
+
+    assert lines == [
+        "  [python:3.12] aaa: Already exists",
+        "  [python:3.12] 1/2 layers, 1.0 MB / 4.0 MB",
+        "  [python:3.12] bbb: Pull complete (4.0 MB)",
+        "Pulled python:3.12: 2 layer(s), 4.0 MB in 3.0s",
+    ]
+    assert progress.digest == "sha256:123"
+
+
+def test_progress_raises_on_stream_error():
+    progress = pull.PullProgress("nope:1", out=lambda line: None)
+    with pytest.raises(engine.EngineError, match="manifest unknown"):
+        progress.feed({"error": "failed", "errorDetail": {"message": "manifest unknown"}})
+
+
+def test_pull_all_dedups_and_skips_present(monkeypatch):
+    pulled = []
+
+    class FakeEngine:
+        async def inspect_images(self, refs):
+            return [{"Id": "sha256:1"} if ref == "python:3.12" else None for ref in refs]
+
+        async def pull_image(self, repo, tag=None, on_progress=None, auth=None):
+            await asyncio.sleep(0)
+            pulled.append((repo, tag))
+            if repo == "broken":
+                raise engine.EngineError(404, "not found")
+            on_progress({"status": "Pull complete", "id": "layer"})
+
+        async def close(self):
+            pass
+
+    monkeypatch.setattr(engine.Engine, "from_env", classmethod(lambda cls, **kwargs: FakeEngine()))
+    results = pull.pull_all(["python:3.12", "node:20", "node:20", "broken"])
+
+    assert sorted(pulled) == [("broken", None), ("node", "20")]
+    assert results == {"python:3.12": True, "node:20": True, "broken": False}
+
+
+def test_start_pulls_missing_image(monkeypatch, capsys):
+    class ImageNotFound(Exception):
+        pass
+
+    attempts = []
+
+    def run(**kwargs):
+        attempts.append(kwargs["image"])
+        if len(attempts) == 1:
+            raise ImageNotFound(kwargs["image"])
+        return types.SimpleNamespace(id="c1", name=kwargs["name"])
+
+    client = types.SimpleNamespace(containers=types.SimpleNamespace(run=run))
+    session = types.SimpleNamespace(client=client)
+    pulls = []
+
+    monkeypatch.setattr(dc, "docker", types.SimpleNamespace(errors=types.SimpleNamespace(ImageNotFound=ImageNotFound)))
+    monkeypatch.setattr(dc, "find_running_container_by_image", lambda *args, **kwargs: None)
+    monkeypatch.setattr(dc.pull, "pull_image", lambda ref, session=None: pulls.append(ref) or True)
+
+    container = dc.start_dev_container("python:3.12", "devbox_x", [], session=session, project="p")
+
+    assert container.id == "c1"
+    assert pulls == ["python:3.12"]
+    assert attempts == ["python:3.12", "python:3.12"]
+    assert "not found locally; pulling it" in capsys.readouterr().out
@@ -0,0 +1,87 @@
+import sys
+import time
+
+from devbox import registry
+from devbox.labels import IMAGE_LABEL, MANAGED_LABEL, PROJECT_LABEL, SPEC_HASH_LABEL
+
+LABELS = {MANAGED_LABEL: "true", PROJECT_LABEL: "proj1", IMAGE_LABEL: "app:1", SPEC_HASH_LABEL: "abc"}
+
+
+def _listed(container_id, name, state="running", created=1):
+    return {"Id": container_id, "Names": [f"/{name}"], "State": state, "Created": created, "Labels": LABELS}
+
+
+def _event(action, container_id, name, labels=LABELS, when=5):
+    return {"Type": "container", "Action": action, "time": when, "Actor": {"ID": container_id, "Attributes": dict(labels, name=name)}}
+
+
+def test_refresh_reconciles_then_replays_events(capsys):
+    listings = []
+    replays = []
+
+    def list_managed():
+        listings.append(1)
+        return [_listed("c1", "devbox_a"), _listed("c2", "devbox_pool_x", state="paused")]
+
+    index = registry.refresh(list_managed=list_managed, events=None)
+    assert listings == [1] and set(index["containers"]) == {"c1", "c2"}
+
+    def events(since, until):
+        replays.append((since, until))
+        return [
+            _event("create", "c3", "devbox_b", when=7),
+            _event("start", "c3", "devbox_b"),
+            _event("die", "c1", "devbox_a"),
+            _event("rename", "c2", "devbox_claimed"),
+            _event("exec_start: /bin/sh", "c2", "devbox_claimed"),
+            _event("start", "c9", "other", labels={}),
+            _event("destroy", "c1", "devbox_a"),
+        ]
+
+    synced = index["synced"]
+    index = registry.refresh(list_managed=list_managed, events=events)
+    assert listings == [1]
+    assert replays == [(synced - registry.EVENT_OVERLAP, index["synced"])]
+    assert registry.load() == index
+    rows = registry.select(index)
+    assert [(r["id"], r["name"], r["state"]) for r in rows] == [("c3", "devbox_b", "running"), ("c2", "devbox_claimed", "paused")]
+    assert registry.select(index, project="other") == []
+
+
+def test_refresh_rescans_when_events_may_be_lost(monkeypatch):
+    monkeypatch.setattr(registry, "RECONCILE_INTERVAL", 600)
+    listings = []
+
+    def list_managed():
+        listings.append(1)
+        return [_listed("c1", "devbox_a")]
+
+    registry.refresh(list_managed=list_managed)
+    registry.refresh(list_managed=list_managed, events=lambda since, until: [_event("start", "c1", "devbox_a")] * registry.EVENTS_BACKLOG)
+
+    def failing(since, until):
+        raise OSError("connection refused")
+
+    registry.refresh(list_managed=list_managed, events=failing)
+    registry.refresh(force=True, list_managed=list_managed)
+    index = registry.load()
+    index["reconciled"] = time.time() - 601
+    registry.save(index)
+    registry.refresh(list_managed=list_managed, events=None)
+    assert len(listings) == 5
+
+
+def test_list_command_does_not_import_docker(monkeypatch, capsys):
+    from typer.testing import CliRunner
+
+    from devbox.cli import app
+
+    monkeypatch.setattr(registry, "_list_managed", lambda: [_listed("c1" * 20, "devbox_a")])
+    monkeypatch.delitem(sys.modules, "devbox.devcontainer", raising=False)
+
+    result = CliRunner().invoke(app, ["list"])
+
+    assert result.exit_code == 0
+    assert "CONTAINER ID  NAME      STATE    PROJECT  IMAGE" in result.output
+    assert "c1c1c1c1c1c1  devbox_a  running  proj1    app:1" in result.output
+    assert "devbox.devcontainer" not in sys.modules
@@ -0,0 +1,69 @@
+import types
+
+from devbox import devcontainer as dc
+from devbox import resources
+
+GIB = 1024 ** 3
+
+
+def test_parse_run_args_both_forms(capsys):
+    settings = resources.parse_run_args(
+        ["--cpus=2.5", "--memory", "4g", "--shm-size=1g", "--ulimit", "nofile=1024:65536", "--tmpfs", "/run:size=64m", "--init", "--network=host"]
+    )
+    assert settings == {
+        "cpus": 2.5,
+        "memory": 4 * GIB,
+        "shm_size": GIB,
+        "ulimits": {"nofile": "1024:65536"},
+        "tmpfs": {"/run": "size=64m"},
+        "init": True,
+    }
+    assert "Ignoring unsupported runArgs entry: --network=host" in capsys.readouterr().out
+
+
+def test_auto_sizing_from_host_and_requirements(capsys):
+    host = {"NCPU": 8, "MemTotal": 16 * GIB}
+    settings = resources.resolve({"hostRequirements": {"cpus": 4, "memory": "8gb"}}, lambda: host)
+    assert settings == {"cpus": 7.0, "memory": 12 * GIB, "shm_size": 2 * GIB}
+
+    small = {"NCPU": 2, "MemTotal": 4 * GIB}
+    settings = resources.resolve({"hostRequirements": {"cpus": 4, "memory": "8gb"}}, lambda: small)
+    assert settings["cpus"] == 2.0 and settings["memory"] == 4 * GIB
+    out = capsys.readouterr().out
+    assert "Host has 2 CPU(s); devcontainer.json requires 4." in out
+
+
+def test_explicit_settings_win_and_info_is_lazy():
+    calls = []
+    devcjson = {"runArgs": ["--cpus", "1"], "customizations": {"devbox": {"resources": {"cpus": "auto", "shmSize": "512m"}}}}
+    settings = resources.resolve(devcjson, lambda: calls.append(1) or {"NCPU": 16})
+    assert settings == {"cpus": 1.0, "shm_size": 512 * 1024 ** 2}
+    assert calls == [1]
+
+    resources.resolve({"runArgs": ["--cpus", "1"]}, lambda: calls.append(1))
+    assert calls == [1]
+
+
+def test_run_kwargs():
+    kwargs = resources.run_kwargs({"cpus": 1.5, "memory": GIB, "ulimits": {"nofile": "unlimited"}, "init": True})
+    assert kwargs["nano_cpus"] == 1_500_000_000
+    assert kwargs["mem_limit"] == GIB
+    assert kwargs["init"] is True
+    ((ulimit),) = kwargs["ulimits"]
+    assert (ulimit.name, ulimit.soft, ulimit.hard) == ("nofile", -1, -1)
+
+
+def test_start_dev_container_applies_resources(monkeypatch):
+    created = []
+    client = types.SimpleNamespace(
+        containers=types.SimpleNamespace(run=lambda **kwargs: created.append(kwargs) or types.SimpleNamespace(id="c", name="n")),
+        images=types.SimpleNamespace(list=lambda **kwargs: []),
+    )
+    monkeypatch.setattr(dc, "docker", types.SimpleNamespace(errors=types.SimpleNamespace(ImageNotFound=KeyError)))
+    monkeypatch.setattr(dc, "find_running_container_by_image", lambda *args, **kwargs: None)
+    spec = dc.devcontainer_spec({}, "app:1", [], resource_settings={"shm_size": GIB})
+
+    dc.start_dev_container("app:1", "n", [], session=types.SimpleNamespace(client=client), project="p", spec=spec)
+
+    assert created[0]["shm_size"] == GIB
+    assert created[0]["labels"][dc.SPEC_HASH_LABEL] == dc.spec_hash_of(spec)
@@ -0,0 +1,47 @@
+import types
+
+from devbox import session as sess
+
+
+class FakeAPI:
+    def __init__(self, api_version="1.45"):
+        self.api_version = api_version
+        self.hooks = {"response": []}
+
+
+def _response(method, url):
+    return types.SimpleNamespace(request=types.SimpleNamespace(method=method, url=url))
+
+
+def test_create_pins_negotiated_version(monkeypatch):
+    monkeypatch.delenv("DOCKER_API_VERSION", raising=False)
+    calls = []
+
+    def from_env(**kwargs):
+        calls.append(kwargs)
+        return types.SimpleNamespace(api=FakeAPI())
+
+    sess.DockerSession.create(from_env)
+    sess.DockerSession.create(from_env)
+    assert calls[0]["version"] == "auto"
+    assert calls[1]["version"] == "1.45"
+    assert calls[0]["max_pool_size"] == sess.DEFAULT_POOL_SIZE
+
+
+def test_env_version_overrides_cache(monkeypatch):
+    monkeypatch.setenv("DOCKER_API_VERSION", "1.41")
+    calls = []
+    sess.DockerSession.create(lambda **kwargs: calls.append(kwargs) or types.SimpleNamespace(api=FakeAPI()))
+    assert calls[0]["version"] == "1.41"
+
+
+def test_counts_api_calls():
+    client = types.SimpleNamespace(api=FakeAPI())
+    s = sess.DockerSession(client)
+    hook = client.api.hooks["response"][0]
+    hook(_response("GET", "http+docker://localhost/v1.45/containers/json?all=1"))
+    hook(_response("GET", "http+docker://localhost/v1.45/containers/json"))
+    hook(_response("POST", "http+docker://localhost/v1.45/containers/abc/stop"))
+    assert s.api_calls == 3
+    assert s.calls_by_endpoint["GET /containers/json"] == 2
+    assert "Docker API calls: 3" in s.summary()
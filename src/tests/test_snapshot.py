@@ -0,0 +1,126 @@
+import types
+
+from devbox import devcontainer as dc
+from devbox import snapshot
+
+
+class FakeImages:
+    def __init__(self, base_id="sha256:base"):
+        self.base = types.SimpleNamespace(id=base_id, tags=["app:1"], attrs={"Labels": {}})
+        self.snapshots = []
+        self.in_use = set()
+
+    def add(self, tag, base, taken):
+        labels = {
+            snapshot.SNAPSHOT_OF_LABEL: "app:1",
+            snapshot.SNAPSHOT_BASE_LABEL: base,
+            snapshot.SNAPSHOT_TIME_LABEL: str(taken),
+        }
+        image = types.SimpleNamespace(id=f"sha256:{tag}", tags=[f"devbox-snapshot/app-1:{tag}"], attrs={"Labels": labels})
+        self.snapshots.append(image)
+        return image
+
+    def list(self, filters=None):
+        assert filters == {"label": [f"{snapshot.SNAPSHOT_OF_LABEL}=app:1"]}
+        return list(self.snapshots)
+
+    def get(self, name):
+        assert name == "app:1"
+        return self.base
+
+    def remove(self, image_id):
+        if image_id in self.in_use:
+            raise Exception("image is being used by a container")
+        self.snapshots = [i for i in self.snapshots if i.id != image_id]
+
+
+def test_latest_prefers_newest_valid_snapshot():
+    images = FakeImages()
+    images.add("old", "sha256:base", 1)
+    images.add("new", "sha256:base", 3)
+    images.add("stale", "sha256:previous", 5)
+    client = types.SimpleNamespace(images=images)
+
+    assert snapshot.latest(client, "app:1") == "devbox-snapshot/app-1:new"
+    images.base.id = "sha256:rebuilt"
+    assert snapshot.latest(client, "app:1") is None
+
+
+def test_create_commits_labels_and_prunes(capsys):
+    images = FakeImages()
+    for i in range(3):
+        images.add(f"s{i}", "sha256:base", i)
+    images.add("stale", "sha256:previous", 10)
+    images.in_use.add("sha256:s0")
+    client = types.SimpleNamespace(images=images)
+    commits = []
+
+    def commit(repository, tag, changes):
+        commits.append((repository, tag, changes))
+        image = images.add(tag, "sha256:base", 100)
+        image.tags = [f"{repository}:{tag}"]
+
+    container = types.SimpleNamespace(id="abcdef0123456789", name="devbox_x", attrs={"Image": "sha256:s2"}, commit=commit)
+    ref = snapshot.create(client, container, "app:1", keep=2)
+
+    ((repository, tag, changes),) = commits
+    assert repository == "devbox-snapshot/app-1"
+    assert ref == f"{repository}:{tag}" and tag.endswith("-abcdef01")
+    assert 'LABEL devbox.snapshot_base="sha256:base"' in changes
+    # newest two valid snapshots stay; s0 is over the cap but still used by a container
+    assert sorted(i.id for i in images.snapshots) == sorted([f"sha256:{tag}", "sha256:s2", "sha256:s0"])
+    out = capsys.readouterr().out
+    assert "Removed snapshot devbox-snapshot/app-1:stale" in out
+    assert "Kept snapshot devbox-snapshot/app-1:s0" in out
+
+
+def test_create_refuses_container_on_old_base(capsys):
+    images = FakeImages()
+    client = types.SimpleNamespace(images=images)
+    container = types.SimpleNamespace(id="abc", name="devbox_x", attrs={"Image": "sha256:previous"}, commit=None)
+
+    assert snapshot.create(client, container, "app:1") is None
+    assert "older version of app:1" in capsys.readouterr().out
+
+
+def test_start_creates_from_snapshot(monkeypatch, capsys):
+    images = FakeImages()
+    images.add("s1", "sha256:base", 1)
+    created = []
+
+    def run(**kwargs):
+        created.append(kwargs)
+        return types.SimpleNamespace(id="c1", name=kwargs["name"])
+
+    client = types.SimpleNamespace(images=images, containers=types.SimpleNamespace(run=run))
+    monkeypatch.setattr(dc, "docker", types.SimpleNamespace(errors=types.SimpleNamespace(ImageNotFound=KeyError)))
+    monkeypatch.setattr(dc, "find_running_container_by_image", lambda *args, **kwargs: None)
+
+    dc.start_dev_container("app:1", "devbox_x", [], session=types.SimpleNamespace(client=client), project="p", pool={"size": 2})
+
+    (kwargs,) = created
+    assert kwargs["image"] == "devbox-snapshot/app-1:s1"
+    assert kwargs["labels"][dc.IMAGE_LABEL] == "app:1"
+    assert "Using snapshot devbox-snapshot/app-1:s1 of app:1" in capsys.readouterr().out
+
+
+def test_snapshot_command_uses_the_features_image(tmp_path, monkeypatch):
+    from devbox import cli
+
+    config_path = tmp_path / ".devcontainer" / "devcontainer.json"
+    devcjson = {"image": "app:1", "features": {"./tool": {}}}
+    config = {"config_path": str(config_path), "devcjson": devcjson, "image_name": "app:1"}
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(dc, "load_project_config", lambda: config)
+    monkeypatch.setattr(dc.features, "resolve", lambda devcjson, base_dir: [{"id": "tool", "digest": "d"}])
+    monkeypatch.setattr(dc, "get_session", lambda: types.SimpleNamespace(client=None))
+    container = types.SimpleNamespace(name="devbox_x")
+    looked_up, snapshotted = [], []
+    monkeypatch.setattr(dc, "find_running_container_by_image", lambda image: looked_up.append(image) or container)
+    monkeypatch.setattr(snapshot, "create", lambda client, c, image, keep: snapshotted.append((c, image)) or "ref")
+
+    cli.snapshot_command(container_id=None, keep=None, list_only=False)
+
+    features_image = dc.features.image_name(dc.project_hash())
+    assert looked_up == [features_image]
+    assert snapshotted == [(container, features_image)]
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+import time
+
+# Generous wall-clock budget for `devbox --help` (interpreter start included);
+# override with DEVBOX_STARTUP_BUDGET on slow CI machines.
+STARTUP_BUDGET = float(os.environ.get("DEVBOX_STARTUP_BUDGET", "1.5"))
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import sys
+sys.argv = ["devbox"] + sys.argv[1:]
+import devbox
+try:
+    devbox.main()
+except SystemExit:
+    pass
+heavy = sorted(m for m in ("docker", "requests", "urllib3", "devbox.devcontainer") if m in sys.modules)
+print("HEAVY:" + ",".join(heavy))
+"""
+
+
+def _run(*args):
+    env = dict(os.environ, PYTHONPATH=SRC_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    started = time.monotonic()
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, *args], capture_output=True, text=True, env=env, timeout=60
+    )
+    return result, time.monotonic() - started
+
+
+def test_help_does_not_import_docker():
+    result, _ = _run("--help")
+    assert result.returncode == 0, result.stderr
+    assert "Hello from devbox" not in result.stdout
+    assert "HEAVY:\n" in result.stdout
+
+
+def test_subcommand_help_does_not_import_docker():
+    result, _ = _run("start", "--help")
+    assert "--rebuild" in result.stdout
+    assert "HEAVY:\n" in result.stdout
+
+
+def test_help_within_time_budget():
+    # Best of three to smooth out cold filesystem caches.
+    best = min(_run("--help")[1] for _ in range(3))
+    assert best < STARTUP_BUDGET, f"devbox --help took {best:.2f}s (budget {STARTUP_BUDGET:.2f}s)"
@@ -0,0 +1,134 @@
+import io
+import os
+import sys
+import types
+
+import pytest
+
+from devbox import sync
+
+
+def _write(root, rel, content):
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def _tree(root, ignore=()):
+    snap, _ = sync.scan(str(root), sync.DockerIgnore(list(ignore)))
+    return {rel: (kind, size) for rel, (kind, size, _) in snap.items()}
+
+
+def test_diff_folds_removed_directories():
+    old = {"a": ("d", 0, 1), "a/x": ("f", 1, 1), "a/y": ("f", 1, 1), "b": ("f", 1, 1)}
+    new = {"b": ("f", 2, 2), "c": ("f", 1, 1)}
+    assert sync.diff(old, new) == (["b", "c"], ["a"])
+
+
+def test_workspace_mode():
+    assert sync.workspace_mode({}) == "bind"
+    assert sync.workspace_mode({"workspaceMode": "volume"}) == "volume"
+    assert sync.workspace_mode({"workspaceMode": "nfs"}) == "bind"
+
+
+def test_sync_interval():
+    assert sync.sync_interval({}) == sync.POLL_INTERVAL
+    assert sync.sync_interval({"workspaceSyncInterval": 2}) == 2.0
+    assert sync.sync_interval({"workspaceSyncInterval": 0}) == sync.POLL_INTERVAL
+    assert sync.sync_interval({"workspaceSyncInterval": "fast"}) == sync.POLL_INTERVAL
+
+
+def test_scan_does_not_walk_ignored_directories(tmp_path, monkeypatch):
+    _write(tmp_path, "src/app.py", "x")
+    _write(tmp_path, "node_modules/pkg/index.js", "x")
+    _write(tmp_path, "build/keep.txt", "x")
+    _write(tmp_path, "build/out.o", "x")
+    stat_calls = []
+    real_lstat = os.lstat
+    monkeypatch.setattr(sync.os, "lstat", lambda path: stat_calls.append(path) or real_lstat(path))
+    tree = _tree(tmp_path, ["node_modules", "build", "!build/keep.txt"])
+    assert sorted(tree) == ["build/keep.txt", "src", "src/app.py"]
+    assert not [p for p in stat_calls if "node_modules" in p]
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="stands a directory in for the volume mountpoint (Linux)")
+def test_watcher_keeps_volume_consistent(tmp_path):
+    host, volume = tmp_path / "host", tmp_path / "volume"
+    host.mkdir()
+    volume.mkdir()
+    _write(host, "src/app.py", "print('v1')\n")
+    _write(host, "src/old/gone.py", "x\n")
+    _write(host, "README.md", "hi\n")
+    _write(host, "node_modules/pkg/index.js", "host copy\n")
+    os.symlink("src/app.py", host / "link")
+    # Generated inside the container; ignored paths are never deleted.
+    _write(volume, "node_modules/pkg/index.js", "container copy\n")
+
+    now = [0.0]
+    steps = []
+
+    def sleep(secs):
+        now[0] += secs
+        if steps:
+            steps.pop(0)()
+
+    syncer = sync.WorkspaceSync(
+        str(host), sync.DirectoryTarget(str(volume)), ignore=["node_modules"],
+        interval=0.5, debounce=0.4, reconcile_every=5.0, clock=lambda: now[0], sleep=sleep,
+    )
+    syncer.initial()
+    assert _tree(volume, ["node_modules"]) == _tree(host, ["node_modules"])
+
+    steps.extend([
+        lambda: _write(host, "src/app.py", "print('version 2')\n"),
+        lambda: _write(host, "src/new/mod.py", "y = 1\n"),  # still changing: batch waits
+        lambda: __import__("shutil").rmtree(host / "src" / "old"),
+        lambda: None,
+        lambda: None,
+        # A change the watcher's batch is told to miss, repaired by reconciliation.
+        lambda: _write(volume, "stray.txt", "?\n"),
+    ] + [lambda: None] * 12)
+    syncer.run(should_stop=lambda: not steps)
+
+    assert _tree(volume, ["node_modules"]) == _tree(host, ["node_modules"])
+    assert (volume / "src" / "app.py").read_text() == "print('version 2')\n"
+    assert os.readlink(volume / "link") == "src/app.py"
+    assert (volume / "node_modules" / "pkg" / "index.js").read_text() == "container copy\n"
+    # Initial copy, one debounced batch for the three edits, one reconciliation repair.
+    assert syncer.batches == 3
+
+
+def test_background_watcher_skips_the_initial_copy(tmp_path, monkeypatch):
+    host, copied, volume = tmp_path / "host", tmp_path / "copied", tmp_path / "volume"
+    copied.mkdir()
+    volume.mkdir()
+    _write(host, "src/app.py", "print('v1')\n")
+    syncer = sync.WorkspaceSync(str(host), sync.DirectoryTarget(str(copied)))
+    syncer.initial()
+
+    spawned = {}
+
+    class Stdin(io.BytesIO):
+        def close(self):
+            spawned["payload"] = self.getvalue().decode()
+
+    def popen(args, env=None, **kwargs):
+        spawned["env"] = env
+        return types.SimpleNamespace(pid=os.getpid(), stdin=Stdin())
+
+    monkeypatch.setattr(sync.subprocess, "Popen", popen)
+    sync.start_watcher("c" * 64, str(host), "/workspace", [], state=syncer.state, interval=2.0)
+    assert spawned["env"]["PYTHONPATH"]
+
+    # The detached process picks up the state and goes straight to watching.
+    watched = {}
+    client = types.SimpleNamespace(containers=types.SimpleNamespace(get=lambda cid: object()))
+    monkeypatch.setitem(sys.modules, "docker", types.SimpleNamespace(from_env=lambda: client))
+    monkeypatch.setattr(sys, "stdin", io.StringIO(spawned["payload"]))
+    monkeypatch.setattr(sync, "ContainerTarget", lambda container, workspace: sync.DirectoryTarget(str(volume)))
+    monkeypatch.setattr(sync.WorkspaceSync, "run", lambda self, **kwargs: watched.update(state=self.state, interval=self.interval))
+    sync.main()
+    assert watched["state"] == syncer.state
+    assert watched["interval"] == 2.0
+    assert os.listdir(volume) == []
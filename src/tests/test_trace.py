@@ -0,0 +1,72 @@
+import json
+import types
+import datetime
+
+import pytest
+
+from devbox import session as sess
+from devbox import trace
+
+
+@pytest.fixture
+def tracing(monkeypatch):
+    monkeypatch.setattr(trace, "_spans", [])
+    trace.enable()
+    yield
+    monkeypatch.setattr(trace, "_enabled", False)
+
+
+def test_disabled_spans_record_nothing(monkeypatch):
+    monkeypatch.setattr(trace, "_enabled", False)
+    monkeypatch.setattr(trace, "_spans", [])
+    with trace.span("phase"):
+        pass
+    trace.record("GET /containers/json", 0.1)
+    assert trace.spans() == []
+
+
+def test_spans_summary_and_chrome_trace(tracing, tmp_path):
+    @trace.traced("find existing container")
+    def find():
+        return "found"
+
+    with trace.span("start", image="img"):
+        assert find() == "found"
+        find()
+    trace.record("GET /containers/json", 0.25)
+
+    names = [s[0] for s in trace.spans()]
+    assert names == ["find existing container", "find existing container", "start", "GET /containers/json"]
+
+    table = trace.summary()
+    assert "phase: find existing container" in table
+    assert "api: GET /containers/json" in table
+    # sorted by total time: the recorded 0.25s API call comes first
+    assert table.splitlines()[2].strip().startswith("api: GET /containers/json")
+
+    path = tmp_path / "trace.json"
+    trace.write(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    assert {e["ph"] for e in events} == {"X"}
+    start = next(e for e in events if e["name"] == "start")
+    inner = [e for e in events if e["name"] == "find existing container"]
+    assert start["args"] == {"image": "img"}
+    # nested spans fall inside their parent on the same thread
+    assert all(start["ts"] <= e["ts"] and e["ts"] + e["dur"] <= start["ts"] + start["dur"] for e in inner)
+    assert all(e["tid"] == start["tid"] for e in inner)
+
+
+def test_session_records_api_call_spans(tracing):
+    api = types.SimpleNamespace(hooks={"response": []})
+    s = sess.DockerSession(types.SimpleNamespace(api=api))
+    response = types.SimpleNamespace(
+        request=types.SimpleNamespace(method="POST", url="http+docker://localhost/v1.45/containers/create"),
+        elapsed=datetime.timedelta(milliseconds=40),
+        status_code=201,
+    )
+    api.hooks["response"][0](response)
+    (name, category, _, duration, _, args), = trace.spans()
+    assert (name, category) == ("POST /containers/create", trace.API)
+    assert duration == 40_000_000
+    assert args == {"status": 201}
+    assert s.api_calls == 1